@@ -1,17 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-import subprocess
+import asyncio
 import json
 import os
-import csv
 from datetime import datetime
 import uuid
-import glob
-import ast
-import re
-import requests
+from functools import partial
+# Warm in-process backtest workers (instead of a subprocess per request)
+from backtesting.backtrader.worker_pool import BacktestPool, DEFAULT_WORKERS
+from backtesting.backtrader.jobs import BacktestJob, JobManager, get_config_hash
+from backtesting.functional.results import BacktestRunResult
+from backtesting.backtrader.result_store import SORT_FIELDS, get_cursor, open_result_store
+from backtesting.backtrader.portfolio import TIME_RANGES, PortfolioPerformance
+from backtesting.backtrader.strategy_registry import get_strategy_registry
+from backtesting.market_data.downsample import get_bar_slice, get_bar_slice_etag, is_historical_range
+from backtesting.market_data.quotes import QuoteFetcher, make_quote_provider
 # Add dotenv support
 from dotenv import load_dotenv
 import logging
@@ -32,6 +39,9 @@ load_dotenv()
 
 app = FastAPI(title="Bot v3.1 Backtesting API", version="1.0.0")
 
+# Compress responses > 1KB (bars, history pages)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Enable CORS for frontend integration
 app.add_middleware(
     CORSMiddleware,
@@ -39,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Link", "ETag"],  # pagination of history and trades, bars revalidation
 )
 
 # Data models
@@ -93,8 +104,26 @@ class BacktestResult(BaseModel):
     tradesDetails: Optional[List[TradeDetail]] = None
     createdAt: Optional[str] = None
 
-# In-memory storage for demonstration
-backtest_results: List[BacktestResult] = []
+# Strategies (strategies/st_*.py, shared with the backtest runner)
+strategy_registry = get_strategy_registry()
+
+# Persistent result storage (headers and trades in sqlite, trades loaded on demand)
+result_store = open_result_store(os.getenv('BACKTEST_RESULTS_DB', 'backtest_results.db'))
+
+# Portfolio curve of all stored trades (daily rollup, updated as results are stored)
+portfolio = PortfolioPerformance.from_store(result_store)
+
+# Market index quotes (QUOTE_PROVIDER=finnhub, needs FINNHUB_API_KEY | local: synthetic quotes; one pooled http client, short ttl cache)
+market_quotes = QuoteFetcher(
+    make_quote_provider(os.getenv('QUOTE_PROVIDER', 'finnhub'), api_key=os.getenv('FINNHUB_API_KEY')),
+    ttl=float(os.getenv('QUOTE_TTL', 15)),
+)
+
+# Backtest worker processes, started with the server
+backtest_pool = BacktestPool(workers=int(os.getenv('BACKTEST_WORKERS', DEFAULT_WORKERS)))
+
+# Backtest jobs (status, progress events and results of submitted backtests)
+backtest_jobs = JobManager(backtest_pool, timeout=300)  # 5 minute timeout
 
 # In-memory error notification storage
 recent_errors = []  # List of dicts: {timestamp, level, message}
@@ -120,292 +149,315 @@ error_handler.setLevel(logging.ERROR)
 error_handler.setFormatter(formatter)
 logger.addHandler(error_handler)
 
+@app.on_event("startup")
+async def startup_event():
+    """Start the backtest workers (imports and market data preload happen here)"""
+    pids = await asyncio.get_running_loop().run_in_executor(None, backtest_pool.start)
+    logger.info(f"Backtest workers ready: {pids}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the backtest workers"""
+    backtest_pool.close()
+    result_store.close()
+    await market_quotes.close()
+
 @app.get("/")
 async def root():
     return {"message": "Bot v3.1 Backtesting API is running"}
 
+async def validate_strategy(config: BacktestConfig):
+    """Reject strategy ids without a strategy class in a st_*.py file, or whose file fails to import"""
+    allowed_strategies = strategy_registry.ids()
+    if config.strategyId not in allowed_strategies:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid strategyId '{config.strategyId}'. Must be one of: {', '.join(allowed_strategies)}."
+        )
+    
+    # Imported once per file version (cached by the registry), off the event loop
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, strategy_registry.load_class, config.strategyId)
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Strategy '{config.strategyId}' can't be loaded: {e!r}"
+        )
+
+def build_backtest_args(config: BacktestConfig) -> List[str]:
+    """Map a frontend config to the arguments of the Python backtesting script"""
+    if config.symbol in ["AAPL", "MSFT", "NVDA", "AMZN", "TSLA"]:
+        symbol_arg = "--symbols5"
+    else:
+        symbol_arg = "--symbols"
+        symbol_value = config.symbol
+    
+    strategy_arg = f"--strategy={config.strategyId}"
+    
+    # Build the arguments of the Python backtesting script
+    cmd = [symbol_arg]
+    
+    # Add symbol value if not using predefined list
+    if symbol_arg == "--symbols":
+        cmd.append(symbol_value)
+    
+    cmd.append("--no-plot")  # Disable plotting for API usage
+    
+    # Add strategy
+    cmd.append(strategy_arg)
+    
+    # Add optional parameters if provided
+    if config.startDate:
+        cmd.extend(["--start-date", config.startDate])
+    if config.endDate:
+        cmd.extend(["--end-date", config.endDate])
+    return cmd
+
+async def build_backtest_result(config: BacktestConfig, backtest_id: str, result: Dict[str, Any]) -> BacktestResult:
+    """Build and store the BacktestResult of a finished worker job"""
+    run_result: BacktestRunResult = result["result"]
+    if run_result is None:
+        raise ValueError(f"no data for {config.symbol}")
+    
+    # Metrics and trades come typed from the run (no output parsing, no csv lookup)
+    metrics = run_result.metrics
+    total_return = (metrics.pnl / config.initialCapital) * 100
+    final_value = config.initialCapital + metrics.pnl
+    win_rate = metrics.win_rate
+    total_trades = metrics.trades
+    profit_factor = metrics.profit_factor if metrics.profit_factor is not None else 0.0
+    sharpe_ratio = metrics.sharpe_ratio
+    max_drawdown = (metrics.max_drawdown / config.initialCapital) * 100
+    
+    trade_details = [
+        TradeDetail(
+            id=i + 1,
+            entryDate=trade.open.isoformat(),
+            exitDate=trade.close.isoformat(),
+            entryPrice=trade.open_price,
+            exitPrice=trade.close_price,
+            direction=trade.type,
+            profit=trade.pnl,
+            profitPercent=trade.percentage,
+            size=trade.size,
+        )
+        for i, trade in enumerate(run_result.trades)
+    ]
+    
+    # Create the backtest result
+    backtest_result = BacktestResult(
+        id=backtest_id,
+        strategyId=config.strategyId,
+        strategyName=config.strategy.replace('_', ' ').title(),
+        symbol=config.symbol,
+        timeframe=config.timeframe,
+        startDate=config.startDate,
+        endDate=config.endDate,
+        initialCapital=config.initialCapital,
+        finalCapital=final_value,
+        initialBalance=config.initialCapital,
+        finalBalance=final_value,
+        totalReturn=total_return,
+        roi=total_return,
+        maxDrawdown=max_drawdown,
+        sharpeRatio=sharpe_ratio,
+        winRate=win_rate,
+        profitFactor=profit_factor,
+        trades=total_trades,
+        tradesCount=total_trades,
+        tradesDetails=trade_details,
+        createdAt=datetime.now().isoformat()
+    )
+    
+    # Store the result, its trades join the portfolio curve (sqlite writes off the event loop)
+    stored = backtest_result.dict()
+    await asyncio.get_running_loop().run_in_executor(None, store_backtest_result, stored)
+    
+    return backtest_result
+
+def store_backtest_result(stored: Dict[str, Any]):
+    """Add a result to the result store and, if it is new, its trades to the portfolio"""
+    if result_store.add(stored):
+        portfolio.add_trades(stored["tradesDetails"])
+
+async def submit_backtest(config: BacktestConfig) -> BacktestJob:
+    """Validate a config and start its backtest job in the worker pool"""
+    await validate_strategy(config)
+    
+    # Generate unique ID for this backtest
+    backtest_id = str(uuid.uuid4())
+    
+    cmd = build_backtest_args(config)
+    print(f"Running backtest: run_bt_v2.py {' '.join(cmd)}")
+    
+    # Identical configs submitted while this one runs share its job (single flight)
+    return backtest_jobs.submit(
+        cmd,
+        on_result=lambda result: build_backtest_result(config, backtest_id, result),
+        meta={"backtestId": backtest_id, "config": config.dict()},
+        key=get_config_hash(config.dict()),
+    )
+
 @app.post("/api/backtest/run", response_model=BacktestResult)
 async def run_backtest(config: BacktestConfig):
-    """Run a backtest using the Python backtesting script"""
+    """Run a backtest using the Python backtesting script (waits for the result)"""
     try:
-        # Dynamically discover allowed strategies from st_*.py files
-        strategy_dir = os.path.join(os.path.dirname(__file__), 'backtesting', 'backtrader', 'strategies')
-        pattern = os.path.join(strategy_dir, 'st_*.py')
-        strategy_files = glob.glob(pattern)
-        allowed_strategies = {os.path.basename(f)[3:-3] for f in strategy_files}
-        if config.strategyId not in allowed_strategies:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid strategyId '{config.strategyId}'. Must be one of: {', '.join(allowed_strategies)}."
-            )
-        
-        # Generate unique ID for this backtest
-        backtest_id = str(uuid.uuid4())
-        
-        # Map frontend config to Python script parameters
-        if config.symbol in ["AAPL", "MSFT", "NVDA", "AMZN", "TSLA"]:
-            symbol_arg = "--symbols5"
-        else:
-            symbol_arg = "--symbols"
-            symbol_value = config.symbol
-        
-        strategy_arg = f"--strategy={config.strategyId}"
-        
-        # Build command to run the Python backtesting script
-        cmd = [
-            "python", 
-            "backtesting/backtrader/run_bt_v2.py",
-            symbol_arg,
-            "--no-plot",  # Disable plotting for API usage
-        ]
-        
-        # Add symbol value if not using predefined list
-        if symbol_arg == "--symbols":
-            cmd.append(symbol_value)
-        
-        # Add strategy
-        cmd.append(strategy_arg)
-        
-        # Add optional parameters if provided
-        if config.startDate:
-            cmd.extend(["--start-date", config.startDate])
-        if config.endDate:
-            cmd.extend(["--end-date", config.endDate])
+        job = await submit_backtest(config)
+        await job.wait()
         
-        print(f"Running command: {' '.join(cmd)}")
-        
-        # Run the backtesting script
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            cwd=os.getcwd(),
-            timeout=300  # 5 minute timeout
-        )
-        
-        if result.returncode != 0:
-            logger.error(f"Backtesting failed: {result.stderr}")
+        if job.status == "failed":
+            logger.error(f"Backtesting failed: {job.error}")
+            if job.error == "timeout":
+                raise HTTPException(status_code=408, detail="Backtesting timeout")
             raise HTTPException(
                 status_code=500, 
-                detail=f"Backtesting failed: {result.stderr}"
+                detail=f"Backtesting failed: {job.error}"
             )
         
-        # Parse the output to extract results
-        output_lines = result.stdout.split('\n')
-        
-        # Extract key metrics from the output
-        total_return = 0.0
-        win_rate = 0.0
-        total_trades = 0
-        profit_factor = 0.0
-        sharpe_ratio = 0.0
-        max_drawdown = 0.0
-        final_value = config.initialCapital
-        
-        # Parse the summary output for metrics
-        for line in output_lines:
-            if "Total P&L:" in line:
-                try:
-                    pnl = float(line.split("$")[1].strip())
-                    total_return = (pnl / config.initialCapital) * 100
-                    final_value = config.initialCapital + pnl
-                except:
-                    pass
-            elif "Win Rate:" in line:
-                try:
-                    win_rate = float(line.split("%")[0].split(":")[-1].strip())
-                except:
-                    pass
-            elif "Total Trades:" in line:
-                try:
-                    total_trades = int(line.split(":")[-1].strip())
-                except:
-                    pass
-            elif "Profit Factor:" in line:
-                try:
-                    profit_factor = float(line.split(":")[-1].strip())
-                except:
-                    pass
-            elif "Sharpe Ratio:" in line:
-                try:
-                    sharpe_ratio = float(line.split(":")[-1].strip())
-                except:
-                    pass
-        
-        # Try to read detailed results from CSV if available
-        trade_details = []
-        try:
-            # Look for the most recent CSV file in outputs directory
-            outputs_dir = "backtesting/outputs"
-            csv_files = [f for f in os.listdir(outputs_dir) if f.endswith('.csv')]
-            if csv_files:
-                latest_csv = max(csv_files, key=lambda x: os.path.getctime(os.path.join(outputs_dir, x)))
-                csv_path = os.path.join(outputs_dir, latest_csv)
-                
-                # Read the CSV file for trade details
-                with open(csv_path, 'r') as f:
-                    reader = csv.DictReader(f)
-                    for i, row in enumerate(reader):
-                        try:
-                            trade_detail = TradeDetail(
-                                id=i + 1,
-                                entryDate=row.get('Entry Date', ''),
-                                exitDate=row.get('Exit Date', ''),
-                                entryPrice=float(row.get('Entry Price', 0)),
-                                exitPrice=float(row.get('Exit Price', 0)),
-                                direction='long',  # Default assumption
-                                profit=float(row.get('P&L', 0)),
-                                profitPercent=float(row.get('P&L %', 0)),
-                                size=float(row.get('Size', 0)) if row.get('Size') else None
-                            )
-                            trade_details.append(trade_detail)
-                        except Exception as e:
-                            logger.error(f"Error parsing trade detail: {e}")
-                            continue
-        except Exception as e:
-            logger.error(f"Error reading CSV file: {e}")
+        return job.result
         
-        # Create the backtest result
-        backtest_result = BacktestResult(
-            id=backtest_id,
-            strategyId=config.strategyId,
-            strategyName=config.strategy.replace('_', ' ').title(),
-            symbol=config.symbol,
-            timeframe=config.timeframe,
-            startDate=config.startDate,
-            endDate=config.endDate,
-            initialCapital=config.initialCapital,
-            finalCapital=final_value,
-            initialBalance=config.initialCapital,
-            finalBalance=final_value,
-            totalReturn=total_return,
-            roi=total_return,
-            maxDrawdown=max_drawdown,
-            sharpeRatio=sharpe_ratio,
-            winRate=win_rate,
-            profitFactor=profit_factor,
-            trades=total_trades,
-            tradesCount=total_trades,
-            tradesDetails=trade_details,
-            createdAt=datetime.now().isoformat()
-        )
-        
-        # Store the result
-        backtest_results.append(backtest_result)
-        
-        return backtest_result
-        
-    except subprocess.TimeoutExpired:
-        logger.error("Backtesting timeout")
-        raise HTTPException(status_code=408, detail="Backtesting timeout")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error running backtest: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.get("/api/backtest/history", response_model=List[BacktestResult])
-async def get_backtest_history():
-    """Get the history of all backtests"""
-    return backtest_results
+@app.post("/api/backtest/jobs", status_code=202)
+async def submit_backtest_job(config: BacktestConfig):
+    """Start a backtest and return its job id right away"""
+    job = await submit_backtest(config)
+    return {
+        "jobId": job.id,
+        "backtestId": job.meta["backtestId"],
+        "status": job.status,
+        "coalesced": job.requests > 1,  # joined an identical running backtest
+        "statusUrl": f"/api/backtest/jobs/{job.id}",
+        "eventsUrl": f"/api/backtest/jobs/{job.id}/events",
+    }
+
+@app.get("/api/backtest/jobs/{job_id}")
+async def get_backtest_job(job_id: str):
+    """Get the status and progress of a backtest job (and its result when done)"""
+    job = backtest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {**job.to_dict(), "backtestId": job.meta["backtestId"]}
+
+@app.get("/api/backtest/jobs/{job_id}/events")
+async def stream_backtest_job(job_id: str, request: Request, lastEventId: Optional[int] = None):
+    """Stream the progress events of a backtest job (server-sent events, resumable with Last-Event-ID)"""
+    job = backtest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    after_id = lastEventId if lastEventId is not None else -1
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        after_id = int(last_event_id)
+    
+    async def events():
+        async for event in backtest_jobs.stream(job, after_id, heartbeat=15):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Fields of the history list (trade details come from /api/backtest/{id}/trades)
+HISTORY_FIELDS = [field for field in BacktestResult.__fields__ if field != "tradesDetails"]
+MAX_PAGE_SIZE = 500
+
+@app.get("/api/backtest/history")
+async def get_backtest_history(
+    request: Request,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    strategyId: Optional[str] = None,
+    symbol: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    minSharpe: Optional[float] = None,
+    sort: str = "createdAt",
+    order: str = "desc",
+    fields: Optional[str] = None,
+):
+    """Get a page of backtest history (no trade details), next page cursor in the X-Next-Cursor header"""
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort '{sort}'. Must be one of: {', '.join(SORT_FIELDS)}.")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order, must be 'asc' or 'desc'.")
+    selected_fields = HISTORY_FIELDS
+    if fields:
+        selected_fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected_fields if field not in HISTORY_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(unknown)}. Must be in: {', '.join(HISTORY_FIELDS)}.")
+    
+    # Store reads off the event loop (the store lock is held by result writes meanwhile)
+    loop = asyncio.get_running_loop()
+    try:
+        headers = await loop.run_in_executor(None, partial(
+            result_store.list_headers,
+            symbol=symbol,
+            strategy_id=strategyId,
+            start_date=startDate,
+            end_date=endDate,
+            min_sharpe=minSharpe,
+            sort=sort,
+            descending=order == "desc",
+            after=cursor,
+            limit=limit + 1,  # one more: is there a next page
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    page = headers[:limit]
+    response_headers = {}
+    if len(headers) > limit:
+        next_cursor = get_cursor(page[-1], sort)
+        response_headers["X-Next-Cursor"] = next_cursor
+        response_headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    
+    return JSONResponse(
+        content=[{field: header.get(field) for field in selected_fields} for header in page],
+        headers=response_headers,
+    )
+
+@app.get("/api/backtest/{backtest_id}/trades", response_model=List[TradeDetail])
+async def get_backtest_trades(backtest_id: str, limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE * 10), cursor: Optional[int] = None):
+    """Get a page of the trades of a backtest, next page cursor in the X-Next-Cursor header"""
+    loop = asyncio.get_running_loop()
+    header = await loop.run_in_executor(None, result_store.get, backtest_id)
+    if header is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    
+    trades = await loop.run_in_executor(None, partial(result_store.get_trades, backtest_id, after=cursor, limit=limit + 1))
+    page = trades[:limit]
+    response_headers = {"X-Total-Count": str(header.get("trades") or 0)}
+    if len(trades) > limit:
+        response_headers["X-Next-Cursor"] = str(page[-1]["id"])
+    
+    return JSONResponse(content=page, headers=response_headers)
 
 @app.get("/api/backtest/{backtest_id}", response_model=BacktestResult)
 async def get_backtest(backtest_id: str):
     """Get a specific backtest by ID"""
-    for result in backtest_results:
-        if result.id == backtest_id:
-            return result
-    raise HTTPException(status_code=404, detail="Backtest not found")
+    result = await asyncio.get_running_loop().run_in_executor(None, partial(result_store.get, backtest_id, trades=True))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    return result
 
 @app.get("/api/strategies")
 async def get_strategies():
-    """Get available strategies from st_*.py files"""
-    strategy_dir = os.path.join(os.path.dirname(__file__), 'backtesting', 'backtrader', 'strategies')
-    pattern = os.path.join(strategy_dir, 'st_*.py')
-    strategy_files = glob.glob(pattern)
-    strategies = []
-
-    def format_strategy_name(class_name):
-        # Remove 'Strategy' prefix
-        if class_name.startswith('Strategy'):
-            name = class_name[len('Strategy'):]
-        else:
-            name = class_name
-        # If only digits, return as is
-        if name.isdigit():
-            return name
-        # Split by underscores
-        parts = name.split('_')
-        formatted_parts = []
-        for i, part in enumerate(parts):
-            # If last part and all uppercase or known suffix, wrap in parentheses
-            if i == len(parts) - 1 and (part.isupper() or part in {'LR', 'Pivot', 'Long', 'Short'}):
-                if len(parts) > 1:
-                    formatted_parts[-1] = formatted_parts[-1] + f' ({part})'
-                else:
-                    formatted_parts.append(f'({part})')
-            else:
-                # Split CamelCase into words
-                words = re.findall(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+', part)
-                formatted = ' '.join(words)
-                # If this is a multi-word segment, join with hyphen
-                if len(words) > 1 and i != len(parts) - 1:
-                    formatted = '-'.join(words)
-                formatted_parts.append(formatted)
-        # Join all parts with spaces
-        return ' '.join([p for p in formatted_parts if p])
-
-    for file_path in strategy_files:
-        file_name = os.path.basename(file_path)
-        # id: remove 'st_' prefix and '.py' suffix
-        if file_name.startswith('st_') and file_name.endswith('.py'):
-            strategy_id = file_name[3:-3]
-        else:
-            continue
-        # Defaults
-        class_name = None
-        description = ""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                source = f.read()
-            module = ast.parse(source)
-            # Try to get module-level docstring
-            module_doc = ast.get_docstring(module)
-            if module_doc:
-                description = module_doc
-            # Find the first class definition
-            for node in module.body:
-                if isinstance(node, ast.ClassDef):
-                    class_name = node.name
-                    class_doc = ast.get_docstring(node)
-                    if class_doc:
-                        description = class_doc
-
-                    # Check for a DESCRIPTION attribute on the class
-                    for item in node.body:
-                        if isinstance(item, ast.Assign):
-                            for target in item.targets:
-                                if isinstance(target, ast.Name) and target.id == 'DESCRIPTION':
-                                    if isinstance(item.value, ast.Constant):
-                                        description = item.value.value
-                                    break
-                            if description: # If description found, no need to check further assignments
-                                break
-                    break
-        except Exception as e:
-            logger.error(f"Error parsing {file_name}: {e}")
-        # Fallbacks
-        if class_name:
-            name = format_strategy_name(class_name)
-        else:
-            # If no class, fallback to id
-            name = strategy_id.replace('_', ' ').title()
-        strategies.append({
-            "id": strategy_id,
-            "name": name,
-            "description": description,
-            "type": "custom",
-            "parameters": []
-        })
-    return strategies
+    """Get available strategies from st_*.py files that import (re-parsed only when a file changes)"""
+    # Directory scan, parsing and the first import of each file off the event loop
+    strategies = await asyncio.get_running_loop().run_in_executor(None, strategy_registry.list_strategies)
+    return [strategy.to_dict() for strategy in strategies]
 
 @app.get("/api/symbols")
 async def get_symbols():
@@ -442,120 +494,58 @@ async def get_available_data():
         }
     ]
 
-@app.get("/api/portfolio/performance")
-async def get_portfolio_performance(timeRange: str = "ALL"):
-    """Get portfolio performance data"""
-    # Mock portfolio performance data
-    from datetime import datetime, timedelta
-    import random
+@app.get("/api/data/bars")
+async def get_bars(
+    request: Request,
+    symbol: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    maxPoints: int = Query(1000, ge=10, le=100000),
+):
+    """5m bars of a symbol, downsampled to maxPoints (OHLC preserving), with ETag revalidation"""
+    loop = asyncio.get_running_loop()
+    try:
+        etag = await loop.run_in_executor(None, get_bar_slice_etag, symbol, start, end, maxPoints)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid range: {e}")
     
-    # Generate mock performance data based on time range
-    end_date = datetime.now()
-    if timeRange == "1D":
-        start_date = end_date - timedelta(days=1)
-        data_points = 24  # Hourly data
-    elif timeRange == "1W":
-        start_date = end_date - timedelta(weeks=1)
-        data_points = 7  # Daily data
-    elif timeRange == "1M":
-        start_date = end_date - timedelta(days=30)
-        data_points = 30  # Daily data
-    elif timeRange == "3M":
-        start_date = end_date - timedelta(days=90)
-        data_points = 90  # Daily data
-    elif timeRange == "1Y":
-        start_date = end_date - timedelta(days=365)
-        data_points = 52  # Weekly data
-    else:  # ALL
-        start_date = end_date - timedelta(days=365 * 2)
-        data_points = 104  # Weekly data for 2 years
+    # Historical ranges never change: cache for a year (a changed data file gets a new ETag)
+    cache_control = "public, max-age=31536000, immutable" if is_historical_range(start, end) else "public, max-age=60"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
     
-    # Generate mock performance data with some volatility
-    performance_data = []
-    benchmark_data = []
-    base_value = 10000
-    benchmark_base = 10000
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
     
-    for i in range(data_points):
-        date = start_date + timedelta(days=i * (365 * 2 / data_points))
-        
-        # Portfolio performance with some random walk
-        portfolio_return = random.uniform(-0.02, 0.03)  # -2% to +3% daily
-        base_value *= (1 + portfolio_return)
-        
-        # Benchmark performance (slightly more conservative)
-        benchmark_return = random.uniform(-0.015, 0.025)  # -1.5% to +2.5% daily
-        benchmark_base *= (1 + benchmark_return)
-        
-        performance_data.append({
-            "date": date.strftime("%Y-%m-%d"),
-            "value": round(base_value, 2)
-        })
-        
-        benchmark_data.append({
-            "date": date.strftime("%Y-%m-%d"),
-            "value": round(benchmark_base, 2)
-        })
-    
-    # Calculate metrics
-    total_return = ((base_value - 10000) / 10000) * 100
-    max_drawdown = random.uniform(5, 15)  # Mock drawdown
-    sharpe_ratio = random.uniform(0.8, 2.5)  # Mock Sharpe ratio
+    bar_slice = await loop.run_in_executor(None, get_bar_slice, symbol, start, end, maxPoints)
+    if not bar_slice.points:
+        raise HTTPException(status_code=404, detail=f"No bars for {symbol} in this range")
+    return Response(content=bar_slice.body, media_type="application/json", headers=headers)
+
+@app.get("/api/portfolio/performance")
+async def get_portfolio_performance(timeRange: str = "ALL"):
+    """Equity curve, drawdown and metrics of the stored backtest trades over a time range"""
+    if timeRange not in TIME_RANGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid timeRange '{timeRange}'. Must be one of: {', '.join(TIME_RANGES)}."
+        )
     
-    return {
-        "performanceData": performance_data,
-        "benchmarkData": benchmark_data,
-        "metrics": {
-            "totalReturn": round(total_return, 2),
-            "maxDrawdown": round(max_drawdown, 2),
-            "sharpeRatio": round(sharpe_ratio, 2)
-        }
-    }
+    # Served from the daily rollup (computed once per change, not per request)
+    return portfolio.get(timeRange)
+
+# ETF proxies of the S&P 500, NASDAQ and Dow Jones indices
+MARKET_INDICES = [
+    {"symbol": "SPY", "name": "S&P 500 (ETF Proxy)"},
+    {"symbol": "QQQ", "name": "NASDAQ (ETF Proxy)"},
+    {"symbol": "DIA", "name": "Dow Jones (ETF Proxy)"},
+]
 
 @app.get("/api/market/indices")
 async def get_market_indices():
-    """Fetch S&P 500, NASDAQ, and Dow Jones index data from Finnhub using ETF proxies (SPY, QQQ, DIA)"""
-    import requests
-    FINNHUB_API_KEY = "d0vt25pr01qkepd2bp0gd0vt25pr01qkepd2bp10"
-    ETF_SYMBOLS = [
-        {"symbol": "SPY", "name": "S&P 500 (ETF Proxy)"},
-        {"symbol": "QQQ", "name": "NASDAQ (ETF Proxy)"},
-        {"symbol": "DIA", "name": "Dow Jones (ETF Proxy)"},
-    ]
-    results = []
-    for idx in ETF_SYMBOLS:
-        try:
-            url = f"https://finnhub.io/api/v1/quote?symbol={idx['symbol']}&token={FINNHUB_API_KEY}"
-            r = requests.get(url)
-            r.raise_for_status()
-            data = r.json()
-            results.append({
-                "symbol": idx["symbol"],
-                "name": idx["name"],
-                "price": data.get("c", 0),
-                "change": data.get("d", 0),
-                "changesPercentage": data.get("dp", 0),
-                "open": data.get("o", 0),
-                "high": data.get("h", 0),
-                "low": data.get("l", 0),
-                "previousClose": data.get("pc", 0),
-                "timestamp": data.get("t", 0),
-            })
-        except Exception as e:
-            logger.error(f"Error fetching {idx['symbol']} from Finnhub: {e}")
-            results.append({
-                "symbol": idx["symbol"],
-                "name": idx["name"],
-                "price": 0,
-                "change": 0,
-                "changesPercentage": 0,
-                "open": 0,
-                "high": 0,
-                "low": 0,
-                "previousClose": 0,
-                "timestamp": 0,
-            })
-    return results
+    """S&P 500, NASDAQ and Dow Jones quotes (ETF proxies SPY, QQQ, DIA), cached with stale-while-revalidate"""
+    quotes = await market_quotes.get_quotes([idx["symbol"] for idx in MARKET_INDICES])
+    return [{"name": idx["name"], **quote} for idx, quote in zip(MARKET_INDICES, quotes)]
 
 @app.get("/api/notifications")
 async def get_notifications():
@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 
 # ----------------------------------------------
 cwd = os.getcwd()
+sys.path.append(f"{cwd}")
 sys.path.append(f"{cwd}\\backtesting")
 sys.path.append(f"{cwd}\\backtesting\\functional")
 path = f"{cwd}\\backtesting\\csv_input"
@@ -20,7 +21,8 @@ filename="aapl_5m_2022-05-09_to_2023-07-12.csv"
 df_5m = pd.read_csv(f"{path}/{filename}", parse_dates=["date"])
 df_5m = df_5m.set_index("date")
 df_5m.sort_index(ascending=True, inplace=True)
-df_5m = df_5m.ffill()  # Forward-fill the NaN values
+from backtesting.market_data.quality import repair_bars
+df_5m, df_5m_quality = repair_bars(df_5m)  # Drop missing (nan) bars, fill gaps inside a session with flat bars
 
 df_5m['open_close_change'] = df_5m['close'] - df_5m['open']
 df_5m['percentage'] = df_5m['open_close_change'] / df_5m['open']
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 
 # ----------------------------------------------
 cwd = os.getcwd()
+sys.path.append(f"{cwd}")
 sys.path.append(f"{cwd}\\backtesting")
 sys.path.append(f"{cwd}\\backtesting\\functional")
 path = f"{cwd}\\backtesting\\csv_input"
@@ -18,10 +19,10 @@ path = f"{cwd}\\backtesting\\csv_input"
 filename="aapl_5m_2022-05-09_to_2023-07-12.csv"
 # filename="amd_5m_2022-05-09_to_2023-07-12.csv"
 # filename="TSLA_5m_2022-05-09_to_2023-07-12.csv"
-df_5m = pd.read_csv(f"{path}/{filename}", parse_dates=["date"])
-df_5m = df_5m.set_index("date")
-df_5m.sort_index(ascending=True, inplace=True)
-df_5m = df_5m.ffill()  # Forward-fill the NaN values
+from backtesting.market_data.columnar_cache import read_csv_cached
+df_5m = read_csv_cached(f"{path}/{filename}")
+from backtesting.market_data.quality import repair_bars
+df_5m, df_5m_quality = repair_bars(df_5m)  # Drop missing (nan) bars, fill gaps inside a session with flat bars
 
     
 
@@ -29,10 +30,7 @@ df_5m = df_5m.ffill()  # Forward-fill the NaN values
 # ----------------------------------------------
 # read 1day timeframe data
 filename="aapl_1d_2019_to_2024.csv"
-df_1d = pd.read_csv(f"{path}/{filename}")
-df_1d["date"] = pd.to_datetime(df_1d["date"], format="%m/%d/%Y")
-df_1d = df_1d.set_index("date")
-df_1d.sort_index(ascending=True, inplace=True)
+df_1d = read_csv_cached(f"{path}/{filename}", date_format="%m/%d/%Y")
 
 
 from functional.dataframes import print_df
@@ -0,0 +1,33 @@
+from feeds.fd_numpy import NumpyData, to_bt_datetime
+
+
+# ============================================================
+# memory-mapped store feed
+# ============================================================
+# backtrader feed over one symbol of a MmapStore
+# (backtesting/market_data/mmap_store.py). bars are read straight from
+# the memmap arrays (bulk preload, see fd_numpy.py), no pandas row access.
+#
+#   store = MmapStore("data_2020_2025/mmap")
+#   data = MmapData(store=store, symbol="AAPL", start_date="2022-05-02", end_date="2022-05-06",
+#                   timeframe=bt.TimeFrame.Minutes, compression=5)
+#   cerebro_run(data=data, strategy=...)
+
+
+
+
+class MmapData(NumpyData):
+
+    params = (
+        ('store', None), # MmapStore
+        ('symbol', None),
+        ('start_date', None), # first timestamp/date (inclusive), None: first bar
+        ('end_date', None), # last timestamp/date (inclusive), None: last bar
+    )
+
+
+    def get_arrays(self):
+        arrays = self.p.store.get_arrays(self.p.symbol, self.p.start_date, self.p.end_date)
+        arrays["datetime"] = to_bt_datetime(arrays.pop("timestamp"))
+        arrays["openinterest"] = None
+        return arrays
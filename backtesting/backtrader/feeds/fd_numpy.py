@@ -0,0 +1,126 @@
+import array
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# numpy array feed
+# ============================================================
+# backtrader feed over preextracted numpy arrays: datetime as backtrader
+# float dates (bt.date2num) + ohlcv. drop-in for bt.feeds.PandasData on the
+# csv frames, without pandas row access in _load().
+#
+# with cerebro's default preload=True the whole feed is loaded with one
+# array assignment per line instead of one load() call per bar. row-wise
+# _load() is still used without preload, with filters or with tz input.
+#
+#   data_5m = NumpyData.from_df(df_5m, timeframe=bt.TimeFrame.Minutes, compression=5)
+#   cerebro.adddata(data_5m)
+
+
+EPOCH_ORDINAL = 719163 # datetime(1970, 1, 1).toordinal()
+NS_PER_DAY = 86400 * 10**9
+
+LINE_NAMES = ["datetime", "open", "high", "low", "close", "volume", "openinterest"]
+
+
+# epoch ns -> backtrader float dates, same arithmetic as bt.date2num (bit-identical values)
+def to_bt_datetime(epoch_ns: np.ndarray) -> np.ndarray:
+    epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+    days, ns = np.divmod(epoch_ns, NS_PER_DAY)
+    seconds, microseconds = np.divmod(ns // 1000, 10**6)
+    hours, seconds = np.divmod(seconds, 3600)
+    minutes, seconds = np.divmod(seconds, 60)
+    return (
+        (days + EPOCH_ORDINAL).astype(np.float64)
+        + (hours / 24.0 + minutes / 1440.0 + seconds / 86400.0 + microseconds / 86400000000.0)
+    )
+
+
+
+
+class NumpyData(bt.feed.DataBase):
+
+    # one array per line, all of the same length (None: line is nan, like a missing PandasData column)
+    params = (
+        ('datetime', None), # backtrader float dates, sorted
+        ('open', None),
+        ('high', None),
+        ('low', None),
+        ('close', None),
+        ('volume', None),
+        ('openinterest', None),
+    )
+
+
+    # from a csv-like frame: DatetimeIndex (naive utc) + open/high/low/close/volume columns
+    @classmethod
+    def from_df(cls, df: pd.DataFrame, **kwargs):
+        arrays = {
+            name: df[name].to_numpy(dtype=np.float64)
+            for name in LINE_NAMES[1:]
+            if name in df.columns
+        }
+        data = cls(datetime=to_bt_datetime(pd.DatetimeIndex(df.index).as_unit("ns").asi8), **arrays, **kwargs)
+        if len(df) and "symbol" in df.columns:
+            data._name = f"{df.iloc[0]['symbol']}"
+        return data
+
+
+    # {line name: array}, subclasses can provide the arrays lazily (e.g. from a store)
+    def get_arrays(self) -> dict[str, np.ndarray]:
+        return {name: getattr(self.p, name) for name in LINE_NAMES}
+
+
+    def start(self):
+        super().start()
+        arrays = self.get_arrays()
+        n = len(arrays["datetime"]) if arrays["datetime"] is not None else 0
+        self._arrays = {
+            name: np.ascontiguousarray(values, dtype=np.float64) if values is not None else np.full(n, np.nan)
+            for name, values in arrays.items()
+        }
+        self._n = n
+        self._i = 0
+
+
+    def _load(self):
+        i = self._i
+        if i >= self._n:
+            return False
+
+        for name in LINE_NAMES:
+            getattr(self.lines, name)[0] = self._arrays[name][i]
+
+        self._i += 1
+        return True
+
+
+    def _can_bulk_preload(self) -> bool:
+        return (
+            not self._filters and not self._ffilters and not self._barstack and not self._barstash
+            and self._tzinput is None
+            and all(isinstance(line.array, array.array) for line in self.lines) # not exactbars/qbuffer
+            and len(self.lines.getlinealiases()) == len(LINE_NAMES) # no extra lines to fill
+        )
+
+
+    def preload(self):
+        if not self._can_bulk_preload():
+            return super().preload()
+
+        # same bars load() would keep: fromdate <= dt <= todate (dt sorted)
+        datetimes = self._arrays["datetime"]
+        i = int(np.searchsorted(datetimes, self.fromdate, "left"))
+        j = int(np.searchsorted(datetimes, self.todate, "right"))
+
+        for name in LINE_NAMES:
+            line = getattr(self.lines, name)
+            line.array = array.array("d")
+            line.array.frombytes(self._arrays[name][i:j].tobytes())
+            line.extension = 0
+
+        self._i = self._n # nothing left for _load()
+        self._last()
+        self.home()
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import time as tm
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable
+
+from backtesting.backtrader.worker_pool import BacktestPool
+
+
+# ============================================================
+# asynchronous backtest jobs
+# ============================================================
+# submit() returns a job right away, the backtest runs in the worker pool
+# (worker_pool.py) and the job collects its progress events:
+#   {"event": "start", "dates": N, "units": M}
+#   {"event": "date", "date": "2022-05-09", "index": i, "total": N}
+#   {"event": "unit", "date": ..., "symbol": "AAPL", "index": j, "total": n, "trades": [...]}
+#   {"event": "done" | "failed", "status": ..., "error": ...}
+# every event gets an increasing "id" (for server-sent events / Last-Event-ID).
+#
+#   jobs = JobManager(pool)
+#   job = jobs.submit(["--symbols", "AAPL", "--no-plot"], on_result=build_result)
+#   job.to_dict()                       # status, progress, result when done
+#   async for event in jobs.stream(job): ...
+#   await job.wait()
+#
+# single flight: jobs submitted with a key (get_config_hash() of the request
+# config) while a job with the same key is still queued/running get that job
+# instead of starting the same backtest again; the key is dropped when the job
+# finishes (finished results are the caches' business). SingleFlight does the
+# same for any coroutine (servers that don't use jobs).
+
+
+JOB_STATUSES = ["queued", "running", "done", "failed"]
+
+
+@dataclass
+class BacktestJob:
+    id: str
+    argv: list[str]
+    status: str = "queued"
+    created_at: float = field(default_factory=tm.time)
+    started_at: float = None
+    finished_at: float = None
+    progress: dict = field(default_factory=lambda: {"dates": 0, "date": None, "dateIndex": 0, "units": 0, "unitsDone": 0, "trades": 0})
+    events: list[dict] = field(default_factory=list)
+    result: Any = None # on_result() of the finished job
+    error: str = None
+    meta: dict = field(default_factory=dict) # caller data (e.g. the request config)
+    key: str = None # single flight key
+    requests: int = 1 # submits served by this job (> 1: coalesced)
+
+    _updated: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    _finished: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+    async def wait(self):
+        await self._finished.wait()
+
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        job = {
+            "jobId": self.id,
+            "status": self.status,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "progress": self.progress,
+            "events": len(self.events),
+            "requests": self.requests,
+            "error": self.error,
+        }
+        if include_result and self.status == "done":
+            job["result"] = self.result
+        return job
+
+
+
+
+class JobManager:
+
+    def __init__(self, pool: BacktestPool, timeout: float = None, max_jobs: int = 200):
+        self.pool = pool
+        self.timeout = timeout
+        self.max_jobs = max_jobs # finished jobs beyond this are forgotten (oldest first)
+        self.jobs: OrderedDict[str, BacktestJob] = OrderedDict()
+        self.inflight: dict[str, BacktestJob] = {} # key -> unfinished job
+
+
+    # start a job (needs a running event loop), on_result(worker result) -> job.result, sync or async.
+    # with a key: the unfinished job with the same key, if any (single flight)
+    def submit(self, argv: list[str], on_result: Callable[[dict], Any] = None, meta: dict = None, key: str = None) -> BacktestJob:
+        if key is not None and key in self.inflight:
+            job = self.inflight[key]
+            job.requests += 1
+            return job
+
+        job = BacktestJob(id=str(uuid.uuid4()), argv=list(argv), meta=meta or {}, key=key)
+        self.jobs[job.id] = job
+        if key is not None:
+            self.inflight[key] = job
+        self._evict()
+        asyncio.create_task(self._run(job, on_result))
+        return job
+
+
+    def get(self, job_id: str) -> BacktestJob:
+        return self.jobs.get(job_id)
+
+
+    async def _run(self, job: BacktestJob, on_result: Callable[[dict], Any]):
+        job.status = "running"
+        job.started_at = tm.time()
+        try:
+            result = await self.pool.run(job.argv, timeout=self.timeout, on_progress=lambda event: self._add_event(job, event))
+            if on_result is not None:
+                result = on_result(result)
+                if inspect.isawaitable(result):
+                    result = await result
+            job.result = result
+            job.status = "done"
+        except asyncio.TimeoutError:
+            job.error = "timeout"
+            job.status = "failed"
+        except Exception as e:
+            job.error = f"{e}"
+            job.status = "failed"
+
+        job.finished_at = tm.time()
+        if job.key is not None:
+            self.inflight.pop(job.key, None)
+        self._add_event(job, {"event": job.status, "status": job.status, "error": job.error})
+        job._finished.set()
+
+
+    def _add_event(self, job: BacktestJob, event: dict):
+        event = {"id": len(job.events), **event}
+        job.events.append(event)
+
+        progress = job.progress
+        if event["event"] == "start":
+            progress["dates"] = event["dates"]
+            progress["units"] = event["units"]
+        elif event["event"] == "date":
+            progress["date"] = event["date"]
+            progress["dateIndex"] = event["index"]
+        elif event["event"] == "unit":
+            progress["unitsDone"] += 1
+            progress["trades"] += len(event["trades"])
+
+        # wake up the streams waiting for this job
+        updated, job._updated = job._updated, asyncio.Event()
+        updated.set()
+
+
+    # events of a job from after_id on (replay, then live) until the job is finished,
+    # None every `heartbeat` seconds without events (keep-alive of long streams)
+    async def stream(self, job: BacktestJob, after_id: int = -1, heartbeat: float = None) -> AsyncIterator[dict]:
+        i = after_id + 1
+        while True:
+            updated = job._updated
+            while i < len(job.events):
+                yield job.events[i]
+                i += 1
+            if job.finished:
+                return
+            try:
+                await asyncio.wait_for(updated.wait(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_jobs)]:
+            del self.jobs[job_id]
+
+
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self.calls: dict[str, asyncio.Future] = {} # key -> result of the running call
+
+
+    # await fn() once per key at a time: calls with the key of a running call share its result (or exception)
+    async def run(self, key: str, fn: Callable[[], Any]) -> Any:
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self.calls[key] = future
+            future.add_done_callback(lambda _: self.calls.pop(key, None))
+        # shield: a cancelled caller (client gone) doesn't cancel the call of the others
+        return await asyncio.shield(future)
+
+
+
+
+# ----------------------------------------------
+# request keys
+
+# hash of a request config (all fields, nested dicts included): equal for configs
+# that run the same backtest (key order, 1 vs 1.0 and surrounding blanks don't matter)
+def get_config_hash(config: dict) -> str:
+    return hashlib.sha256(json.dumps(_normalize(config), sort_keys=True).encode()).hexdigest()
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {f"{k}": _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return value.strip()
+    return f"{value}"
@@ -0,0 +1,177 @@
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from backtesting.backtrader.result_store import ResultStore, rollup_daily_pnl
+from backtesting.functional.results import TRADING_DAYS_PER_YEAR
+
+
+# ============================================================
+# portfolio performance of the stored backtests
+# ============================================================
+# the portfolio is all the stored backtest trades together, on one account
+# of initial_capital: its equity on a day is initial_capital + the pnl of all
+# the trades closed up to that day.
+#
+# the curve is kept per day (pnl of the trades closed that day, the store's
+# daily_pnl rollup): loaded once, then add_trades() folds in the trades of
+# each newly stored result. reads never touch trades, only days, and the
+# payload of each time range (equity and drawdown points, total return, max
+# drawdown, sharpe) is computed once per change and then served as is.
+#
+#   portfolio = PortfolioPerformance.from_store(store)
+#   portfolio.add_trades(result["tradesDetails"])
+#   portfolio.get("1M")   # {"performanceData": [{"date", "value"}], "drawdownData": [...], "metrics": {...}}
+#
+# time ranges end on the last day with closed trades (backtests replay past
+# market data), the sharpe ratio counts every business day of the range (0
+# pnl on days without closed trades), long ranges are drawn from the weekly rollup (last equity /
+# deepest drawdown of each week), metrics always come from the daily one.
+
+
+INITIAL_CAPITAL = 10000.0
+
+# time range -> (length, points)
+TIME_RANGES = {
+    "1D": (pd.DateOffset(days=1), "daily"),
+    "1W": (pd.DateOffset(weeks=1), "daily"),
+    "1M": (pd.DateOffset(months=1), "daily"),
+    "3M": (pd.DateOffset(months=3), "daily"),
+    "1Y": (pd.DateOffset(years=1), "weekly"),
+    "ALL": (None, "weekly"),
+}
+DEFAULT_TIME_RANGE = "ALL"
+
+
+class PortfolioPerformance:
+
+    def __init__(self, initial_capital: float = INITIAL_CAPITAL):
+        self.initial_capital = initial_capital
+        self._lock = threading.Lock()
+        self._days: dict[str, list] = {} # "YYYY-MM-DD" -> [pnl, trades]
+        self._curve: pd.DataFrame = None # daily curve, None: to rebuild (days changed)
+        self._ranges: dict[str, dict] = {} # time range -> payload of the current curve
+
+
+    @classmethod
+    def from_store(cls, store: ResultStore, initial_capital: float = INITIAL_CAPITAL) -> "PortfolioPerformance":
+        portfolio = cls(initial_capital)
+        portfolio.add_days({day: [pnl, trades] for day, pnl, trades in store.get_daily_pnl()})
+        return portfolio
+
+
+    # ----------------------------------------------
+    # updates
+
+    # trades (api format) of a newly stored result
+    def add_trades(self, trades: list[dict]):
+        self.add_days(rollup_daily_pnl(trades))
+
+
+    def add_days(self, days: dict[str, list]):
+        if not days:
+            return
+        with self._lock:
+            for day, (pnl, trades) in days.items():
+                total = self._days.setdefault(day, [0.0, 0])
+                total[0] += pnl
+                total[1] += trades
+            self._curve = None
+            self._ranges = {}
+
+
+    # ----------------------------------------------
+    # reads
+
+    # payload of a time range (TIME_RANGES), KeyError: unknown time range
+    def get(self, time_range: str = DEFAULT_TIME_RANGE) -> dict:
+        if time_range not in TIME_RANGES:
+            raise KeyError(f"unknown time range '{time_range}', available: {', '.join(TIME_RANGES)}")
+        with self._lock:
+            if time_range not in self._ranges:
+                self._ranges[time_range] = self._get_range(time_range)
+            return self._ranges[time_range]
+
+
+    # daily curve: pnl, trades, equity (end of day), indexed by day
+    def _get_curve(self) -> pd.DataFrame:
+        if self._curve is None:
+            days = sorted(self._days.items())
+            curve = pd.DataFrame(
+                [[pnl, trades] for _, (pnl, trades) in days],
+                index=pd.DatetimeIndex([day for day, _ in days]),
+                columns=["pnl", "trades"],
+            )
+            curve["equity"] = self.initial_capital + curve["pnl"].cumsum()
+            self._curve = curve
+        return self._curve
+
+
+    def _get_range(self, time_range: str) -> dict:
+        curve = self._get_curve()
+        length, points = TIME_RANGES[time_range]
+        first_day = curve.index[0] if len(curve) else None # of the range
+        if length is not None and len(curve):
+            first_day = curve.index[-1] - length + pd.Timedelta(days=1)
+            in_range = curve.index > curve.index[-1] - length
+            base = curve["equity"].iloc[np.argmax(in_range) - 1] if not in_range[0] else self.initial_capital
+            curve = curve[in_range]
+        else:
+            base = self.initial_capital # equity before the range
+
+        equity = curve["equity"].to_numpy()
+        pnl = curve["pnl"].to_numpy()
+
+        # drawdown: % below the running peak (from the equity before the range)
+        peak = np.maximum.accumulate(np.r_[base, equity])[1:]
+        drawdown = pd.Series(100 * (peak - equity) / peak, index=curve.index)
+
+        # daily returns on the equity of the day before, over every business day of the range:
+        # days without closed trades return 0 (leaving them out overstates the sharpe ratio)
+        returns = np.empty(0)
+        if len(curve):
+            days = pd.bdate_range(first_day, curve.index[-1]).union(curve.index)
+            daily_pnl = curve["pnl"].reindex(days, fill_value=0.0).to_numpy()
+            daily_equity = base + np.cumsum(daily_pnl)
+            returns = daily_pnl / np.r_[base, daily_equity[:-1]]
+        sharpe_ratio = 0.0
+        if len(returns) > 1 and returns.std(ddof=1) > 0:
+            sharpe_ratio = float(returns.mean() / returns.std(ddof=1) * math.sqrt(TRADING_DAYS_PER_YEAR))
+
+        equity = curve["equity"]
+        if points == "weekly":
+            weeks = curve.index.to_period("W")
+            last_days = pd.Series(curve.index, index=curve.index).groupby(weeks).last()
+            equity = pd.Series(equity.groupby(weeks).last().to_numpy(), index=last_days.to_numpy())
+            drawdown = pd.Series(drawdown.groupby(weeks).max().to_numpy(), index=last_days.to_numpy())
+
+        return {
+            "timeRange": time_range,
+            "startDate": _format_day(curve.index[0]) if len(curve) else None,
+            "endDate": _format_day(curve.index[-1]) if len(curve) else None,
+            "points": points,
+            "performanceData": _to_points(equity),
+            "drawdownData": _to_points(drawdown),
+            "benchmarkData": [],
+            "metrics": {
+                "totalReturn": round(float(100 * (equity.iloc[-1] - base) / base), 2) if len(curve) else 0.0,
+                "maxDrawdown": round(float(drawdown.max()), 2) if len(curve) else 0.0,
+                "sharpeRatio": round(sharpe_ratio, 2),
+                "pnl": round(float(pnl.sum()), 2),
+                "trades": int(curve["trades"].sum()),
+                "days": len(curve),
+            },
+        }
+
+
+
+
+def _format_day(day: pd.Timestamp) -> str:
+    return day.strftime("%Y-%m-%d")
+
+
+# series by day -> [{"date", "value"}]
+def _to_points(series: pd.Series) -> list[dict]:
+    return [{"date": _format_day(day), "value": round(float(value), 2)} for day, value in series.items()]
@@ -0,0 +1,318 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+
+
+# ============================================================
+# backtest result store
+# ============================================================
+# append-only sqlite store (wal journal) of the api backtest results:
+#   results   one row per backtest: the result header (everything but the
+#             trades) as json, plus indexed columns to filter and sort on
+#             (id, strategy, symbol, created time, ...)
+#   trades    one row per trade, clustered by (result_id, seq), so the trades
+#             of a result are read only when asked for (lazy), as one range
+#   daily_pnl rollup of all the stored trades per exit day (pnl, trades),
+#             kept up to date by add(): the portfolio curve (portfolio.py)
+#             reads days, never trades
+#
+# adding a result is one transaction of 1 + trades rows + its days' rollups
+# (nothing else is rewritten), opening the store reads nothing. results are dicts in the api
+# format (BacktestResult fields, trades in "tradesDetails").
+#
+#   store = ResultStore("backtest_results.db")
+#   store.add(result.dict())
+#   page = store.list_headers(symbol="AAPL", sort="sharpeRatio", limit=50)   # no trades
+#   store.list_headers(symbol="AAPL", sort="sharpeRatio", after=get_cursor(page[-1], "sharpeRatio"), limit=50)
+#   store.get(result_id, trades=True)
+#   store.get_trades(result_id, after=0, limit=100)
+
+
+DEFAULT_PATH = "backtest_results.db"
+LEGACY_JSON_PATH = "backtest_results.json" # whole-file json of the older servers, imported once
+
+# result field -> indexed column of the results table
+HEADER_COLUMNS = {
+    "id": "id",
+    "strategyId": "strategy_id",
+    "symbol": "symbol",
+    "timeframe": "timeframe",
+    "startDate": "start_date",
+    "endDate": "end_date",
+    "createdAt": "created_at",
+    "sharpeRatio": "sharpe_ratio",
+    "totalReturn": "total_return",
+    "winRate": "win_rate",
+    "trades": "trades",
+}
+
+# trade field -> column of the trades table
+TRADE_COLUMNS = {
+    "id": "seq",
+    "entryDate": "entry_date",
+    "exitDate": "exit_date",
+    "entryPrice": "entry_price",
+    "exitPrice": "exit_price",
+    "direction": "direction",
+    "profit": "profit",
+    "profitPercent": "profit_percent",
+    "size": "size",
+    "type": "type",
+}
+
+# result fields list_headers() sorts on -> column
+SORT_FIELDS = {
+    "createdAt": "created_at",
+    "sharpeRatio": "sharpe_ratio",
+    "totalReturn": "total_return",
+    "winRate": "win_rate",
+}
+NULL_SORT_VALUE = -1e308 # results without the sort field sort as lowest
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    strategy_id TEXT,
+    symbol TEXT,
+    timeframe TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    created_at TEXT,
+    sharpe_ratio REAL,
+    total_return REAL,
+    win_rate REAL,
+    trades INTEGER,
+    header TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at);
+CREATE INDEX IF NOT EXISTS results_symbol ON results (symbol, created_at);
+CREATE INDEX IF NOT EXISTS results_strategy_id ON results (strategy_id, created_at);
+
+CREATE TABLE IF NOT EXISTS trades (
+    result_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    entry_date TEXT,
+    exit_date TEXT,
+    entry_price REAL,
+    exit_price REAL,
+    direction TEXT,
+    profit REAL,
+    profit_percent REAL,
+    size REAL,
+    type TEXT,
+    PRIMARY KEY (result_id, seq)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS daily_pnl (
+    day TEXT PRIMARY KEY,
+    pnl REAL NOT NULL,
+    trades INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class ResultStore:
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        # one connection shared by the server's threads (event loop, executors), serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL") # wal: durable at checkpoints, never corrupt
+        self._conn.executescript(SCHEMA)
+        self._backfill_daily_pnl()
+
+
+    # ----------------------------------------------
+    # writes
+
+    # store a result (api format, trades in "tradesDetails"), a known id is ignored
+    def add(self, result: dict) -> bool:
+        header = {k: v for k, v in result.items() if k != "tradesDetails"}
+        trades = result.get("tradesDetails") or []
+
+        header_row = [header.get(field) for field in HEADER_COLUMNS]
+        header_row.append(json.dumps(header, default=str))
+        trade_rows = [
+            [result["id"], trade.get("id") or i + 1] + [trade.get(field) for field in list(TRADE_COLUMNS)[1:]]
+            for i, trade in enumerate(trades)
+        ]
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"INSERT OR IGNORE INTO results ({', '.join(HEADER_COLUMNS.values())}, header) VALUES ({', '.join('?' * (len(HEADER_COLUMNS) + 1))})",
+                header_row,
+            )
+            if not cursor.rowcount:
+                return False
+            self._conn.executemany(
+                f"INSERT INTO trades (result_id, {', '.join(TRADE_COLUMNS.values())}) VALUES ({', '.join('?' * (len(TRADE_COLUMNS) + 1))})",
+                trade_rows,
+            )
+            self._conn.executemany(
+                "INSERT INTO daily_pnl (day, pnl, trades) VALUES (?, ?, ?) "
+                "ON CONFLICT (day) DO UPDATE SET pnl = pnl + excluded.pnl, trades = trades + excluded.trades",
+                [[day, pnl, n] for day, (pnl, n) in rollup_daily_pnl(trades).items()],
+            )
+        return True
+
+
+    # stores created before the daily_pnl table: roll up their trades once
+    def _backfill_daily_pnl(self):
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT EXISTS (SELECT 1 FROM daily_pnl)").fetchone()[0]:
+                return
+            self._conn.execute(
+                "INSERT INTO daily_pnl (day, pnl, trades) "
+                "SELECT substr(exit_date, 1, 10), TOTAL(profit), COUNT(*) FROM trades "
+                "WHERE exit_date IS NOT NULL GROUP BY 1"
+            )
+
+
+    # results of a whole-file json (list of results) not in the store yet, returns the number added
+    def import_json(self, filename: str = LEGACY_JSON_PATH) -> int:
+        with open(filename, "r") as f:
+            results = json.load(f)
+        return sum(self.add(result) for result in results)
+
+
+    # ----------------------------------------------
+    # reads
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+    # result headers (no trades), filtered, sorted by `sort` (a SORT_FIELDS field) then id.
+    # pages: after=cursor of the last header of the previous page (keyset, see get_cursor())
+    def list_headers(
+            self,
+            symbol: str = None,
+            strategy_id: str = None,
+            start_date: str = None, # backtests whose date range overlaps [start_date, end_date]
+            end_date: str = None,
+            min_sharpe: float = None,
+            sort: str = "createdAt",
+            descending: bool = True,
+            after: str = None,
+            limit: int = None,
+        ) -> list[dict]:
+
+        column = SORT_FIELDS[sort]
+        if sort != "createdAt": # always set (and indexed as is)
+            column = f"IFNULL({column}, {NULL_SORT_VALUE})"
+        where, params = [], []
+        if symbol is not None:
+            where.append("symbol = ?")
+            params.append(symbol)
+        if strategy_id is not None:
+            where.append("strategy_id = ?")
+            params.append(strategy_id)
+        if start_date is not None:
+            where.append("end_date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            where.append("start_date <= ?")
+            params.append(end_date)
+        if min_sharpe is not None:
+            where.append("sharpe_ratio >= ?")
+            params.append(min_sharpe)
+        if after is not None:
+            where.append(f"({column}, id) {'<' if descending else '>'} (?, ?)")
+            params += parse_cursor(after)
+
+        sql = "SELECT header FROM results"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        direction = "DESC" if descending else "ASC"
+        sql += f" ORDER BY {column} {direction}, id {direction} LIMIT ?"
+        params.append(limit if limit is not None else -1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row["header"]) for row in rows]
+
+
+    # a result header, with its trades when trades=True (None: unknown id)
+    def get(self, result_id: str, trades: bool = False) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT header FROM results WHERE id = ?", (result_id,)).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row["header"])
+        if trades:
+            result["tradesDetails"] = self.get_trades(result_id)
+        return result
+
+
+    # trades of a result, in order, from after the trade id `after` (pages: id of the last trade of the previous page)
+    def get_trades(self, result_id: str, after: int = None, limit: int = None) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(TRADE_COLUMNS.values())} FROM trades WHERE result_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (result_id, after if after is not None else -1, limit if limit is not None else -1),
+            ).fetchall()
+        return [dict(zip(TRADE_COLUMNS, row)) for row in rows]
+
+
+    # (day, pnl, trades) of every day with closed trades, in order
+    def get_daily_pnl(self) -> list[tuple[str, float, int]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT day, pnl, trades FROM daily_pnl ORDER BY day").fetchall()
+        return [tuple(row) for row in rows]
+
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+
+
+# ----------------------------------------------
+# rollups
+
+# trades (api format) -> {exit day "YYYY-MM-DD": [pnl, trades]}
+def rollup_daily_pnl(trades: list[dict]) -> dict[str, list]:
+    days = {}
+    for trade in trades:
+        if not trade.get("exitDate"):
+            continue
+        day = days.setdefault(f"{trade['exitDate']}"[:10], [0.0, 0])
+        day[0] += trade.get("profit") or 0.0
+        day[1] += 1
+    return days
+
+
+
+
+# ----------------------------------------------
+# cursors
+
+# opaque cursor of a header (its sort value and id): the next page starts after it
+def get_cursor(header: dict, sort: str = "createdAt") -> str:
+    value = header.get(sort)
+    value = NULL_SORT_VALUE if value is None else value
+    return base64.urlsafe_b64encode(json.dumps([value, header["id"]]).encode()).decode()
+
+
+# cursor -> [sort value, id], ValueError: not a cursor
+def parse_cursor(cursor: str) -> list:
+    try:
+        value, result_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError(f"invalid cursor: {cursor}") from None
+    return [value, result_id]
+
+
+# a store at path, with the legacy json results imported when the store is new
+def open_result_store(path: str = DEFAULT_PATH, legacy_json: str = LEGACY_JSON_PATH) -> ResultStore:
+    store = ResultStore(path)
+    if legacy_json and os.path.exists(legacy_json) and not store.count():
+        store.import_json(legacy_json)
+    return store
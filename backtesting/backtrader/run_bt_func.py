@@ -22,7 +22,9 @@ if os.path.join(cwd, "scripts") not in sys.path:
     sys.path.append(os.path.join(cwd, "scripts"))
 
 from backtesting.functional.dataframes import print_df_index_range
+from backtesting.functional.results import TRADES_INFO_COLUMNS
 from strategies.st_base import StrategyBase
+from feeds.fd_numpy import NumpyData
 
     
 # TODO: fix function
@@ -93,20 +95,28 @@ def cerebro_run(
         df: pd.DataFrame, # usually 5 min timeframe
         strategy: StrategyBase = None,
         cash=100000.0, # usd
-        plot: bool= True
+        plot: bool= True,
+        data: bt.feed.DataBase = None, # ready feed instead of df (e.g. feeds.fd_mmap.MmapData)
+        df_1d: pd.DataFrame = None, # daily bars, second feed (data_1d), see market_data/resample.py
     ) -> list[tuple]:
 
     
-    print_df_index_range(df)
-    
     cerebro = bt.Cerebro()
-    data_5m = bt.feeds.PandasData(
-        dataname=df, 
-        timeframe=bt.TimeFrame.Minutes,  # Set to minutes
-        compression=5,                   # Set the compression to 5 for 5-minute bars
-    )
-    data_5m._name = df.iloc[0]["symbol"]
+    if data is None:
+        print_df_index_range(df)
+        # numpy arrays feed, bulk preloaded (same bars as bt.feeds.PandasData)
+        data_5m = NumpyData.from_df(
+            df,
+            timeframe=bt.TimeFrame.Minutes,  # Set to minutes
+            compression=5,                   # Set the compression to 5 for 5-minute bars
+        )
+        data_5m._name = df.iloc[0]["symbol"]
+    else:
+        data_5m = data
+        data_5m._name = data_5m._name or getattr(data_5m.p, "symbol", "")
     cerebro.adddata(data_5m)
+    if df_1d is not None:
+        add_daily_feed(cerebro, df_1d, data_5m._name)
     cerebro.addstrategy(strategy) if strategy else None
     # Add the TradeAnalyzer
     cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trade_analyzer")
@@ -138,9 +148,21 @@ def cerebro_run(
             fmt_x_data='%Y-%m-%d %H:%M',
         )
 
-    return cerebro.runstrats[0][0].trades_info
+    return cerebro.runstrats[0][0].trades_info.to_list()
+
+
+
+
 
 
+# daily bars as the second feed (StrategyBase.data_1d)
+def add_daily_feed(cerebro: bt.Cerebro, df_1d: pd.DataFrame, name: str) -> bt.feed.DataBase:
+    if "symbol" in df_1d.columns:
+        df_1d = df_1d[df_1d["symbol"] == name]
+    data_1d = NumpyData.from_df(df_1d, timeframe=bt.TimeFrame.Days, compression=1)
+    data_1d._name = name
+    cerebro.adddata(data_1d)
+    return data_1d
 
 
 
@@ -165,21 +187,7 @@ def print_summary(
     ):
 
     # trades_info to csv
-    header=[
-        "method",
-        "ref",
-        "symbol",
-        "type",
-        "status",
-        "open",
-        "close",
-        "size",
-        "open price",
-        "close price",
-        "diff price",
-        "percentage",
-        "pnl",
-    ]
+    header=TRADES_INFO_COLUMNS
     df_trades_info = pd.DataFrame(trades_info, columns=header)
     df_trades_info["open"] = pd.to_datetime(df_trades_info["open"])
     df_trades_info["close"] = pd.to_datetime(df_trades_info["close"])
@@ -253,6 +261,7 @@ def print_summary(
     # list_tuple_to_csv(header=header, list_tuples=trades_info, output_filename=output_filename, append_timestamp=True)
     df_trades_info.to_csv(output_filename)
     print(f"Results saved to {output_filename}")
+    return output_filename
 
 
 
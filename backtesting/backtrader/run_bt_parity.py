@@ -0,0 +1,167 @@
+# =================================================================================================
+# PARITY HARNESS: VECTORIZED FAST PATH VS BACKTRADER
+# =================================================================================================
+#
+# Runs the same strategy through cerebro_run() and through the vectorized long/flat engine
+# (backtesting/functional/vectorized.py) on the sample CSVs in backtesting/csv_input, and
+# compares the resulting trades_info rows (all fields except trade.ref).
+#
+# Covered strategies are the ones whose rules can be expressed as entry/exit boolean arrays:
+#   time_based: Strategy18to19 (enter 13:30, exit 19:00, close at market close 20:00 utc)
+#   smas_cross: StrategySMAsCross, long side only, one trade per day (SMA 21/200 cross up
+#               enters, cross down exits, close at market close 20:00 utc)
+#
+# Usage:
+#   python backtesting/backtrader/run_bt_parity.py
+#   python backtesting/backtrader/run_bt_parity.py --start-date 2022-05-09 --end-date 2023-07-12
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time as tm
+from datetime import time
+
+import backtrader as bt
+import pandas as pd
+
+
+# Get the project root directory (two levels up from this file)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from run_bt_func import cerebro_run
+from backtesting.functional.vectorized import run_vectorized, get_time_mask
+from strategies.st_time import Strategy18to19
+from strategies.st_smas_cross import StrategySMAsCross
+
+
+CSV_INPUT_FILES = [
+    "aapl_5m_2022-05-09_to_2023-07-12.csv",
+    "AMD_5m_2022-05-09_to_2023-07-12.csv",
+    "TSLA_5m_2022-05-09_to_2023-07-12.csv",
+]
+
+
+# Strategy18to19 as entry/exit arrays
+def get_signals_time_based(df: pd.DataFrame) -> dict:
+    return dict(
+        entries=get_time_mask(df.index, time(13, 30), "=="),
+        exits=get_time_mask(df.index, time(19, 0), "=="),
+        force_exit_time=time(20, 0), # StrategyBase.market_close
+        one_trade_per_session=False,
+    )
+
+
+# StrategySMAsCross on the long side, at most one trade per day (session)
+class StrategySMAsCross_LongOneTrade(StrategySMAsCross):
+
+    def next(self):
+        bt.Strategy.next(self)
+        self.flush_orders()
+
+        self.close_positions_market_close()
+        if not self.allow_trade():
+            return
+
+        if not self.position:
+            if self.crossover > 0 and not self.get_session_trades_count():
+                self.order = self.buy(data=self.data_5m)
+        elif not self.order and self.crossover < 0:
+            self.order = self.close(data=self.data_5m)
+
+
+# backtrader's CrossOver(SMA(21), SMA(200)): the sign of the last non-zero difference changes
+def get_crossover(df: pd.DataFrame, short_period: int = 21, long_period: int = 200) -> tuple[pd.Series, pd.Series]:
+    diff = df["close"].rolling(short_period).mean() - df["close"].rolling(long_period).mean()
+    nzd = diff.mask(diff == 0).ffill().where(diff.notna()).fillna(diff) # NonZeroDifference
+    before = nzd.shift(1)
+    return (before < 0) & (diff > 0), (before > 0) & (diff < 0)
+
+
+# StrategySMAsCross_LongOneTrade as entry/exit arrays (signals in regular trading hours only)
+def get_signals_smas_cross(df: pd.DataFrame) -> dict:
+    cross_up, cross_down = get_crossover(df)
+    rth = get_time_mask(df.index, time(13, 30), ">=") & get_time_mask(df.index, time(20, 0), "<")
+    return dict(
+        entries=cross_up.to_numpy() & rth,
+        exits=cross_down.to_numpy() & rth,
+        force_exit_time=time(20, 0), # StrategyBase.market_close
+        one_trade_per_session=True,
+    )
+
+
+STRATEGIES = {
+    "time_based": (Strategy18to19, get_signals_time_based),
+    "smas_cross": (StrategySMAsCross_LongOneTrade, get_signals_smas_cross),
+}
+
+
+def read_csv_input(filename: str) -> pd.DataFrame:
+    df = pd.read_csv(os.path.join(project_root, "backtesting", "csv_input", filename), parse_dates=["date"], encoding="utf-8-sig")
+    df = df.set_index("date")
+    df = df.dropna(subset=["open", "high", "low", "close"]) # missing bars (backtrader would fill at nan)
+    df.sort_index(ascending=True, inplace=True)
+    return df
+
+
+# compare trades_info rows without trade.ref (a global counter in backtrader)
+def compare_trades_info(expected: list[tuple], actual: list[tuple], tolerance: float = 1e-9) -> list[str]:
+    mismatches = []
+    if len(expected) != len(actual):
+        mismatches.append(f"count: backtrader={len(expected)}, vectorized={len(actual)}")
+
+    for e, a in zip(expected, actual):
+        for k, (ev, av) in enumerate(zip(e[2:], a[2:])):
+            if isinstance(ev, float) and isinstance(av, float):
+                equal = abs(ev - av) <= tolerance
+            else:
+                equal = f"{ev}" == f"{av}"
+            if not equal:
+                mismatches.append(f"backtrader={e}\n    vectorized={a}")
+                break
+
+    return mismatches
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the vectorized fast path with backtrader on the sample CSVs.")
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='time_based')
+    parser.add_argument('--start-date', type=str, default='2022-05-09', metavar='YYYY-MM-DD')
+    parser.add_argument('--end-date', type=str, default='2022-08-31', metavar='YYYY-MM-DD')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    strategy, get_signals = STRATEGIES[args.strategy]
+
+    failed = False
+    for filename in CSV_INPUT_FILES:
+        df = read_csv_input(filename).loc[args.start_date:args.end_date]
+
+        start_time = tm.time()
+        with contextlib.redirect_stdout(io.StringIO()): # cerebro_run logs every bar
+            expected = cerebro_run(df=df, strategy=strategy, plot=False)
+        bt_runtime = tm.time() - start_time
+
+        start_time = tm.time()
+        actual = run_vectorized(df, **get_signals(df))
+        vec_runtime = tm.time() - start_time
+
+        mismatches = compare_trades_info(expected, actual)
+        failed |= bool(mismatches)
+
+        print(f"[{'OK' if not mismatches else 'MISMATCH'}] {filename} ({len(df)} bars): {len(expected)} trades, "
+              f"backtrader {round(bt_runtime, 3)}s, vectorized {round(vec_runtime, 4)}s "
+              f"(x{round(bt_runtime / max(vec_runtime, 1e-9))})")
+        for m in mismatches[:10]:
+            print(f"    {m}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
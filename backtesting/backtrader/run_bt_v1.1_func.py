@@ -18,6 +18,7 @@ from dfs_set_ta_indicators_5m import df_5m,\
 from dfs_set_ta_indicators_1D import df_1d
 
 from functional.dataframes import print_df_index_range
+from feeds.fd_numpy import NumpyData
 from functional.files import list_tuple_to_csv
 
 from strategies.bt_s1_1_by_time import Strategy1_1_by_time
@@ -56,8 +57,9 @@ def cerebro_wrap(take_profit_usd=0.50, stop_loss_usd=10):
     cerebro = bt.Cerebro()
 
 
-    data_5m = bt.feeds.PandasData(
-        dataname=df_5m, 
+    # numpy arrays feed, bulk preloaded (same bars as bt.feeds.PandasData)
+    data_5m = NumpyData.from_df(
+        df_5m,
         timeframe=bt.TimeFrame.Minutes,  # Set to minutes
         compression=5,                   # Set the compression to 5 for 5-minute bars
     )
@@ -65,7 +67,7 @@ def cerebro_wrap(take_profit_usd=0.50, stop_loss_usd=10):
     cerebro.adddata(data_5m)
 
     if 1:
-        data_1d = bt.feeds.PandasData(dataname=df_1d)
+        data_1d = NumpyData.from_df(df_1d)
         data_1d._name = "AAPL"
         cerebro.adddata(data_1d)
 
@@ -173,27 +175,8 @@ def cerebro_wrap(take_profit_usd=0.50, stop_loss_usd=10):
         # for buy_ref, sell_order in cerebro.runstrats[0][0].buy_sell_orders.items():
         #     print(f"buy({buy_ref}): sell({sell_order.ref})")
 
-        orders_info: list[tuple] = [] # trade's info only, more readable
-        orders: list[bt.Order] = cerebro.runstrats[0][0].orders
-        for o in orders:
-            o_info=(
-                inspect.currentframe().f_code.co_name,
-                o.ref,
-                o.notify_dt,
-                o.pair_type if hasattr(o, "pair_type") else None, # ['enter', 'exit']
-                o.pair_order_ref if hasattr(o, "pair_order_ref") else None, # order's pair ref (id)
-                f"{bt.num2date(o.executed.dt)}" if o.executed.dt else o.executed.dt,  # Convert to standard datetime
-                o.ordtypename(),   # ['Buy', 'Sell']
-                o.getstatusname(), # ['Created', 'Submitted', 'Accepted', 'Partial', 'Completed', 'Canceled', 'Expired', 'Margin', 'Rejected']
-                o.size,
-                o.executed.size, # executed.size related to o.size
-                o.price, # the take profit price (limit price)
-                o.executed.price,
-                round(o.executed.value, 2),
-                o.getordername(),  # ['Market', 'Close', 'Limit', 'Stop', 'StopLimit', 'StopTrail', 'StopTrailLimit', 'Historical']
-            )
-            print(o_info)
-            orders_info.append(o_info)
+        # plain order records (one row per order, latest status), see StrategyBase.flush_orders()
+        orders_info: list[tuple] = cerebro.runstrats[0][0].orders.to_list()
 
         # to csv
         header=[
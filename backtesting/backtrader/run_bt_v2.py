@@ -12,6 +12,8 @@ import pytz
 import os
 import sys
 import argparse  # For parsing command line arguments
+import inspect
+from typing import Callable
 
 # Import libraries for timing execution and backtesting
 import time as tm
@@ -38,23 +40,42 @@ if os.path.join(cwd, "scripts") not in sys.path:
 
 # Import helper functions for running cerebro engine, timing, and printing summaries
 from run_bt_func import cerebro_run, print_current_runtime, print_summary
-# Import the 5-minute data frame and symbols from CSV
-from scripts.testing.plot.read_multi_symbols_csv import df_5m, symbols
-# Import helper function for dataframe info display
-from backtesting.functional.dataframes import get_df_title
+# Import the market data loader (5-minute bars, filtered by symbols/dates at read time)
+from backtesting.market_data.loader import get_dates, iter_days
+# Import session-aware 5m -> 1d resampling (cached daily bars for the data_1d feed)
+from backtesting.market_data.resample import load_daily_bars, load_store_daily_bars
+# Import compact dtypes helpers (restore exact float64 bars per symbol, memory report)
+from backtesting.market_data.compact import restore_bars, print_memory_report
+# Import the data quality checks and repairs (missing slots, nan bars, bad ohlc, negative volume)
+from backtesting.market_data.quality import repair_bars, print_quality_report
+# Import the daily symbol universe (per (date, symbol) price/volume stats, filtered before loading bars)
+from backtesting.market_data.universe import load_store_universe, load_universe, query_universe, get_symbols_per_date
+# Import the memory-mapped ohlcv store (shared page cache across worker processes)
+from backtesting.market_data.mmap_store import open_store
+# Import per-(date, symbol) checkpoints for resumable batch runs
+from backtesting.functional.checkpoints import get_run_checkpoint_dir, has_checkpoint, write_checkpoint, read_checkpoints, parse_shard, in_shard
+# Import content-addressed result cache (strategy code + params + data slice)
+from backtesting.functional.result_cache import ResultCache, get_data_fingerprint, get_params_fingerprint, get_source_hashes
+# Import the typed run result (trades and metrics) returned to callers
+from backtesting.functional.results import BacktestRunResult
 # Import predefined symbol lists (S&P 500 subsets)
 from testing.polygon.snp500_symbols import symbols32, symbols5
 
-# Import trading strategies
-from strategies.st_time import Strategy18to19  # Time-based strategy (trades during specific hours)
-from strategies.st_each_bar_long_lr import StrategyEachBar_Long_LR  # Linear regression trend-following strategy
+# Import the backtrader feed over the memory-mapped store
+from feeds.fd_mmap import MmapData
+
+# Import the strategy registry (any strategies/st_<id>.py, imported when used)
+from backtesting.backtrader.strategy_registry import get_strategy_registry
 
 
 # =================================================================================================
 # PARSE COMMAND LINE ARGUMENTS
 # =================================================================================================
 
-def parse_args():
+DEFAULT_CHECKPOINT_DIR = "backtesting/outputs/checkpoints"
+DAILY_LOOKBACK_DAYS = 30
+
+def parse_args(argv: list[str] = None):
     """Parse command line arguments for the backtesting script."""
     # Add program description and epilog with examples
     description = '''
@@ -80,6 +101,19 @@ def parse_args():
       
       # Save results to custom file with lower price threshold
       python backtesting/backtrader/run_bt_v2.py --symbols32 --price-threshold 100 --output-file results.csv
+      
+      # Long batch run that survives interruptions (rerun the same command to continue)
+      python backtesting/backtrader/run_bt_v2.py --all-symbols --no-plot --resume
+      
+      # Split a batch run across 2 machines sharing one checkpoint directory
+      python backtesting/backtrader/run_bt_v2.py --all-symbols --no-plot --checkpoint-dir ckpt --shard 0/2
+      python backtesting/backtrader/run_bt_v2.py --all-symbols --no-plot --checkpoint-dir ckpt --shard 1/2
+      
+      # Each day, the 20 stocks under $500 with the highest dollar volume (at least $100M traded)
+      python backtesting/backtrader/run_bt_v2.py --all-symbols --no-plot --top-n 20 --min-dollar-volume 1e8
+      
+      # Reuse results of unchanged (symbol, day) units after a strategy tweak
+      python backtesting/backtrader/run_bt_v2.py --symbols32 --no-plot --cache-dir backtesting/outputs/cache
     '''
     
     parser = argparse.ArgumentParser(
@@ -107,11 +141,23 @@ def parse_args():
     date_group.add_argument('--end-date', type=str, metavar='YYYY-MM-DD',
                         help='End date in YYYY-MM-DD format')
     
+    # Data source
+    data_group = parser.add_argument_group('Data')
+    data_group.add_argument('--store', type=str, metavar='DIR',
+                       help='Read bars from a memory-mapped store (python -m backtesting.market_data.mmap_store build DIR) instead of the month files')
+    data_group.add_argument('--daily-session', type=str, metavar='SESSION',
+                       help='Attach daily bars resampled from the 5m bars as a second feed (data_1d): rth, eth, lr or HH:MM-HH:MM (utc)')
+    data_group.add_argument('--compact', action='store_true',
+                       help='Keep the loaded bars in compact dtypes (category symbol, float32 prices, int volume); results are unchanged')
+    data_group.add_argument('--repair-bars', action='store_true',
+                       help='Check and repair the 5m bars (drop nan/duplicate bars, fix ohlc and negative volume, fill missing slots inside a session) before backtesting')
+    
     # Strategy selection
     strategy_group = parser.add_argument_group('Strategy')
-    strategy_group.add_argument('--strategy', choices=['linear_regression', 'time_based'], 
+    strategy_group.add_argument('--strategy', choices=get_strategy_registry().ids(aliases=True), metavar='STRATEGY',
                        default='linear_regression', 
-                       help='Strategy to use for backtesting (default: linear_regression)')
+                       help='Strategy to use for backtesting: the id of any strategies/st_<id>.py (e.g. each_bar_long_lr, time, smas_cross), '
+                            'or linear_regression (each_bar_long_lr) / time_based (time) (default: linear_regression)')
     
     # Visualization options
     visual_group = parser.add_argument_group('Visualization')
@@ -122,6 +168,10 @@ def parse_args():
     filter_group = parser.add_argument_group('Filtering')
     filter_group.add_argument('--price-threshold', type=float, default=500.0, metavar='PRICE',
                        help='Skip stocks with price above this threshold (default: 500.0)')
+    filter_group.add_argument('--min-dollar-volume', type=float, metavar='USD',
+                       help='Skip stocks that traded less than this dollar volume on the day')
+    filter_group.add_argument('--top-n', type=int, metavar='N',
+                       help='Only the N stocks with the highest dollar volume on each day (after the other filters)')
     
     # Output options
     output_group = parser.add_argument_group('Output Options')
@@ -130,166 +180,347 @@ def parse_args():
     output_group.add_argument('--verbose', action='store_true',
                        help='Enable detailed output during backtesting')
     
-    return parser.parse_args()
+    # Checkpoints
+    checkpoint_group = parser.add_argument_group('Checkpoints')
+    checkpoint_group.add_argument('--checkpoint-dir', type=str, metavar='DIR',
+                       help='Write a result checkpoint per (date, symbol) to this directory')
+    checkpoint_group.add_argument('--resume', action='store_true',
+                       help=f'Skip (date, symbol) units that already have a checkpoint (default dir: {DEFAULT_CHECKPOINT_DIR})')
+    checkpoint_group.add_argument('--shard', type=str, metavar='K/N',
+                       help='Run only shard K of N (0-based) of the (date, symbol) units, e.g. 0/4')
+    
+    # Result cache
+    cache_group = parser.add_argument_group('Result Cache')
+    cache_group.add_argument('--cache-dir', type=str, metavar='DIR',
+                       help='Reuse cached (date, symbol) results keyed by strategy code, params and data slice')
+    
+    args = parser.parse_args(argv)
+    if args.resume and not args.checkpoint_dir:
+        args.checkpoint_dir = DEFAULT_CHECKPOINT_DIR
+    if args.shard and not args.checkpoint_dir:
+        parser.error('--shard requires --checkpoint-dir (shards are merged from checkpoints)')
+    
+    return args
 
 
 # =================================================================================================
-# INITIALIZATION
+# RUN
 # =================================================================================================
 
-# Parse command line arguments
-args = parse_args()
+# Run a backtest with parsed arguments (command line, or parse_args(argv) from a worker process),
+# returns the trades and metrics of the run (None: no data for the symbols/dates).
+# on_progress(event) is called with {"event": "start" | "date" | "unit", ...} dicts as the run advances
+def run(args: argparse.Namespace, on_progress: Callable[[dict], None] = None) -> BacktestRunResult:
 
-# Dictionary to store trade information by date
-trades_info_per_date: dict[pd.Timestamp, list[tuple]] = {}
+    # =================================================================================================
+    # INITIALIZATION
+    # =================================================================================================
 
-# Start timing the script execution
-start_time = tm.time()
+    # Dictionary to store trade information by date
+    trades_info_per_date: dict[pd.Timestamp, list[tuple]] = {}
+    # Symbols run per date (all shards), the units of this run
+    run_units: dict[pd.Timestamp, list[str]] = {}
+
+    # Shard of (date, symbol) units to run (None: all)
+    shard = parse_shard(args.shard) if args.shard else None
+
+    # Result cache (None: disabled)
+    result_cache = ResultCache(args.cache_dir) if args.cache_dir else None
+    cash = 100000.0
+
+    # Strategy class (imported now, or reloaded if its file changed since the last run)
+    strategy = get_strategy_registry().load_class(args.strategy)
+
+    # Checkpoints of this strategy (code and params), run params and data source only (None: disabled)
+    checkpoint_dir = None
+    if args.checkpoint_dir:
+        run_config = {
+            "code": get_source_hashes(inspect.getsourcefile(strategy)),
+            "store": os.path.abspath(args.store) if args.store else None,
+            "compact": args.compact,
+            "cash": cash,
+            "price_threshold": args.price_threshold,
+            "min_dollar_volume": args.min_dollar_volume,
+            "top_n": args.top_n,
+            "daily_session": args.daily_session,
+            "repair_bars": args.repair_bars,
+        }
+        checkpoint_dir = get_run_checkpoint_dir(args.checkpoint_dir, get_params_fingerprint(strategy, run_config))
+        print(f"checkpoints: {checkpoint_dir}")
+
+    # Start timing the script execution
+    start_time = tm.time()
 
 
-# =================================================================================================
-# EXTRACT UNIQUE TRADING DAYS
-# =================================================================================================
+    # =================================================================================================
+    # LOAD MARKET DATA
+    # =================================================================================================
 
-# Get a list of unique trading days in the data
-dates: list[pd.Timestamp] = df_5m.index.normalize().unique()
+    # Symbols to load (None: all symbols in the data)
+    if args.symbols:
+        load_symbols = args.symbols
+    elif args.symbols5:
+        load_symbols = symbols5
+    elif args.symbols32:
+        load_symbols = symbols32
+    else:
+        load_symbols = None
 
-# Filter by date range if specified
-if args.start_date:
-    start_date = pd.Timestamp(args.start_date)
-    dates = [d for d in dates if d >= start_date]
-    
-if args.end_date:
-    end_date = pd.Timestamp(args.end_date)
-    dates = [d for d in dates if d <= end_date]
+    if args.store:
+        # Map the store, bars are read per date below (nothing is loaded up front).
+        # Opened once per process: warm workers reuse the mapped arrays across runs
+        store = open_store(args.store)
+    else:
+        # Month files are streamed below (only the requested symbols/dates, one month in memory)
+        store = None
 
-print(dates)
-print(f"count unique trading dates: {len(dates)}")
 
-# =================================================================================================
-# PROCESS EACH TRADING DAY
-# =================================================================================================
+    # =================================================================================================
+    # EXTRACT UNIQUE TRADING DAYS
+    # =================================================================================================
+
+    # Get a list of unique trading days in the data (limited to --start-date/--end-date)
+    if store:
+        dates: list[pd.Timestamp] = sorted({d for s in (load_symbols or store.symbols) if s in store for d in store.get_dates(s)})
+        if args.start_date:
+            dates = [d for d in dates if d >= pd.Timestamp(args.start_date)]
+        if args.end_date:
+            dates = [d for d in dates if d <= pd.Timestamp(args.end_date)]
+    else:
+        # Reads only the symbol column
+        dates: list[pd.Timestamp] = get_dates(symbols=load_symbols, start=args.start_date, end=args.end_date)
+
+    print(dates)
+    print(f"count unique trading dates: {len(dates)}")
+    if not dates:
+        print(f"no data for symbols={load_symbols}, dates=[{args.start_date}] to [{args.end_date}]")
+        return None
+
+    # Symbols to run per date, from the daily universe table of the data source (no bar data is touched)
+    if store:
+        universe = load_store_universe(store, symbols=load_symbols, start=dates[0], end=dates[-1])
+    else:
+        universe = load_universe(symbols=load_symbols, start=dates[0], end=dates[-1])
+    if not len(universe):
+        raise RuntimeError(f"no universe rows for the {len(dates)} trading dates [{dates[0].date()}] to [{dates[-1].date()}] (universe out of sync with the data)")
+    selected = query_universe(
+        universe, max_price=args.price_threshold, min_dollar_volume=args.min_dollar_volume, top_n=args.top_n,
+    )
+    symbols_per_date = {date: set(symbols) for date, symbols in get_symbols_per_date(selected).items()}
+    print(f"universe: {len(selected)} of {len(universe)} (date, symbol) units selected")
+    if not len(selected):
+        print("no (date, symbol) units pass the universe filters")
+        return None
+    if on_progress:
+        on_progress({"event": "start", "dates": len(dates), "units": len(selected)})
+
+    # Load only the selected symbols
+    load_symbols = sorted(selected.index.get_level_values("symbol").unique())
+
+    # Daily bars (second feed), with a lookback before the first date for daily indicators
+    if args.daily_session:
+        daily_start = dates[0] - pd.Timedelta(days=DAILY_LOOKBACK_DAYS)
+        if store:
+            # resampled from the store's 5m bars (the same bars as the 5m feed)
+            df_1d_all = load_store_daily_bars(store, symbols=load_symbols, start=daily_start, end=dates[-1], session=args.daily_session)
+        else:
+            df_1d_all = load_daily_bars(symbols=load_symbols, start=daily_start, end=dates[-1], session=args.daily_session)
+        print(f"daily bars ({args.daily_session}): {len(df_1d_all)} rows")
+    else:
+        df_1d_all = None
+
+    # Data quality stage: repaired bars instead of the raw ones (report printed with --verbose)
+    def repair(df: pd.DataFrame) -> pd.DataFrame:
+        df, report = repair_bars(df)
+        if args.verbose and len(report):
+            print_quality_report(report)
+        return df
+
+    # Bars per trading day, partitioned by symbol: (date, {symbol: that day's 5m bars})
+    if store:
+        days = (
+            (date, {s: repair(df) if args.repair_bars else df for s in (load_symbols or store.symbols) if s in store for df in [store.get_df(s, date, date)]})
+            for date in dates
+        )
+    else:
+        # The next month is prefetched in a background thread while this one runs
+        days = iter_days(
+            symbols=load_symbols, start=args.start_date, end=args.end_date, compact=args.compact,
+            on_month=(lambda month, df: print_memory_report(df)) if args.compact and args.verbose else None,
+            transform=repair if args.repair_bars else None,
+        )
+
+    # =================================================================================================
+    # PROCESS EACH TRADING DAY
+    # =================================================================================================
 
-# Iterate through each trading day
-for i, date in enumerate(dates):
+    # Iterate through each trading day
+    for i, (date, symbol_frames) in enumerate(days):
+
+        print("="*100)  # Print a separator line for readability
+        title_date = f"date: {date.date()} ({i+1}/{len(dates)})"  # Format current date info with progress
+        print(title_date)
+        if on_progress:
+            on_progress({"event": "date", "date": f"{date.date()}", "index": i+1, "total": len(dates)})
+
+        # Day range (from beginning of day to 23:55)
+        time_begin = date
+        time_end = date.replace(hour=23, minute=55)
+        symbol_frames = {s: df for s, df in symbol_frames.items() if len(df)}
+
+        # Skip if no data is available for this date
+        if symbol_frames:
+            print(f"{len(symbol_frames)} symbols, {sum(len(df) for df in symbol_frames.values())} bars")
+        else:
+            print(f"{date}: Empty DataFrame, skip")
+            continue
 
-    print("="*100)  # Print a separator line for readability
-    title_date = f"date: {date.date()} ({i+1}/{len(dates)})"  # Format current date info with progress
-    print(title_date)
 
-    # Select data for the current day (from beginning of day to 23:55)
-    time_begin = date
-    time_end = date.replace(hour=23, minute=55)
-    df_date = df_5m.loc[time_begin:time_end]
-    print(get_df_title(df_date))  # Print summary of the day's dataframe
+        # Reset the list to store this date's trades
+        trades_info: list[tuple] = [] 
 
-    # Skip if no data is available for this date
-    if not len(df_date):
-        print(f"{date}: Empty DataFrame, skip")
-        continue
+        # Get symbols based on command line arguments
+        if args.symbols:
+            # Use user-specified symbols
+            symbols_to_use = args.symbols
+            # Filter to only include symbols that exist in the data
+            symbols_to_use = [s for s in symbols_to_use if s in symbol_frames]
+        elif args.symbols5:
+            symbols_to_use = symbols5
+        elif args.symbols32:
+            symbols_to_use = symbols32
+        else:  # Default or --all-symbols
+            # Get the list of unique symbols available for this date
+            symbols_to_use = list(symbol_frames)
 
+        # Symbols that pass the universe filters on this date (price, liquidity, top n)
+        symbols_to_use = [s for s in symbols_to_use if s in symbols_per_date.get(date, ())]
+        run_units[date] = symbols_to_use
 
-    # Reset the list to store this date's trades
-    trades_info: list[tuple] = [] 
-    
-    # Get symbols based on command line arguments
-    if args.symbols:
-        # Use user-specified symbols
-        symbols_to_use = args.symbols
-        # Filter to only include symbols that exist in the data
-        symbols_to_use = [s for s in symbols_to_use if s in df_date["symbol"].unique()]
-    elif args.symbols5:
-        symbols_to_use = symbols5
-    elif args.symbols32:
-        symbols_to_use = symbols32
-    else:  # Default or --all-symbols
-        # Get the list of unique symbols available for this date
-        symbols_to_use = df_date["symbol"].unique()
-    
-    # =================================================================================================
-    # PROCESS EACH SYMBOL FOR THE CURRENT DAY
-    # =================================================================================================
-    
-    # Iterate through each symbol in the current day
-    for i, s in enumerate(symbols_to_use):
-
-        # Display progress for current symbol
-        title_symbol = f"[{i+1}/{len(symbols_to_use)}] {s}"
-        print(f"{title_date}, {title_symbol}")
-
-        # Filter data by the current symbol
-        filtered_df: pd.DataFrame = df_date[df_date['symbol']==s]
-        
-        # Skip if no data available for this symbol
-        if not len(filtered_df):
-            print(f"{s}: Empty DataFrame, skip")
-            continue
-            
-        filtered_df = filtered_df.copy()  # Create a copy to avoid pandas SettingWithCopyWarning
+        # =================================================================================================
+        # PROCESS EACH SYMBOL FOR THE CURRENT DAY
+        # =================================================================================================
+
+        # Iterate through each symbol in the current day
+        for i, s in enumerate(symbols_to_use):
+
+            # Display progress for current symbol
+            title_symbol = f"[{i+1}/{len(symbols_to_use)}] {s}"
+            print(f"{title_date}, {title_symbol}")
+
+            # Skip units of other shards, and units completed by a previous run
+            if not in_shard(date, s, shard):
+                continue
+            if args.resume and has_checkpoint(checkpoint_dir, date, s):
+                print(f"{s}: checkpoint exists, skip")
+                continue
+
+            # Data of the current symbol
+            filtered_df: pd.DataFrame = symbol_frames.get(s, pd.DataFrame())
+
+            # Skip if no data available for this symbol
+            if not len(filtered_df):
+                print(f"{s}: Empty DataFrame, skip")
+                continue
+
+            # Create a copy to avoid pandas SettingWithCopyWarning (compact load: back to exact float64 values)
+            filtered_df = restore_bars(filtered_df)
+
+            # =================================================================================================
+            # RUN BACKTEST FOR CURRENT SYMBOL
+            # =================================================================================================
+
+            # Data is in UTC time
+            # 08:00----------------13:30------------------------20:00-------------00:00
+            # pre-market           market(RTH)                  after-hours       close
+
+            # Daily bars of this symbol up to this date (stamped at session end, delivered after the session)
+            df_1d = None
+            run_params = {"cash": cash}
+            if df_1d_all is not None:
+                df_1d = df_1d_all[(df_1d_all["symbol"] == s) & (df_1d_all.index < date + pd.Timedelta(days=1))]
+                run_params["daily"] = get_data_fingerprint(df_1d)
+
+            # Reuse the cached result if strategy code, params and data slice are unchanged
+            symbol_trades_info = None
+            if result_cache:
+                symbol_trades_info, cache_components = result_cache.get(strategy, run_params, filtered_df, date, s)
+                if symbol_trades_info is not None:
+                    print(f"{s}: cached result, skip cerebro")
+
+            # Run backtest with selected strategy and collect trade results
+            if symbol_trades_info is None:
+                # With a store, cerebro reads the bars straight from the memmap arrays
+                # (repaired bars exist only as filtered_df: cerebro is fed that frame)
+                data = MmapData(
+                    store=store, symbol=s, start_date=time_begin, end_date=time_end,
+                    timeframe=bt.TimeFrame.Minutes, compression=5,
+                ) if store and not args.repair_bars else None
+                symbol_trades_info = cerebro_run(
+                    df=filtered_df,
+                    strategy=strategy,
+                    cash=cash,
+                    plot=not args.no_plot,  # Plot unless --no-plot is specified
+                    data=data,
+                    df_1d=df_1d,
+                )
+                if result_cache:
+                    result_cache.put(strategy, cache_components, date, s, symbol_trades_info)
+            trades_info.extend(symbol_trades_info)
+
+            # Persist this unit's result (atomic), so it survives a crash of the run
+            if checkpoint_dir:
+                write_checkpoint(checkpoint_dir, date, s, symbol_trades_info)
+
+            # Report the unit and its trades (partial results)
+            if on_progress:
+                on_progress({"event": "unit", "date": f"{date.date()}", "symbol": s, "index": i+1, "total": len(symbols_to_use), "trades": symbol_trades_info})
+
+            # Print the elapsed running time
+            print_current_runtime(start_time)
 
-        # Skip high-priced stocks based on threshold from command line
-        if filtered_df.iloc[0]["close"] >= args.price_threshold:
-            print(f"{s}: price >= {args.price_threshold}, skip plot")
-            continue
 
         # =================================================================================================
-        # RUN BACKTEST FOR CURRENT SYMBOL
+        # SAVE RESULTS FOR CURRENT DATE
         # =================================================================================================
-        
-        # Data is in UTC time
-        # 08:00----------------13:30------------------------20:00-------------00:00
-        # pre-market           market(RTH)                  after-hours       close
-        
-        # Choose strategy based on command line argument
-        if args.strategy == 'time_based':
-            strategy = Strategy18to19
-        else:  # default to linear_regression
-            strategy = StrategyEachBar_Long_LR
-        
-        # Run backtest with selected strategy and collect trade results
-        trades_info.extend(
-            cerebro_run(
-                df=filtered_df,
-                strategy=strategy,
-                plot=not args.no_plot,  # Plot unless --no-plot is specified
-            )
-        )
 
-        # Print the elapsed running time
-        print_current_runtime(start_time)
+        # Option to print summary for just this date (commented out)
+        # print_summary(trades_info) # print this date summary
 
+        # Save this date's trades to the dictionary
+        trades_info_per_date[date] = trades_info
 
-    # =================================================================================================
-    # SAVE RESULTS FOR CURRENT DATE
-    # =================================================================================================
-    
-    # Option to print summary for just this date (commented out)
-    # print_summary(trades_info) # print this date summary
-    
-    # Save this date's trades to the dictionary
-    trades_info_per_date[date] = trades_info
 
-        
-    
-# =================================================================================================
-# FINAL SUMMARY AND EXPORT
-# =================================================================================================
 
-# Aggregate all trades from all dates
-trades_info_global: list[tuple] = [] 
-for date, trades_info in trades_info_per_date.items():
-    # Print summary for each individual date
-    print_summary(trades_info, date)
-    # Add this date's trades to the global list
-    trades_info_global.extend(trades_info)
+    # =================================================================================================
+    # FINAL SUMMARY AND EXPORT
+    # =================================================================================================
 
-# Print the overall summary across all dates
-print("="*50)
-# Generate comprehensive summary from first to last date, with full dataframe output
-print_summary(trades_info_global, dates[0], dates[-1], print_df=True, output_file=args.output_file)
-print(f"count unique trading dates: {len(dates)}")
-# Print total script execution time
-print_current_runtime(start_time)
+    # With checkpoints, rebuild the results from them (includes units completed by
+    # previous runs and by other shards), only the units this run selected
+    if checkpoint_dir:
+        trades_info_per_date = read_checkpoints(checkpoint_dir, run_units)
+
+    # Aggregate all trades from all dates
+    trades_info_global: list[tuple] = [] 
+    for date, trades_info in trades_info_per_date.items():
+        # Print summary for each individual date
+        print_summary(trades_info, date)
+        # Add this date's trades to the global list
+        trades_info_global.extend(trades_info)
+
+    # Print the overall summary across all dates
+    print("="*50)
+    # Generate comprehensive summary from first to last date, with full dataframe output
+    output_file = print_summary(trades_info_global, dates[0], dates[-1], print_df=True, output_file=args.output_file)
+    print(f"count unique trading dates: {len(dates)}")
+    # Explain which units were recomputed and why
+    if result_cache:
+        result_cache.print_report(verbose=args.verbose)
+    # Print total script execution time
+    print_current_runtime(start_time)
+
+    return BacktestRunResult.from_trades_info(trades_info_per_date, dates, strategy=args.strategy, output_file=output_file)
 
 
 # =================================================================================================
@@ -320,5 +551,13 @@ print_current_runtime(start_time)
 #
 # To specify a custom output file:
 # python backtesting/backtrader/run_bt_v2.py --output-file backtest_results.csv
+#
+# To resume an interrupted run (checkpoints in backtesting/outputs/checkpoints):
+# python backtesting/backtrader/run_bt_v2.py --all-symbols --no-plot --resume
 
     
+
+
+if __name__ == "__main__":
+    if run(parse_args()) is None:
+        sys.exit(1)
@@ -104,7 +104,7 @@ class Strategy1_1_base(bt.Strategy):
         # prefix=f"[1D]: {self.data_1d.datetime.datetime(0)}, close: {self.data_1d.close[0]}, "
         # prefix+=f"[5m]: {self.data_5m.datetime.datetime(0)}, close: {self.data_5m.close[0]}"
         # prefix+=f"[5m]: {self.data_5m.datetime.datetime(0)}, (open: {self.data_5m.open[0]}, high: {self.data_5m.high[0]}, low: {self.data_5m.low[0]}, close: {self.data_5m.close[0]})"
-        if self.data_1d:
+        if self.data_1d is not None:
             prefix+=f"[1D]: {self.data_1d.datetime.datetime(0)}, (o={self.data_1d.open[0]}, h={self.data_1d.high[0]}, l={self.data_1d.low[0]}, c={self.data_1d.close[0]}), "
         prefix+=f"[5m]: {self.data_5m.datetime.datetime(0)}, (o={self.data_5m.open[0]}, h={self.data_5m.high[0]}, l={self.data_5m.low[0]}, c={self.data_5m.close[0]})"
         print(f"{prefix}: {txt}")
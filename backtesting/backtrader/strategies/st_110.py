@@ -75,8 +75,7 @@ class Strategy110(StrategyBase):
 
         # trades by date
         current_time: time=self.data_5m.datetime.datetime()
-        trades=self.get_trades_by_close_date(current_time)
-        if len(trades)>1:
+        if self.get_session_trades_count()>1:
             return
 
         # enter position
@@ -1,6 +1,15 @@
 import inspect
+import os
+import sys
 import backtrader as bt
-from datetime import datetime, time
+from datetime import date, datetime, time
+
+# project root (three levels up), for backtesting.functional
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from backtesting.functional.recorder import ColumnarRecorder, TRADES_INFO_FIELDS, POSITIONS_INFO_FIELDS, ORDERS_INFO_FIELDS
 
 
 class StrategyBase(bt.Strategy):
@@ -9,13 +18,26 @@ class StrategyBase(bt.Strategy):
     params = dict(
         take_profit_usd=None,
         stop_loss_usd=None,
+        positions_sample_every=1, # record position's info every n bars (0: don't record)
     )
 
     def __init__(self):
         self.trades: list[bt.trade.Trade] = []
-        self.trades_info: list[tuple] = [] # trade's info only, more readable
-        self.positions_info: list[tuple] = [] # position's info, view potential pnl
-        self.orders: list[bt.Order] = []   # list to track executed buy orders and their sell limits
+        self.trades_by_close_date: dict[date, list[bt.trade.Trade]] = {} # closed trades per session (date part only)
+
+        # columnar buffers, rows are read back as tuples
+        # trade's info only, more readable
+        self.trades_info = ColumnarRecorder(TRADES_INFO_FIELDS, constants={"method": "notify_trade"})
+        # position's info, view potential pnl
+        self.positions_info = ColumnarRecorder(
+            POSITIONS_INFO_FIELDS, 
+            constants={"method": "get_position_info"}, 
+            sample_every=self.p.positions_sample_every,
+        )
+        # plain order records (one row per order ref, latest status), not live bt.Order references
+        self.orders = ColumnarRecorder(ORDERS_INFO_FIELDS, constants={"method": "notify_order"})
+        self._orders_pending: dict[int, bt.Order] = {} # notified since last flush
+        self._orders_rows: dict[int, int] = {} # order.ref -> row in self.orders
 
         self.data_5m: bt.feeds.pandafeed.PandasData = self.datas[0]
         self.data_1d: bt.feeds.pandafeed.PandasData = None
@@ -37,7 +59,7 @@ class StrategyBase(bt.Strategy):
     def log(self, txt=""):
         prefix=""
         
-        if self.data_1d:
+        if self.data_1d is not None:
             prefix+=f"[1D]: {self.data_1d.datetime.datetime(0)}, {self.data_1d._name}, (o={self.data_1d.open[0]}, h={self.data_1d.high[0]}, l={self.data_1d.low[0]}, c={self.data_1d.close[0]}), "
         
         prefix+=f"[5m]: {self.data_5m.datetime.datetime(0)}, {self.data_5m._name}, (o={self.data_5m.open[0]}, h={self.data_5m.high[0]}, l={self.data_5m.low[0]}, c={self.data_5m.close[0]})"
@@ -53,7 +75,7 @@ class StrategyBase(bt.Strategy):
         order.notify_dt = notify_dt
         # order.pair_type = None # ['enter', 'exit']
         # order.pair_order_ref = 0 # partner's ref (id)
-        self.orders.append(order)
+        self.record_order(order)
 
         # close pending orders
         if 0:
@@ -104,16 +126,60 @@ class StrategyBase(bt.Strategy):
         if trade.isclosed:
             self.trades.append(trade)
             self.trades_info.append(trade_info)
+            self.trades_by_close_date.setdefault(trade.close_datetime().date(), []).append(trade)
 
         
-    # filter trades by date part only
-    def get_trades_by_close_date(self, close_date: datetime):
-        filtered_trades: list[bt.trade.Trade] = []
-        for t in self.trades:
-            if t.isclosed and t.close_datetime().date() == close_date.date():
-                filtered_trades.append(t)
-
-        return filtered_trades
+    # queue an order to be recorded.
+    # recording is deferred to the next flush, so attributes set by subclasses after
+    # super().notify_order() (pair_type, pair_order_ref) are captured too
+    def record_order(self, order: bt.Order):
+        self._orders_pending[order.ref] = order
+
+
+    def flush_orders(self):
+        for ref, o in self._orders_pending.items():
+            o_info=(
+                "notify_order",
+                o.ref,
+                getattr(o, "notify_dt", None),
+                getattr(o, "pair_type", None), # ['enter', 'exit']
+                getattr(o, "pair_order_ref", None), # order's pair ref (id)
+                bt.num2date(o.executed.dt) if o.executed.dt else None,
+                o.ordtypename(),   # ['Buy', 'Sell']
+                o.getstatusname(), # ['Created', 'Submitted', 'Accepted', 'Partial', 'Completed', 'Canceled', 'Expired', 'Margin', 'Rejected']
+                o.size,
+                o.executed.size, # executed.size related to o.size
+                o.price, # the take profit price (limit price)
+                o.executed.price,
+                round(o.executed.value, 2),
+                o.getordername(),  # ['Market', 'Close', 'Limit', 'Stop', 'StopLimit', 'StopTrail', 'StopTrailLimit', 'Historical']
+            )
+
+            if ref in self._orders_rows:
+                self.orders.set(self._orders_rows[ref], o_info)
+            else:
+                self._orders_rows[ref] = self.orders.append(o_info)
+
+        self._orders_pending.clear()
+
+
+    def stop(self):
+        self.flush_orders()
+
+
+    # filter trades by date part only (O(1), indexed by notify_trade)
+    # the returned list is shared, don't modify it
+    def get_trades_by_close_date(self, close_date: datetime) -> list[bt.trade.Trade]:
+        return self.trades_by_close_date.get(close_date.date(), [])
+    
+
+    def count_trades_by_close_date(self, close_date: datetime) -> int:
+        return len(self.trades_by_close_date.get(close_date.date(), ()))
+
+
+    # closed trades in current bar's session
+    def get_session_trades_count(self) -> int:
+        return self.count_trades_by_close_date(self.data_5m.datetime.datetime())
     
 
 
@@ -196,6 +262,8 @@ class StrategyBase(bt.Strategy):
         return canceled_orders
 
     def next(self):
+        self.flush_orders()
+
         txt=self.get_position_info() # append to self.positions_info
         self.log(txt)
 
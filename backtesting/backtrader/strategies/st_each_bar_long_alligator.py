@@ -158,7 +158,7 @@ class StrategyEachBar_Long_Alligator(StrategyBase):
 
         # trades by date
         now: datetime=self.data_5m.datetime.datetime()
-        trades=self.get_trades_by_close_date(now)
+        session_trades=self.get_session_trades_count()
         
         
 
@@ -181,7 +181,7 @@ class StrategyEachBar_Long_Alligator(StrategyBase):
 
         # long: enter
         if not self.position.size and\
-            len(trades)<1 and\
+            session_trades<1 and\
             time(hour=14, minute=15) <= now.time() <= time(hour=19, minute=45) and\
             self.alligator.jaw[0] < self.alligator.teeth[0] < self.alligator.lips[0] and \
             self.alligator.jaw[0] < self.data_5m.close[0]: # Alligator mouth is open and price is above lips
@@ -150,7 +150,7 @@ class StrategyEachBar_Long_LR(StrategyBase):
 
         # trades by date
         now: datetime=self.data_5m.datetime.datetime()
-        trades=self.get_trades_by_close_date(now)
+        session_trades=self.get_session_trades_count()
         
         
 
@@ -173,7 +173,7 @@ class StrategyEachBar_Long_LR(StrategyBase):
 
         # long: enter
         if not self.position.size and\
-            len(trades)<1 and\
+            session_trades<1 and\
             time(hour=14, minute=15) <= now.time() <= time(hour=19, minute=45) and\
             self.lr.slope[0] > 0 and\
             self.lr_slope_percentage_positive.result[0] >= percentage_upper_threshold and\
@@ -78,7 +78,7 @@ class StrategyEachBar_Long_LR1(StrategyBase):
 
         # trades by date
         current_time: datetime=self.data_5m.datetime.datetime()
-        trades=self.get_trades_by_close_date(current_time)
+        session_trades=self.get_session_trades_count()
         
         
 
@@ -101,7 +101,7 @@ class StrategyEachBar_Long_LR1(StrategyBase):
 
         # long: enter
         if not self.position and\
-            len(trades)<1 and\
+            session_trades<1 and\
             time(hour=17, minute=0) <= current_time.time() <= time(hour=22, minute=45) and\
             (self.lr.slope[0] > 0) and\
             (self.close_diff_sma200_percentage_positive.result[0] >= percentage_upper_threshold and\
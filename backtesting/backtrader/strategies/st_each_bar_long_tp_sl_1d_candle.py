@@ -46,7 +46,7 @@ class StrategyEachBar_Long_tp_sl_1d_candle(StrategyBase):
 
         # 1D
         if 0:
-            if self.data_1d:
+            if self.data_1d is not None:
                 self.pivot = PivotPoint(self.data_1d)
             else:
                 raise ValueError("data_1d is required for PivotPoint indicator")
@@ -45,7 +45,7 @@ class StrategyEachBar_Long_tp_sl_pivot_sma(StrategyBase):
 
 
         # 1D
-        if self.data_1d:
+        if self.data_1d is not None:
             self.pivot = PivotPoint(self.data_1d)
         else:
             raise ValueError("data_1d is required for PivotPoint indicator")
@@ -165,7 +165,7 @@ class StrategyEachBar_Short_LR(StrategyBase):
 
         # trades by date
         now: datetime=self.data_5m.datetime.datetime()
-        trades=self.get_trades_by_close_date(now)
+        session_trades=self.get_session_trades_count()
         
         
 
@@ -188,7 +188,7 @@ class StrategyEachBar_Short_LR(StrategyBase):
 
         # short: enter
         if not self.position and\
-            len(trades)<1 and\
+            session_trades<1 and\
             time(hour=17, minute=15) <= now.time() <= time(hour=22, minute=45) and\
             self.lr.slope[0] < 0 and\
             self.lr_slope_percentage_positive.result[0] <= percentage_lower_threshold and\
@@ -162,12 +162,12 @@ class StrategyEachBar_SMA_Market_Open(StrategyBase):
                     # enter order
                     order.pair_order_ref=sell_order.ref
                     order.pair_type = "enter"
-                    self.orders.append(order)
+                    self.record_order(order)
                     
                     # exit order
                     sell_order.pair_order_ref=order.ref
                     sell_order.pair_type = "exit"
-                    self.orders.append(sell_order)
+                    self.record_order(sell_order)
 
                     # txt=f"[EXIT] [order.ref={self.order.ref} placed: SELL]"
                     # self.log(txt)
@@ -218,12 +218,12 @@ class StrategyEachBar_SMA_Market_Open(StrategyBase):
                     # enter order
                     order.pair_order_ref=buy_order.ref
                     order.pair_type = "enter"
-                    self.orders.append(order)
+                    self.record_order(order)
                     
                     # exit order
                     buy_order.pair_order_ref=order.ref
                     buy_order.pair_type = "exit"
-                    self.orders.append(buy_order)
+                    self.record_order(buy_order)
 
 
                     # txt=f"[EXIT] [order.ref={self.order.ref} placed: SELL]"
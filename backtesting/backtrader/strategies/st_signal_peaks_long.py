@@ -101,8 +101,7 @@ class Strategy_Signal_Peaks_Long(StrategyBase):
 
         # trades by date
         current_time: datetime=self.data_5m.datetime.datetime()
-        trades=self.get_trades_by_close_date(current_time)
-        if len(trades)>0:
+        if self.get_session_trades_count()>0:
             return
 
         # allow place first order at 16:25, and last at 22:45
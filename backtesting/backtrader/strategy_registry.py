@@ -0,0 +1,248 @@
+import ast
+import importlib
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass
+
+
+# ============================================================
+# strategy registry
+# ============================================================
+# the strategies are the strategies/st_<id>.py files. the registry indexes
+# them once (ast: class name and description, nothing is imported) and after
+# that only stats the files: a file is parsed again when its mtime/size
+# change, added and removed files are picked up the same way.
+#
+# only files whose first strategy class subclasses a strategy base
+# (STRATEGY_BASES) are strategies: st_base.py (the shared base class),
+# st_test.py and files without one are not listed. a listed strategy can
+# still fail to import (e.g. a missing indicator module): load_class raises
+# and records the error (StrategyInfo.import_error), list_strategies() imports
+# each file version once and leaves those out, and the api servers reject
+# them when validating a backtest.
+#
+# a strategy class is imported when it is first used (load_class), and
+# reloaded when its file changed since, so long-lived processes (api server,
+# backtest workers) always run the current code of any st_* strategy.
+#
+#   registry = get_strategy_registry()
+#   registry.ids()                        # ["110", "buy_sell_market", ...]
+#   registry.get("each_bar_long_lr").to_dict()
+#   strategy = registry.load_class("each_bar_long_lr")   # StrategyEachBar_Long_LR
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+STRATEGIES_DIR = os.path.join(current_dir, "strategies")
+STRATEGIES_PACKAGE = "strategies" # imported as strategies.st_<id> (backtesting/backtrader on sys.path)
+
+# the runner's former --strategy names
+STRATEGY_ALIASES = {
+    "linear_regression": "each_bar_long_lr",
+    "time_based": "time",
+}
+
+# st_<id>.py files that are not strategies to run: the shared base class, a scratch strategy
+EXCLUDED_IDS = {"base", "test"}
+
+# base class names a strategy class derives from (directly)
+STRATEGY_BASES = {"StrategyBase", "Strategy"} # st_base.StrategyBase, bt.Strategy
+
+
+@dataclass
+class StrategyInfo:
+    id: str
+    filename: str
+    mtime_ns: int
+    size: int
+    class_name: str = None # strategy class (None: file has no class)
+    description: str = ""
+    import_error: str = None # last load_class failure of this file version (None: imports, or not imported yet)
+
+
+    @property
+    def name(self) -> str:
+        return format_strategy_name(self.class_name) if self.class_name else self.id.replace("_", " ").title()
+
+
+    # api format (/api/strategies)
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "type": "custom",
+            "parameters": [],
+        }
+
+
+
+
+class StrategyRegistry:
+
+    def __init__(self, strategies_dir: str = STRATEGIES_DIR, package: str = STRATEGIES_PACKAGE):
+        self.strategies_dir = strategies_dir
+        self.package = package
+        self._lock = threading.Lock()
+        self._strategies: dict[str, StrategyInfo] = {} # id -> info of every st_*.py file (not reparsed), sorted by id
+        self._loaded: dict[str, tuple[int, type]] = {} # id -> (mtime_ns when imported, class)
+
+
+    # stat the st_*.py files, parse the new and changed ones, returns the strategies
+    def refresh(self) -> dict[str, StrategyInfo]:
+        with self._lock:
+            strategies = {}
+            for entry in os.scandir(self.strategies_dir):
+                if not (entry.name.startswith("st_") and entry.name.endswith(".py") and entry.is_file()):
+                    continue
+                strategy_id = entry.name[3:-3]
+                if strategy_id in EXCLUDED_IDS:
+                    continue
+                stat = entry.stat()
+                info = self._strategies.get(strategy_id)
+                if info is None or (info.mtime_ns, info.size) != (stat.st_mtime_ns, stat.st_size):
+                    info = parse_strategy_file(entry.path, strategy_id, stat.st_mtime_ns, stat.st_size)
+                strategies[strategy_id] = info
+            self._strategies = dict(sorted(strategies.items()))
+            return {strategy_id: info for strategy_id, info in self._strategies.items() if info.class_name is not None}
+
+
+    # importable: only the strategies whose file imports (each file version is imported once)
+    def list_strategies(self, importable: bool = True) -> list[StrategyInfo]:
+        strategies = list(self.refresh().values())
+        if importable:
+            strategies = [info for info in strategies if self.get_import_error(info.id) is None]
+        return strategies
+
+
+    # the error importing a strategy's class (None: it imports)
+    def get_import_error(self, strategy_id: str) -> str:
+        info = self.get(strategy_id)
+        if info.import_error is None:
+            try:
+                self.load_class(info.id)
+            except Exception:
+                pass # recorded in info.import_error
+        return info.import_error
+
+
+    def ids(self, aliases: bool = False) -> list[str]:
+        ids = list(self.refresh())
+        if aliases:
+            ids += [alias for alias, strategy_id in STRATEGY_ALIASES.items() if strategy_id in ids]
+        return ids
+
+
+    # info of a strategy id (or alias), KeyError: no such strategy
+    def get(self, strategy_id: str) -> StrategyInfo:
+        strategies = self.refresh()
+        strategy_id = STRATEGY_ALIASES.get(strategy_id, strategy_id)
+        if strategy_id not in strategies:
+            raise KeyError(f"unknown strategy '{strategy_id}', available: {', '.join(strategies)}")
+        return strategies[strategy_id]
+
+
+    # the strategy class, imported on first use and reloaded when its file changed
+    def load_class(self, strategy_id: str) -> type:
+        info = self.get(strategy_id)
+        loaded = self._loaded.get(info.id)
+        if loaded is not None and loaded[0] == info.mtime_ns:
+            return loaded[1]
+
+        # the package's parent (strategies.st_<id>, indicators.*), and the strategies dir:
+        # strategies import their siblings as top level modules ("from st_base import StrategyBase")
+        for path in (os.path.dirname(self.strategies_dir), self.strategies_dir):
+            if path not in sys.path:
+                sys.path.append(path)
+
+        module_name = f"{self.package}.st_{info.id}"
+        try:
+            module = sys.modules.get(module_name)
+            if module is None:
+                module = importlib.import_module(module_name)
+            elif loaded is not None:
+                module = importlib.reload(module) # edited since it was imported
+            strategy = getattr(module, info.class_name)
+        except Exception as e:
+            info.import_error = f"{e!r}"
+            raise
+        info.import_error = None
+        self._loaded[info.id] = (info.mtime_ns, strategy)
+        return strategy
+
+
+
+
+# class name and description of a strategy file (first class deriving from a STRATEGY_BASES
+# class: its docstring or DESCRIPTION attribute, else the module docstring). class_name None:
+# not a strategy file (or not parsable), not listed
+def parse_strategy_file(filename: str, strategy_id: str, mtime_ns: int, size: int) -> StrategyInfo:
+    info = StrategyInfo(id=strategy_id, filename=filename, mtime_ns=mtime_ns, size=size)
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            module = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return info # not listed until fixed
+
+    info.description = ast.get_docstring(module) or ""
+    for node in module.body:
+        if not isinstance(node, ast.ClassDef) or not any(_get_base_name(base) in STRATEGY_BASES for base in node.bases):
+            continue
+        info.class_name = node.name
+        info.description = ast.get_docstring(node) or info.description
+        for item in node.body:
+            if isinstance(item, ast.Assign) and isinstance(item.value, ast.Constant) \
+                    and any(isinstance(target, ast.Name) and target.id == "DESCRIPTION" for target in item.targets):
+                info.description = item.value.value
+                break
+        break
+    return info
+
+
+# StrategyBase -> "StrategyBase", bt.Strategy -> "Strategy"
+def _get_base_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+# StrategyEachBar_Long_LR -> "Each-Bar Long (LR)"
+def format_strategy_name(class_name: str) -> str:
+    # Remove 'Strategy' prefix
+    name = class_name[len("Strategy"):] if class_name.startswith("Strategy") else class_name
+    # If only digits, return as is
+    if name.isdigit():
+        return name
+
+    parts = name.split("_")
+    formatted_parts = []
+    for i, part in enumerate(parts):
+        # If last part and all uppercase or known suffix, wrap in parentheses
+        if i == len(parts) - 1 and (part.isupper() or part in {"LR", "Pivot", "Long", "Short"}):
+            if len(parts) > 1:
+                formatted_parts[-1] = formatted_parts[-1] + f" ({part})"
+            else:
+                formatted_parts.append(f"({part})")
+        else:
+            # Split CamelCase into words, a multi-word segment is joined with hyphens
+            words = re.findall(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+", part)
+            formatted = " ".join(words)
+            if len(words) > 1 and i != len(parts) - 1:
+                formatted = "-".join(words)
+            formatted_parts.append(formatted)
+    return " ".join([p for p in formatted_parts if p])
+
+
+
+
+_registry: StrategyRegistry = None
+
+# the registry of this process
+def get_strategy_registry() -> StrategyRegistry:
+    global _registry
+    if _registry is None:
+        _registry = StrategyRegistry()
+    return _registry
@@ -0,0 +1,252 @@
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time as tm
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Callable
+
+
+# ============================================================
+# warm backtest worker pool
+# ============================================================
+# long-lived worker processes that run run_bt_v2 in-process, instead of
+# spawning `python run_bt_v2.py` per request. each worker pays once for:
+#   - interpreter startup and the imports (pandas, backtrader, matplotlib, the default strategy)
+#   - converting the month csv files to the columnar cache (see columnar_cache.py)
+#   - the market data of the jobs, one of:
+#     store_dir (BACKTEST_STORE): the mmap store (mmap_store.open_store), every
+#       job runs with --store. the arrays are mapped read-only: all workers
+#       share their pages through the os page cache, nothing is copied per worker
+#     else: the last preload_months (BACKTEST_PRELOAD_MONTHS) month frames and
+#       their daily universe tables (see universe.py), kept in memory
+#       (loader.enable_memory_cache, lru of preload_months months, at most
+#       MAX_PRELOAD_MONTHS). these are private copies: resident memory is about
+#       workers x months x the size of a month frame (~150-250 MB for 503
+#       symbols), keep it small with several workers. older months are read
+#       on demand.
+# so a job only costs the simulation itself. workers are started with
+# "spawn" (not fork): the api server process has threads and an event loop.
+#
+# a job is the run_bt_v2 command line arguments (without "python run_bt_v2.py"),
+# its result is the typed run result (see functional/results.py), returned
+# through the pool (pickled), not read back from output files:
+#   pool = BacktestPool(workers=2)
+#   pool.start()
+#   result = await pool.run(["--symbols", "AAPL", "--no-plot", "--start-date", "2022-05-02"])
+#   result["result"].metrics, result["result"].trades, result["stdout"]
+#   pool.close()
+#
+# progress: with on_progress, the run_bt_v2 progress events ("start", "date",
+# "unit" with the unit's trades) are sent back through a manager queue while
+# the job runs, and on_progress(event) is called on the caller's event loop.
+#
+# a job that times out keeps its worker busy until it finishes (processes
+# of a ProcessPoolExecutor can't be interrupted); other jobs use the other workers.
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+MAX_PRELOAD_MONTHS = 12
+DEFAULT_PRELOAD_MONTHS = int(os.getenv("BACKTEST_PRELOAD_MONTHS", 3)) # month frames kept in each worker's memory, 0: none
+DEFAULT_STORE_DIR = os.getenv("BACKTEST_STORE") or None # mmap store of the jobs (None: the month files)
+
+_store_dir: str = None # of this worker process
+
+
+def _init_worker(preload: bool, preload_months: int, store_dir: str):
+    global _store_dir
+    # same import paths as `python backtesting/backtrader/run_bt_v2.py` from the project root
+    os.chdir(project_root)
+    for path in (current_dir, project_root):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    import matplotlib
+    matplotlib.use("Agg") # no windows from worker processes
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import run_bt_v2 # noqa: F401 (imports pandas, backtrader and the market data modules)
+
+        if preload:
+            # the default strategy (others are imported by their first job, see strategy_registry.py)
+            from backtesting.backtrader.strategy_registry import get_strategy_registry
+            get_strategy_registry().load_class("linear_regression")
+
+            from backtesting.market_data.columnar_cache import ensure_cached
+            from backtesting.market_data.loader import enable_memory_cache, get_month_files, preload_months as preload_month_frames
+            from backtesting.market_data.mmap_store import open_store
+            from backtesting.market_data.universe import load_universe
+
+            for filename in get_month_files().values():
+                ensure_cached(filename)
+
+            if store_dir:
+                # map the store once (shared pages, no copies), run() reuses the open store
+                store = open_store(store_dir)
+                for symbol in store.symbols:
+                    store.get_day_index(symbol)
+                    store.get_universe_array(symbol)
+            elif preload_months:
+                # keep the recent months and the universe in this process: run() filters them in memory
+                preload_months = min(preload_months, MAX_PRELOAD_MONTHS)
+                enable_memory_cache(max_months=preload_months)
+                preload_month_frames(preload_months)
+                load_universe()
+
+    _store_dir = os.path.abspath(store_dir) if store_dir else None
+
+
+def _ping(delay: float) -> int:
+    tm.sleep(delay) # keep this worker busy, so the next ping starts/reaches another one
+    return os.getpid()
+
+
+# trades_info tuple -> json-friendly list (datetimes as iso strings)
+def to_json_trade(trade: tuple) -> list:
+    return [v.isoformat() if isinstance(v, datetime) else v for v in trade]
+
+
+def _run_job(argv: list[str], progress_queue=None) -> dict:
+    import run_bt_v2
+
+    if _store_dir and "--store" not in argv:
+        argv = list(argv) + ["--store", _store_dir] # the pool's data source
+
+    on_progress = None
+    if progress_queue is not None:
+        def on_progress(event: dict):
+            if "trades" in event:
+                event = {**event, "trades": [to_json_trade(t) for t in event["trades"]]}
+            progress_queue.put(event)
+
+    start_time = tm.time()
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        try:
+            with contextlib.redirect_stderr(stderr):
+                args = run_bt_v2.parse_args(argv)
+        except SystemExit:
+            # argparse exits on invalid arguments: an error of this job, not of the worker
+            raise ValueError(f"invalid backtest arguments {argv}: {stderr.getvalue().strip()}") from None
+        try:
+            result = run_bt_v2.run(args, on_progress=on_progress)
+        finally:
+            if progress_queue is not None:
+                progress_queue.put(None) # end of events
+
+    return {
+        "result": result, # BacktestRunResult (trades, metrics), None: no data
+        "stdout": stdout.getvalue(),
+        "runtime": tm.time() - start_time,
+        "pid": os.getpid(),
+    }
+
+
+
+
+class BacktestPool:
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, preload: bool = True, preload_months: int = DEFAULT_PRELOAD_MONTHS, store_dir: str = DEFAULT_STORE_DIR):
+        self.workers = workers
+        self.preload = preload
+        self.preload_months = preload_months
+        self.store_dir = store_dir
+        self._executor: ProcessPoolExecutor = None
+        self._manager = None # progress queues
+
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.preload, self.preload_months, self.store_dir),
+        )
+
+
+    # start all workers now (imports and preload happen here, not on the first request)
+    def start(self):
+        if self._executor is None:
+            self._executor = self._create_executor()
+        futures = [self._executor.submit(_ping, 0.5) for _ in range(self.workers)]
+        return [f.result() for f in futures]
+
+
+    async def run(self, argv: list[str], timeout: float = None, on_progress: Callable[[dict], None] = None) -> dict:
+        if self._executor is None:
+            self._executor = self._create_executor()
+
+        progress_queue = None
+        if on_progress is not None:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            progress_queue = self._manager.Queue()
+
+        try:
+            future = self._executor.submit(_run_job, list(argv), progress_queue)
+        except BrokenProcessPool:
+            # a worker died earlier (e.g. killed, out of memory): replace the pool and retry once
+            self._restart()
+            future = self._executor.submit(_run_job, list(argv), progress_queue)
+
+        forwarded = None
+        if progress_queue is not None:
+            loop = asyncio.get_running_loop()
+            forwarded = loop.create_future()
+            threading.Thread(target=_forward_progress, args=(progress_queue, future, loop, on_progress, forwarded), daemon=True).start()
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except BrokenProcessPool:
+            self._restart() # for the next jobs
+            raise
+
+        if forwarded is not None:
+            await forwarded # all progress events are delivered before the result
+        return result
+
+
+    def _restart(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+
+
+# progress events of a job: queue (worker) -> on_progress (event loop), until the end marker
+# or until the job is over without one (worker died)
+def _forward_progress(progress_queue, future, loop: asyncio.AbstractEventLoop, on_progress: Callable[[dict], None], forwarded: asyncio.Future):
+    try:
+        while True:
+            try:
+                event = progress_queue.get(timeout=1.0)
+            except queue.Empty:
+                if future.done():
+                    return
+                continue
+            except (EOFError, OSError):
+                return # manager shut down
+            if event is None:
+                return
+            loop.call_soon_threadsafe(on_progress, event)
+    finally:
+        loop.call_soon_threadsafe(lambda: forwarded.done() or forwarded.set_result(None))
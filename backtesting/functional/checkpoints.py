@@ -0,0 +1,109 @@
+import json
+import os
+import zlib
+import pandas as pd
+from datetime import datetime
+
+
+# ============================================================
+# batch run checkpoints
+# ============================================================
+# one json file per (date, symbol) unit of a batch run:
+# <checkpoint_dir>/<run key>/<YYYY-MM-DD>/<SYMBOL>.json
+#
+# the run key is a hash of the strategy and the run params (see
+# get_run_checkpoint_dir), so runs of another strategy or other params never
+# resume from each other's checkpoints.
+#
+# files are written atomically (temp file + rename), so a crashed or
+# preempted run never leaves a partial checkpoint behind. a unit with a
+# checkpoint is complete, and the final summary can be rebuilt from the
+# checkpoints alone (also when units were split across machines).
+
+
+# checkpoint dir of a run config (config_key: hash of the strategy and run params)
+def get_run_checkpoint_dir(checkpoint_dir: str, config_key: str) -> str:
+    return os.path.join(checkpoint_dir, config_key[:16])
+
+
+def get_checkpoint_filename(checkpoint_dir: str, date: pd.Timestamp, symbol: str) -> str:
+    return os.path.join(checkpoint_dir, f"{date.date()}", f"{symbol}.json")
+
+
+def has_checkpoint(checkpoint_dir: str, date: pd.Timestamp, symbol: str) -> bool:
+    return os.path.exists(get_checkpoint_filename(checkpoint_dir, date, symbol))
+
+
+def write_checkpoint(
+        checkpoint_dir: str,
+        date: pd.Timestamp,
+        symbol: str,
+        trades_info: list[tuple],
+        status: str = "done", # ['done', 'skipped']
+    ):
+
+    filename = get_checkpoint_filename(checkpoint_dir, date, symbol)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+    checkpoint = {
+        "date": f"{date.date()}",
+        "symbol": symbol,
+        "status": status,
+        "created": datetime.now().isoformat(),
+        "trades_info": [[to_json_value(v) for v in t] for t in trades_info],
+    }
+
+    tmp_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_filename, "w", encoding="UTF8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+def read_checkpoint(filename: str) -> dict:
+    with open(filename, "r", encoding="UTF8") as f:
+        checkpoint = json.load(f)
+    checkpoint["trades_info"] = [tuple(t) for t in checkpoint["trades_info"]]
+    return checkpoint
+
+
+# rebuild trades_info per date from the checkpoints of the given units ({date: symbols}),
+# units without a checkpoint are left out
+def read_checkpoints(checkpoint_dir: str, units: dict[pd.Timestamp, list[str]]) -> dict[pd.Timestamp, list[tuple]]:
+
+    trades_info_per_date: dict[pd.Timestamp, list[tuple]] = {}
+    for date, symbols in units.items():
+        trades_info: list[tuple] = []
+        for symbol in symbols:
+            filename = get_checkpoint_filename(checkpoint_dir, date, symbol)
+            if os.path.exists(filename):
+                trades_info.extend(read_checkpoint(filename)["trades_info"])
+        trades_info_per_date[date] = trades_info
+
+    return trades_info_per_date
+
+
+# ----------------------------------------------
+# split units across machines/processes: shard "k/n" (0 <= k < n)
+# stable across runs, doesn't depend on units order
+def parse_shard(shard: str) -> tuple[int, int]:
+    k, n = (int(x) for x in shard.split("/"))
+    if not 0 <= k < n:
+        raise ValueError(f"invalid shard '{shard}', expected k/n with 0 <= k < n")
+    return k, n
+
+
+def in_shard(date: pd.Timestamp, symbol: str, shard: tuple[int, int]) -> bool:
+    if shard is None:
+        return True
+    k, n = shard
+    return zlib.crc32(f"{date.date()}_{symbol}".encode()) % n == k
+
+
+def to_json_value(value):
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return f"{value}"
+    if hasattr(value, "item"): # numpy scalars
+        return value.item()
+    return value
@@ -0,0 +1,231 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+
+# ============================================================
+# columnar recorder
+# ============================================================
+# append-only table with one typed, growable numpy buffer per field.
+# replaces python lists of tuples (positions_info, trades_info, orders)
+# that grow by millions of rows over multi-month runs.
+#
+# rows are still readable as tuples (recorder[-1], iteration), so existing
+# code that indexes positions_info[-1][8] or writes rows to csv keeps working.
+
+
+# fields: (name, numpy dtype)
+# constant fields (e.g. "method") are not buffered, only re-inserted on read
+# fixed-width strings (U<n>) longer than n raise (nothing is clipped), fields
+# with values of mixed types (an order's pair ref: an int or a list of refs)
+# are "object" columns, read back as stored
+TRADES_INFO_FIELDS: list[tuple[str, str]] = [
+    ("method", "U16"),
+    ("ref", "int64"),
+    ("symbol", "U16"),
+    ("type", "U8"),
+    ("status", "U16"),
+    ("open", "datetime64[s]"),
+    ("close", "datetime64[s]"),
+    ("size", "float64"),
+    ("open price", "float64"),
+    ("close price", "float64"),
+    ("diff price", "float64"),
+    ("percentage", "float64"),
+    ("pnl", "float64"),
+]
+
+POSITIONS_INFO_FIELDS: list[tuple[str, str]] = [
+    ("method", "U16"),
+    ("datetime", "datetime64[s]"),
+    ("size", "float64"),
+    ("open_price", "float64"),
+    ("adjbase_price", "float64"),
+    ("percentage", "float64"),
+    ("init_cost", "float64"),
+    ("curr_cost", "float64"),
+    ("curr_pnl", "float64"),
+]
+
+ORDERS_INFO_FIELDS: list[tuple[str, str]] = [
+    ("method", "U16"),
+    ("ref", "int64"),
+    ("notify_dt", "datetime64[s]"),
+    ("pair_type", "object"), # "main", "limit", "exit (market_close)", ...
+    ("pair_order_ref", "object"), # ref, or list of refs (exit of several orders)
+    ("executed_datetime", "datetime64[s]"),
+    ("order_type", "U8"),
+    ("status", "U16"),
+    ("size", "float64"),
+    ("executed_size", "float64"),
+    ("price", "float64"),
+    ("executed_price", "float64"),
+    ("executed_value", "float64"),
+    ("exec_type", "U16"),
+]
+
+
+def get_header(fields: list[tuple[str, str]]) -> list[str]:
+    return [name for name, _ in fields]
+
+
+
+class ColumnarRecorder:
+
+    def __init__(
+            self,
+            fields: list[tuple[str, str]],
+            constants: dict = None, # field name -> value, not buffered
+            capacity: int = 1024, # initial rows per buffer (doubles when full)
+            sample_every: int = 1, # keep 1 of every n appended rows (0: keep none)
+        ):
+        self.fields = fields
+        self.header = get_header(fields)
+        self.constants = constants or {}
+        self.sample_every = sample_every
+
+        self._size = 0
+        self._capacity = capacity
+        self._appended = 0 # count of append() calls, including dropped samples
+        self._buffers: dict[str, np.ndarray] = {
+            name: np.empty(capacity, dtype=dtype)
+            for name, dtype in fields
+            if name not in self.constants
+        }
+
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> tuple:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(f"row {i} out of range ({self._size} rows)")
+
+        return tuple(
+            self.constants[name] if name in self.constants else _to_python(self._buffers[name][i])
+            for name in self.header
+        )
+
+
+    def _grow(self):
+        self._capacity = max(1, 2 * self._capacity)
+        for name, buf in self._buffers.items():
+            new_buf = np.empty(self._capacity, dtype=buf.dtype)
+            new_buf[:self._size] = buf[:self._size]
+            self._buffers[name] = new_buf
+
+
+    def _write(self, i: int, row: tuple):
+        if len(row) != len(self.header):
+            raise ValueError(f"expected {len(self.header)} values, got {len(row)}")
+
+        for name, value in zip(self.header, row):
+            if name in self.constants:
+                continue
+            buf = self._buffers[name]
+            value = _to_numpy(value, buf.dtype)
+            if buf.dtype.kind == "U" and len(value) > buf.dtype.itemsize // 4:
+                raise ValueError(f"{name}: '{value}' doesn't fit {buf.dtype} ({len(value)} characters)")
+            buf[i] = value
+
+
+    # returns the row index, or None if the row was dropped by sampling
+    def append(self, row: tuple) -> int:
+        self._appended += 1
+        if not self.sample_every or (self._appended - 1) % self.sample_every:
+            return None
+
+        if self._size == self._capacity:
+            self._grow()
+
+        self._write(self._size, row)
+        self._size += 1
+        return self._size - 1
+
+
+    # overwrite an existing row (e.g. an order that changed status)
+    def set(self, i: int, row: tuple):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(f"row {i} out of range ({self._size} rows)")
+        self._write(i, row)
+
+
+    # read-only view over the recorded values of a single field
+    def column(self, name: str) -> np.ndarray:
+        if name in self.constants:
+            return np.full(self._size, self.constants[name])
+        view = self._buffers[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+
+    def to_df(self) -> pd.DataFrame:
+        return pd.DataFrame({name: self.column(name) for name in self.header})
+
+
+    # object columns as strings (parquet columns have one type)
+    def to_parquet(self, filename: str):
+        df = self.to_df()
+        for name in df.columns[df.dtypes == object]:
+            df[name] = [None if v is None else f"{v}" for v in df[name]]
+        df.to_parquet(filename, index=False)
+
+
+    def to_list(self) -> list[tuple]:
+        return list(self)
+
+
+    def nbytes(self) -> int:
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+
+
+
+# ----------------------------------------------
+# python <-> numpy scalars
+# None is stored as NaN / NaT / "" (None in object columns) and read back as None
+
+def _to_numpy(value, dtype: np.dtype):
+    if dtype.kind == "M":
+        if value is None or value == "None":
+            return np.datetime64("NaT")
+        if isinstance(value, datetime):
+            return np.datetime64(value, "s")
+        return np.datetime64(pd.Timestamp(value).to_datetime64(), "s")
+
+    if dtype.kind == "f":
+        return np.nan if value is None else value
+
+    if dtype.kind == "U":
+        return "" if value is None else str(value)
+
+    return value
+
+
+def _to_python(value):
+    if isinstance(value, np.datetime64):
+        if np.isnat(value):
+            return None
+        return value.astype("datetime64[s]").astype(datetime)
+
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+
+    if isinstance(value, np.integer):
+        return int(value)
+
+    if isinstance(value, np.str_):
+        return str(value) if value else None
+
+    return value
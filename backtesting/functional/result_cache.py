@@ -0,0 +1,213 @@
+import ast
+import hashlib
+import inspect
+import json
+import os
+import pandas as pd
+from datetime import datetime
+
+from backtesting.functional.checkpoints import to_json_value
+
+
+# ============================================================
+# backtest result cache
+# ============================================================
+# content-addressed cache of per-(date, symbol) results. the key is a hash of:
+#   code:   the strategy module source + every project module it imports
+#           (st_base, indicators, functional helpers), recursively
+#   params: strategy class, its params and the run settings (cash, ...)
+#   data:   a fingerprint of the exact data slice given to cerebro
+#
+# <cache_dir>/results/<key[:2]>/<key>.json        trades_info per key
+# <cache_dir>/units/<strategy>/<date>/<symbol>.json  last key components per unit,
+#                                                    used to explain misses
+
+
+# project root (two levels up from this file)
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# where "from x.y import z" is resolved, in order (same sys.path entries the runners use)
+IMPORT_ROOTS = [
+    os.path.join(project_root, "backtesting", "backtrader", "strategies"),
+    os.path.join(project_root, "backtesting", "backtrader"),
+    os.path.join(project_root, "backtesting"),
+    project_root,
+]
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _resolve_module(name: str) -> str:
+    parts = name.split(".")
+    for root in IMPORT_ROOTS:
+        filename = os.path.join(root, *parts) + ".py"
+        if os.path.isfile(filename):
+            return filename
+        filename = os.path.join(root, *parts, "__init__.py")
+        if os.path.isfile(filename):
+            return filename
+    return None # not a project module (backtrader, pandas, ...)
+
+
+# strategy source + its project imports, recursively: {relative path: sha256}
+def get_source_hashes(filename: str) -> dict[str, str]:
+    hashes: dict[str, str] = {}
+    pending = [os.path.abspath(filename)]
+
+    while pending:
+        filename = pending.pop()
+        relpath = os.path.relpath(filename, project_root).replace(os.sep, "/")
+        if relpath in hashes:
+            continue
+
+        with open(filename, "rb") as f:
+            source = f.read()
+        hashes[relpath] = _sha256(source)
+
+        for node in ast.walk(ast.parse(source)):
+            names = []
+            if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module] + [f"{node.module}.{a.name}" for a in node.names]
+            elif isinstance(node, ast.Import):
+                names = [a.name for a in node.names]
+
+            for name in names:
+                dependency = _resolve_module(name)
+                if dependency:
+                    pending.append(dependency)
+
+    return dict(sorted(hashes.items()))
+
+
+def get_data_fingerprint(df: pd.DataFrame) -> str:
+    h = hashlib.sha256()
+    h.update(",".join(f"{c}:{t}" for c, t in df.dtypes.items()).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def get_params_fingerprint(strategy, params: dict) -> str:
+    strategy_params = dict(strategy.params._getitems()) if hasattr(strategy, "params") else {}
+    data = {
+        "strategy": f"{strategy.__module__}.{strategy.__name__}",
+        "strategy_params": strategy_params,
+        "params": params,
+    }
+    return _sha256(json.dumps(data, sort_keys=True, default=str).encode())
+
+
+
+
+class ResultCache:
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self._code_hashes: dict[type, dict[str, str]] = {} # computed once per strategy per run
+        self.report: list[tuple] = [] # (date, symbol, "hit"/"miss", reason)
+
+
+    def get_code_hashes(self, strategy) -> dict[str, str]:
+        if strategy not in self._code_hashes:
+            self._code_hashes[strategy] = get_source_hashes(inspect.getsourcefile(strategy))
+        return self._code_hashes[strategy]
+
+
+    def get_components(self, strategy, params: dict, df: pd.DataFrame) -> dict:
+        code_hashes = self.get_code_hashes(strategy)
+        return {
+            "code": _sha256(json.dumps(code_hashes).encode()),
+            "code_files": code_hashes,
+            "params": get_params_fingerprint(strategy, params),
+            "data": get_data_fingerprint(df),
+        }
+
+
+    @staticmethod
+    def get_key(components: dict) -> str:
+        return _sha256(f"{components['code']}|{components['params']}|{components['data']}".encode())
+
+
+    def _result_filename(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "results", key[:2], f"{key}.json")
+
+    def _unit_filename(self, strategy, date: pd.Timestamp, symbol: str) -> str:
+        return os.path.join(self.cache_dir, "units", strategy.__name__, f"{date.date()}", f"{symbol}.json")
+
+
+    # (cached trades_info or None, key components for put()), miss reason goes to self.report
+    def get(self, strategy, params: dict, df: pd.DataFrame, date: pd.Timestamp, symbol: str) -> tuple[list[tuple], dict]:
+        components = self.get_components(strategy, params, df)
+        filename = self._result_filename(self.get_key(components))
+
+        if os.path.exists(filename):
+            with open(filename, "r", encoding="UTF8") as f:
+                trades_info = [tuple(t) for t in json.load(f)["trades_info"]]
+            self.report.append((date, symbol, "hit", ""))
+            return trades_info, components
+
+        self.report.append((date, symbol, "miss", self._explain_miss(strategy, components, date, symbol)))
+        return None, components
+
+
+    def put(self, strategy, components: dict, date: pd.Timestamp, symbol: str, trades_info: list[tuple]):
+        key = self.get_key(components)
+        _write_json(self._result_filename(key), {
+            "key": key,
+            "created": datetime.now().isoformat(),
+            "trades_info": [[to_json_value(v) for v in t] for t in trades_info],
+        })
+        _write_json(self._unit_filename(strategy, date, symbol), {"key": key, "components": components})
+
+
+    def _explain_miss(self, strategy, components: dict, date: pd.Timestamp, symbol: str) -> str:
+        filename = self._unit_filename(strategy, date, symbol)
+        if not os.path.exists(filename):
+            return "new unit"
+
+        with open(filename, "r", encoding="UTF8") as f:
+            previous = json.load(f)["components"]
+
+        reasons = []
+        if previous["code"] != components["code"]:
+            prev_files, curr_files = previous["code_files"], components["code_files"]
+            changed = sorted(
+                f for f in set(prev_files) | set(curr_files)
+                if prev_files.get(f) != curr_files.get(f)
+            )
+            reasons.append(f"code changed ({', '.join(os.path.basename(f) for f in changed)})")
+        if previous["params"] != components["params"]:
+            reasons.append("params changed")
+        if previous["data"] != components["data"]:
+            reasons.append("data changed")
+
+        return ", ".join(reasons) or "result file missing"
+
+
+    def print_report(self, verbose: bool = False):
+        hits = [r for r in self.report if r[2] == "hit"]
+        misses = [r for r in self.report if r[2] == "miss"]
+
+        print(f"result cache ({self.cache_dir}): {len(hits)} hits, {len(misses)} misses")
+
+        reasons: dict[str, int] = {}
+        for r in misses:
+            reasons[r[3]] = reasons.get(r[3], 0) + 1
+        for reason, count in sorted(reasons.items(), key=lambda x: -x[1]):
+            print(f"    miss: {reason} ({count})")
+
+        if verbose:
+            for date, symbol, status, reason in self.report:
+                print(f"    {date.date()} {symbol}: {status} {reason}")
+
+
+
+
+def _write_json(filename: str, data: dict):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    tmp_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_filename, "w", encoding="UTF8") as f:
+        json.dump(data, f)
+    os.replace(tmp_filename, filename)
+
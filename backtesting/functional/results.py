@@ -0,0 +1,189 @@
+import math
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# typed backtest results
+# ============================================================
+# what run_bt_v2.run() returns: the run's trades and metrics, so callers
+# (the api worker pool, scripts) use them directly instead of parsing the
+# printed summary or reading back the newest csv in backtesting/outputs.
+#
+#   result = run(parse_args(["--symbols", "AAPL", "--no-plot"]))
+#   result.metrics.pnl, result.metrics.win_rate, result.trades[0].close_price
+#   result.to_dict()   # json-friendly (datetimes as iso strings)
+#
+# pnl and prices are per share (the strategies trade size 1).
+
+
+# the fields of a trades_info tuple (strategies' notify_trade)
+TRADES_INFO_COLUMNS = [
+    "method",
+    "ref",
+    "symbol",
+    "type",
+    "status",
+    "open",
+    "close",
+    "size",
+    "open price",
+    "close price",
+    "diff price",
+    "percentage",
+    "pnl",
+]
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+@dataclass
+class Trade:
+    ref: int
+    symbol: str
+    type: str # "long" | "short"
+    status: str
+    open: datetime
+    close: datetime
+    size: float
+    open_price: float
+    close_price: float
+    diff_price: float
+    percentage: float # diff price, % of open price
+    pnl: float
+
+
+    @classmethod
+    def from_tuple(cls, trade: tuple) -> "Trade":
+        _, ref, symbol, type, status, open, close, size, open_price, close_price, diff_price, percentage, pnl = trade
+        return cls(
+            ref=int(ref),
+            symbol=f"{symbol}",
+            type=f"{type}",
+            status=f"{status}",
+            open=pd.Timestamp(open).to_pydatetime(),
+            close=pd.Timestamp(close).to_pydatetime(),
+            size=float(size),
+            open_price=float(open_price),
+            close_price=float(close_price),
+            diff_price=float(diff_price),
+            percentage=float(percentage),
+            pnl=float(pnl),
+        )
+
+
+    def to_dict(self) -> dict:
+        trade = asdict(self)
+        trade["open"] = self.open.isoformat()
+        trade["close"] = self.close.isoformat()
+        return trade
+
+
+
+
+@dataclass
+class BacktestMetrics:
+    trades: int = 0
+    won: int = 0
+    lost: int = 0
+    win_rate: float = 0.0 # % of trades with pnl >= 0
+    pnl: float = 0.0 # sum (expectancy)
+    won_pnl: float = 0.0
+    lost_pnl: float = 0.0
+    mean_pnl: float = 0.0 # $/trade
+    profit_factor: float = None # None: no losing trades
+    max_drawdown: float = 0.0 # $, of the cumulative pnl (trades by close time)
+    sharpe_ratio: float = 0.0 # annualized, of daily pnl per $ entered that day (0 on days without closed trades)
+    total_enter_cost: float = 0.0
+    symbols: int = 0
+
+
+    @classmethod
+    # start, end: first and last date of the run (None: of the closed trades)
+    def from_trades(cls, trades: list[Trade], start: datetime = None, end: datetime = None) -> "BacktestMetrics":
+        if not trades:
+            return cls()
+
+        pnl = np.array([t.pnl for t in trades])
+        won = pnl >= 0
+        won_pnl = float(pnl[won].sum())
+        lost_pnl = float(pnl[~won].sum())
+
+        # equity (cumulative pnl) in close order: drawdown from its running peak (starting at 0)
+        order = np.argsort([t.close for t in trades], kind="stable")
+        equity = np.cumsum(pnl[order])
+        max_drawdown = float(np.max(np.maximum.accumulate(np.r_[0.0, equity])[1:] - equity))
+
+        # daily returns: pnl of the trades closed that day / their entry cost, over every business
+        # day of the run (days without closed trades return 0, like portfolio.py)
+        daily = pd.DataFrame({
+            "date": pd.DatetimeIndex([t.close.date() for t in trades]),
+            "pnl": pnl,
+            "cost": [t.open_price * abs(t.size) for t in trades],
+        }).groupby("date").sum()
+        first_day = min(pd.Timestamp(start).normalize(), daily.index[0]) if start is not None else daily.index[0]
+        last_day = max(pd.Timestamp(end).normalize(), daily.index[-1]) if end is not None else daily.index[-1]
+        days = pd.bdate_range(first_day, last_day).union(daily.index)
+        returns = (daily["pnl"] / daily["cost"]).reindex(days, fill_value=0.0).to_numpy()
+        sharpe_ratio = 0.0
+        if len(returns) > 1 and returns.std(ddof=1) > 0:
+            sharpe_ratio = float(returns.mean() / returns.std(ddof=1) * math.sqrt(TRADING_DAYS_PER_YEAR))
+
+        return cls(
+            trades=len(trades),
+            won=int(won.sum()),
+            lost=int((~won).sum()),
+            win_rate=float(100 * won.mean()),
+            pnl=float(pnl.sum()),
+            won_pnl=won_pnl,
+            lost_pnl=lost_pnl,
+            mean_pnl=float(pnl.mean()),
+            profit_factor=won_pnl / abs(lost_pnl) if lost_pnl else None,
+            max_drawdown=max_drawdown,
+            sharpe_ratio=sharpe_ratio,
+            total_enter_cost=float(sum(t.open_price for t in trades)),
+            symbols=len({t.symbol for t in trades}),
+        )
+
+
+
+
+@dataclass
+class BacktestRunResult:
+    start: datetime # first and last date of the run
+    end: datetime
+    dates: int
+    strategy: str
+    trades: list[Trade] = field(default_factory=list) # by open time
+    metrics: BacktestMetrics = field(default_factory=BacktestMetrics)
+    output_file: str = None # csv of the trades, when written
+
+
+    @classmethod
+    def from_trades_info(cls, trades_info_per_date: dict[pd.Timestamp, list[tuple]], dates: list[pd.Timestamp], strategy: str, output_file: str = None) -> "BacktestRunResult":
+        trades = [Trade.from_tuple(t) for trades_info in trades_info_per_date.values() for t in trades_info]
+        trades.sort(key=lambda t: (t.open, t.symbol, t.ref))
+        return cls(
+            start=pd.Timestamp(dates[0]).to_pydatetime(),
+            end=pd.Timestamp(dates[-1]).to_pydatetime(),
+            dates=len(dates),
+            strategy=strategy,
+            trades=trades,
+            metrics=BacktestMetrics.from_trades(trades, dates[0], dates[-1]),
+            output_file=output_file,
+        )
+
+
+    def to_dict(self) -> dict:
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "dates": self.dates,
+            "strategy": self.strategy,
+            "trades": [t.to_dict() for t in self.trades],
+            "metrics": asdict(self.metrics),
+            "output_file": self.output_file,
+        }
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from datetime import time
+
+
+# ============================================================
+# vectorized long/flat backtester
+# ============================================================
+# fast path for screening strategies that reduce to:
+#   enter long on signal, exit on signal or at a forced exit time
+#   (e.g. market close minus 10m), market orders, fixed size,
+#   optionally one trade per session.
+#
+# fills follow backtrader's default broker: a market order placed on bar i
+# (signal on bar i's close, in next()) executes at bar i+1's open.
+# the output matches StrategyBase.notify_trade's trades_info schema, so it
+# can be passed to print_summary() like a cerebro_run() result.
+#
+# cost is O(bars) numpy work + O(trades * log(bars)) python work.
+
+
+# bars with time >= t (e.g. market close minus 10m: close position, no new entries)
+def get_time_mask(index: pd.DatetimeIndex, t: time, op: str = ">=") -> np.ndarray:
+    minutes = index.hour.values * 60 + index.minute.values
+    t_minutes = t.hour * 60 + t.minute
+    if op == ">=":
+        return minutes >= t_minutes
+    if op == "==":
+        return minutes == t_minutes
+    if op == "<":
+        return minutes < t_minutes
+    raise ValueError(f"invalid op: {op}")
+
+
+# session id per bar (default: calendar date, utc)
+def get_session_ids(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.normalize().values.astype("datetime64[D]").astype(np.int64)
+
+
+def run_vectorized(
+        df: pd.DataFrame, # 5m bars, sorted DatetimeIndex, "open" column
+        entries: np.ndarray, # bool per bar: enter long (if flat)
+        exits: np.ndarray, # bool per bar: close position (if long)
+        force_exit_time: time = None, # close at/after this time, no entries from it on
+        session_ids: np.ndarray = None, # session boundaries, one id per bar (default: date)
+        one_trade_per_session: bool = True, # no entry after a trade closed in the same session
+        size: float = 1,
+        symbol: str = None,
+        first_ref: int = 1, # trade.ref of the first trade
+    ) -> list[tuple]:
+
+    n = len(df)
+    index: pd.DatetimeIndex = df.index
+    opens = df["open"].to_numpy(dtype=np.float64)
+    symbol = symbol if symbol is not None else (df.iloc[0]["symbol"] if n and "symbol" in df.columns else None)
+
+    size = float(size) # backtrader reports trade.size as float
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+    if len(entries) != n or len(exits) != n:
+        raise ValueError(f"entries/exits must have one value per bar ({n})")
+
+    if force_exit_time is not None:
+        forced = get_time_mask(index, force_exit_time)
+        entries = entries & ~forced
+        exits = exits | forced
+
+    if session_ids is None:
+        session_ids = get_session_ids(index)
+
+    # last bar index of each bar's session (sessions are contiguous)
+    session_bounds = np.append(np.flatnonzero(np.diff(session_ids) != 0), n - 1)
+    session_last = session_bounds[np.searchsorted(session_bounds, np.arange(n))]
+
+    entry_bars = np.flatnonzero(entries)
+    exit_bars = np.flatnonzero(exits)
+
+    trades_info: list[tuple] = []
+    closed_sessions: set = set()
+    pos = 0 # first bar where the strategy is flat and may enter
+
+    while True:
+        k = np.searchsorted(entry_bars, pos)
+        if k == len(entry_bars):
+            break
+        i = entry_bars[k]
+
+        if one_trade_per_session and session_ids[i] in closed_sessions:
+            pos = session_last[i] + 1
+            continue
+
+        enter_bar = i + 1
+        if enter_bar >= n:
+            break # order placed on the last bar never fills
+
+        # position is open from enter_bar's next() on
+        m = np.searchsorted(exit_bars, enter_bar)
+        if m == len(exit_bars) or exit_bars[m] + 1 >= n:
+            break # still open at the end of data (not a closed trade)
+        exit_bar = exit_bars[m] + 1
+
+        enter_price = float(opens[enter_bar])
+        exit_price = float(opens[exit_bar])
+        trades_info.append((
+            "notify_trade",
+            first_ref + len(trades_info),
+            symbol,
+            "long",
+            "Closed",
+            index[enter_bar].to_pydatetime(),
+            index[exit_bar].to_pydatetime(),
+            size,
+            enter_price,
+            exit_price,
+            round(exit_price - enter_price, 4), # diff price
+            round(100*(exit_price - enter_price)/enter_price, 2), # percentage
+            round(size*(exit_price - enter_price), 2), # pnl
+        ))
+
+        closed_sessions.add(session_ids[exit_bar])
+        pos = exit_bar # flat again at exit_bar's next()
+
+    return trades_info
@@ -0,0 +1 @@
+# Market data storage and loading
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import sys
+import time as tm
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable
+
+try:
+    import pyarrow # noqa: F401 (parquet engine)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# ============================================================
+# columnar cache for csv market data
+# ============================================================
+# read_csv_cached() is a drop-in for:
+#   df = pd.read_csv(filename, parse_dates=["timestamp"])
+#   df = df.set_index("timestamp")
+#   df.sort_index(ascending=True, inplace=True)
+#
+# on first read the csv is parsed once and saved as a sorted, typed parquet
+# file next to it:
+#   data_2020_2025/by_dates/503symbols_2022-05.csv
+#   data_2020_2025/by_dates/.columnar/503symbols_2022-05.parquet
+#   data_2020_2025/by_dates/.columnar/503symbols_2022-05.meta.json
+#
+# later reads load the parquet file. the cache is invalidated when the
+# source csv's mtime or size changes (or CACHE_VERSION is bumped).
+# without pyarrow installed it falls back to reading the csv.
+#
+# pre-convert a whole tree in parallel:
+#   python -m backtesting.market_data.columnar_cache data_2020_2025 --workers 8
+
+
+CACHE_VERSION = 1
+CACHE_DIRNAME = ".columnar"
+
+# timestamp column, in order of preference (data_2020_2025: "timestamp", csv_input: "date")
+TIMESTAMP_COLUMNS = ["timestamp", "date"]
+
+
+# suffix: derived data of the same csv (e.g. ".1d_rth" daily bars, see resample.py)
+def get_cache_filenames(filename: str, suffix: str = "") -> tuple[str, str]:
+    dirname, basename = os.path.split(os.path.abspath(filename))
+    name = os.path.splitext(basename)[0] + suffix
+    cache_dir = os.path.join(dirname, CACHE_DIRNAME)
+    return os.path.join(cache_dir, f"{name}.parquet"), os.path.join(cache_dir, f"{name}.meta.json")
+
+
+# extra: whatever else the cached frame depends on (e.g. session times)
+def _get_source_meta(filename: str, date_format: str, extra: dict = None) -> dict:
+    stat = os.stat(filename)
+    meta = {
+        "version": CACHE_VERSION,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "date_format": date_format,
+    }
+    if extra:
+        meta["extra"] = extra
+    return meta
+
+
+def is_cache_valid(filename: str, date_format: str = None, suffix: str = "", extra: dict = None) -> bool:
+    parquet_filename, meta_filename = get_cache_filenames(filename, suffix)
+    if not os.path.exists(parquet_filename) or not os.path.exists(meta_filename):
+        return False
+
+    try:
+        with open(meta_filename, "r", encoding="UTF8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    return meta.get("source") == _get_source_meta(filename, date_format, extra)
+
+
+# parse the csv: timestamp index, sorted (stable, keeps the csv order of equal timestamps)
+def _read_csv(filename: str, date_format: str = None) -> pd.DataFrame:
+    df = pd.read_csv(filename, encoding="utf-8-sig") # some csv_input files start with a BOM
+
+    timestamp_column = next((c for c in TIMESTAMP_COLUMNS if c in df.columns), None)
+    if timestamp_column is None:
+        raise ValueError(f"no timestamp column ({', '.join(TIMESTAMP_COLUMNS)}) in [{filename}]")
+
+    df[timestamp_column] = pd.to_datetime(df[timestamp_column], format=date_format)
+    df = df.set_index(timestamp_column)
+    df.sort_index(ascending=True, inplace=True, kind="stable")
+    return df
+
+
+def convert_csv(filename: str, date_format: str = None) -> pd.DataFrame:
+    df = _read_csv(filename, date_format)
+    _write_cache(filename, df, _get_source_meta(filename, date_format))
+    return df
+
+
+# a frame computed from a csv (e.g. daily bars), cached next to it and
+# invalidated like the csv cache (source mtime/size) or when extra changes
+def read_derived_cached(filename: str, suffix: str, compute: Callable[[], pd.DataFrame], extra: dict = None) -> pd.DataFrame:
+    if not HAS_PYARROW:
+        return compute()
+    if is_cache_valid(filename, suffix=suffix, extra=extra):
+        return pd.read_parquet(get_cache_filenames(filename, suffix)[0], engine="pyarrow")
+
+    source_meta = _get_source_meta(filename, None, extra) # before compute(): a csv replaced meanwhile isn't marked valid
+    df = compute()
+    _write_cache(filename, df, source_meta, suffix)
+    return df
+
+
+def _write_cache(filename: str, df: pd.DataFrame, source_meta: dict, suffix: str = ""):
+    parquet_filename, meta_filename = get_cache_filenames(filename, suffix)
+    os.makedirs(os.path.dirname(parquet_filename), exist_ok=True)
+
+    # write both files atomically, meta last: a reader never sees a meta without its parquet
+    tmp_filename = f"{parquet_filename}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_filename, engine="pyarrow", index=True)
+    os.replace(tmp_filename, parquet_filename)
+
+    tmp_filename = f"{meta_filename}.{os.getpid()}.tmp"
+    with open(tmp_filename, "w", encoding="UTF8") as f:
+        json.dump({"source": source_meta, "rows": len(df), "created": pd.Timestamp.now().isoformat()}, f)
+    os.replace(tmp_filename, meta_filename)
+
+
+# parquet filename of a csv, converted if missing or stale (None without pyarrow)
+def ensure_cached(filename: str, date_format: str = None) -> str:
+    if not HAS_PYARROW:
+        return None
+    if not is_cache_valid(filename, date_format):
+        convert_csv(filename, date_format)
+    return get_cache_filenames(filename)[0]
+
+
+def read_csv_cached(
+        filename: str,
+        columns: list[str] = None, # subset of columns to read (index always included)
+        date_format: str = None, # e.g. "%m/%d/%Y" for the 1d csv_input files
+        use_cache: bool = True,
+    ) -> pd.DataFrame:
+
+    if not use_cache or not HAS_PYARROW:
+        df = _read_csv(filename, date_format)
+    elif is_cache_valid(filename, date_format):
+        parquet_filename, _ = get_cache_filenames(filename)
+        return pd.read_parquet(parquet_filename, engine="pyarrow", columns=columns)
+    else:
+        df = convert_csv(filename, date_format)
+
+    return df[columns] if columns is not None else df
+
+
+# ----------------------------------------------
+# pre-convert a tree
+
+def find_csv_files(root: str) -> list[str]:
+    filenames = []
+    for dirpath, dirnames, files in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d != CACHE_DIRNAME]
+        filenames.extend(os.path.join(dirpath, f) for f in files if f.lower().endswith(".csv"))
+    return sorted(filenames)
+
+
+def _convert_one(filename: str, force: bool) -> tuple[str, str, float]:
+    if not force and is_cache_valid(filename):
+        return filename, "up to date", 0.0
+    start_time = tm.time()
+    convert_csv(filename)
+    return filename, "converted", tm.time() - start_time
+
+
+def convert_tree(root: str, workers: int = None, force: bool = False) -> list[tuple[str, str, float]]:
+    filenames = find_csv_files(root)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_convert_one, f, force) for f in filenames]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e: # unparsable csv: report and go on
+                result = (filenames[futures.index(future)], f"failed: {e}", 0.0)
+            results.append(result)
+            filename, status, runtime = result
+            print(f"[{status}] {os.path.relpath(filename, root)}" + (f" ({round(runtime, 2)}s)" if runtime else ""))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert market data csv files to cached parquet files.")
+    parser.add_argument('root', nargs='?', default='data_2020_2025', help='directory to scan for csv files (recursive)')
+    parser.add_argument('--workers', type=int, default=None, help='parallel processes (default: cpu count)')
+    parser.add_argument('--force', action='store_true', help='convert also files with a valid cache')
+    args = parser.parse_args()
+
+    if not HAS_PYARROW:
+        print("pyarrow is not installed (pip install pyarrow)")
+        sys.exit(1)
+
+    start_time = tm.time()
+    results = convert_tree(args.root, workers=args.workers, force=args.force)
+    converted = sum(1 for r in results if r[1] == "converted")
+    failed = sum(1 for r in results if r[1].startswith("failed"))
+    print(f"{len(results)} files: {converted} converted, {failed} failed ({round(tm.time() - start_time, 2)}s)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
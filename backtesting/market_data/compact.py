@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# compact in-memory bars
+# ============================================================
+# opt-in smaller dtypes for multi-symbol 5m frames:
+#   symbol  -> category (503 distinct strings instead of one object per row)
+#   prices  -> float32, only where it's lossless (see below)
+#   volume  -> smallest integer type that holds it, only if all values are whole numbers
+#              (pandas nullable "UInt32" when missing bars have nan volume)
+#
+# precision contract:
+#   the csv prices have at most PRICE_DECIMALS (4) decimals. a price column is
+#   stored as float32 only if rounding every float32 value back to float64 with
+#   PRICE_DECIMALS decimals gives the original value exactly (checked per column,
+#   on load). restore_bars() does that rounding, so a restored slice is
+#   bit-identical to a float64 load and backtests give the same trades.
+#   columns that fail the check (e.g. prices above ~100k, more decimals) stay float64.
+#
+#   df = load_bars(start="2022-05-01", end="2022-07-31", compact=True)
+#   print_memory_report(df)
+#   filtered_df = restore_bars(df[df["symbol"] == "AAPL"])
+
+
+PRICE_DECIMALS = 4
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+NULLABLE_INT_DTYPES = {"uint32": "UInt32", "int32": "Int32", "int64": "Int64"}
+
+
+def _is_float32_lossless(values: np.ndarray, decimals: int) -> bool:
+    restored = np.round(values.astype(np.float32).astype(np.float64), decimals)
+    return bool(np.array_equal(restored, values, equal_nan=True))
+
+
+# numpy int dtype, or pandas nullable int dtype name ("UInt32") if there are missing bars (nan)
+def _get_int_dtype(values: np.ndarray):
+    present = values[~np.isnan(values)]
+    if not len(present):
+        return None
+    if not np.isfinite(present).all() or not (present == np.floor(present)).all():
+        return None # fractional volume: keep as is
+    low, high = present.min(), present.max()
+    for dtype in (np.uint32, np.int64) if low >= 0 else (np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype) if len(present) == len(values) else NULLABLE_INT_DTYPES[np.dtype(dtype).name]
+    return None
+
+
+def compact_bars(df: pd.DataFrame, decimals: int = PRICE_DECIMALS) -> pd.DataFrame:
+    columns = {}
+    float32_columns = []
+
+    for column in df.columns:
+        values = df[column]
+        if column == "symbol":
+            columns[column] = values.astype("category")
+        elif column in PRICE_COLUMNS and values.dtype == np.float64 and _is_float32_lossless(values.to_numpy(), decimals):
+            columns[column] = values.astype(np.float32)
+            float32_columns.append(column)
+        elif column == "volume" and values.dtype.kind == "f" and (int_dtype := _get_int_dtype(values.to_numpy())) is not None:
+            columns[column] = values.astype(int_dtype)
+        else:
+            columns[column] = values
+
+    df = pd.DataFrame(columns, index=df.index)
+    df.attrs["compact_decimals"] = decimals
+    df.attrs["compact_float32_columns"] = float32_columns
+    return df
+
+
+# concat compact frames (e.g. one per month) without falling back to object/float64 columns
+def concat_compact(dfs: list[pd.DataFrame]) -> pd.DataFrame:
+    decimals = dfs[0].attrs.get("compact_decimals", PRICE_DECIMALS)
+    if "symbol" in dfs[0].columns:
+        categories = sorted(set().union(*(df["symbol"].cat.categories for df in dfs)))
+        for df in dfs:
+            df["symbol"] = df["symbol"].cat.set_categories(categories)
+
+    # a column float32 in some parts only becomes float64 in the concat: restore it in those
+    # parts first (rounding the whole column would also round the float64 parts' values)
+    parts_float32_columns = [set(df.attrs.get("compact_float32_columns", [])) for df in dfs]
+    float32_columns = set.intersection(*parts_float32_columns)
+    for df, part_float32_columns in zip(dfs, parts_float32_columns):
+        for column in part_float32_columns - float32_columns:
+            df[column] = np.round(df[column].to_numpy(dtype=np.float64), decimals)
+
+    df = pd.concat(dfs) if len(dfs) > 1 else dfs[0]
+    df.attrs["compact_decimals"] = decimals
+    df.attrs["compact_float32_columns"] = [c for c in PRICE_COLUMNS if c in float32_columns]
+    return df
+
+
+# float64 prices/volume again, exactly the values of a non-compact load
+def restore_bars(df: pd.DataFrame) -> pd.DataFrame:
+    decimals = df.attrs.get("compact_decimals")
+    if decimals is None:
+        return df.copy()
+
+    df = df.copy()
+    for column in df.attrs.get("compact_float32_columns", []):
+        df[column] = np.round(df[column].to_numpy(dtype=np.float64), decimals)
+    if "volume" in df.columns and df["volume"].dtype.kind in "iu":
+        df["volume"] = df["volume"].to_numpy(dtype=np.float64, na_value=np.nan)
+    if "symbol" in df.columns and isinstance(df["symbol"].dtype, pd.CategoricalDtype):
+        df["symbol"] = df["symbol"].astype(str)
+
+    for key in ("compact_decimals", "compact_float32_columns"):
+        df.attrs.pop(key, None)
+    return df
+
+
+# ----------------------------------------------
+# memory report
+
+def get_memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    usage = df.memory_usage(index=True, deep=True)
+    report = pd.DataFrame({
+        "dtype": [f"{df.index.dtype}"] + [f"{df[c].dtype}" for c in df.columns],
+        "bytes": usage.values,
+    }, index=usage.index)
+    report["bytes/row"] = (report["bytes"] / max(len(df), 1)).round(2)
+    return report
+
+
+def print_memory_report(df: pd.DataFrame, df_before: pd.DataFrame = None):
+    report = get_memory_report(df)
+    if df_before is not None:
+        before = get_memory_report(df_before)
+        report.insert(0, "dtype (before)", before["dtype"])
+        report.insert(1, "bytes (before)", before["bytes"])
+    print(report.to_string())
+
+    total = report["bytes"].sum()
+    if df_before is not None:
+        total_before = report["bytes (before)"].sum()
+        print(f"total: {round(total_before / 2**20, 2)} MB -> {round(total / 2**20, 2)} MB (x{round(total_before / max(total, 1), 2)} smaller), {len(df)} rows")
+    else:
+        print(f"total: {round(total / 2**20, 2)} MB, {len(df)} rows")
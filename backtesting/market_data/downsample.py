@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from backtesting.market_data.loader import BY_DATES_DIR, get_month_files, get_time_range, load_bars
+
+
+# ============================================================
+# ohlc downsampling and chart slices
+# ============================================================
+# downsample_ohlc() merges consecutive bars into at most max_points buckets
+# (equal bar counts) and keeps what a candle chart needs of each bucket:
+#   open    first open        high    max high (the bucket's extreme, never averaged away)
+#   close   last close        low     min low
+#   volume  sum               time    first bar's timestamp
+# so every peak and trough of the full series is still drawn.
+#
+# get_bar_slice() is the chart payload of a (symbol, range, max points)
+# query: columnar json (t, o, h, l, c, v arrays, t in epoch ms utc) and a
+# strong etag. the etag is known before any bar is read: a hash of the query
+# and of the month files it reads (path, size, mtime), so a revalidation with
+# an unchanged etag reads nothing. encoded payloads are kept in a small lru.
+#
+#   slice = get_bar_slice("AAPL", "2022-05-01", "2022-07-31", max_points=1500)
+#   slice.etag, slice.body (json bytes), slice.immutable
+#
+# a slice of a historical range (ended before today) is immutable: served
+# with a long max-age, the etag covers re-ingested month files.
+
+
+BAR_COLUMNS = ["open", "high", "low", "close", "volume"]
+SLICE_CACHE_SIZE = 64
+
+
+def downsample_ohlc(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    df = df[df["close"].notna().values]
+    n = len(df)
+    if n <= max_points:
+        return df[BAR_COLUMNS]
+
+    starts = np.unique(np.linspace(0, n, max_points, endpoint=False).astype(np.int64))
+    ends = np.r_[starts[1:], n] - 1
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+    volume = np.nan_to_num(df["volume"].to_numpy(dtype=np.float64))
+
+    return pd.DataFrame({
+        "open": df["open"].to_numpy(dtype=np.float64)[starts],
+        "high": np.fmax.reduceat(high, starts), # fmax/fmin: a nan high/low doesn't hide the others
+        "low": np.fmin.reduceat(low, starts),
+        "close": df["close"].to_numpy(dtype=np.float64)[ends],
+        "volume": np.add.reduceat(volume, starts),
+    }, index=df.index[starts])
+
+
+# ----------------------------------------------
+# chart slices
+
+class BarSlice:
+
+    def __init__(self, etag: str, body: bytes, points: int, immutable: bool):
+        self.etag = etag
+        self.body = body # json
+        self.points = points
+        self.immutable = immutable # see is_historical_range()
+
+
+_slices: "OrderedDict[str, BarSlice]" = OrderedDict()
+_slices_lock = threading.Lock()
+
+
+# a range that ended before today (utc): its bars don't change anymore
+def is_historical_range(start=None, end=None) -> bool:
+    _, range_end = get_time_range(start, end)
+    return range_end is not None and range_end <= pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+
+
+# etag of a query: its arguments + the (path, size, mtime) of the month files it reads
+def get_bar_slice_etag(symbol: str, start, end, max_points: int, data_dir: str = BY_DATES_DIR) -> str:
+    range_start, range_end = get_time_range(start, end)
+    files = []
+    for month, filename in get_month_files(data_dir).items():
+        if (range_start is None or month + pd.offsets.MonthBegin(1) > range_start) and (range_end is None or month < range_end):
+            stat = os.stat(filename)
+            files.append([os.path.basename(filename), stat.st_size, stat.st_mtime_ns])
+    key = json.dumps([symbol, f"{range_start}", f"{range_end}", max_points, files])
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def get_bar_slice(symbol: str, start=None, end=None, max_points: int = 1000, data_dir: str = BY_DATES_DIR) -> BarSlice:
+    etag = get_bar_slice_etag(symbol, start, end, max_points, data_dir)
+    with _slices_lock:
+        if etag in _slices:
+            _slices.move_to_end(etag)
+            return _slices[etag]
+
+    df = load_bars(symbols=[symbol], start=start, end=end, columns=["symbol"] + BAR_COLUMNS, data_dir=data_dir)
+    bars = downsample_ohlc(df, max_points)
+
+    payload = {
+        "symbol": symbol,
+        "start": f"{df.index[0].isoformat()}" if len(df) else None,
+        "end": f"{df.index[-1].isoformat()}" if len(df) else None,
+        "bars": int(df["close"].notna().sum()), # 5m bars in the range
+        "points": len(bars),
+        "t": bars.index.as_unit("ms").asi8.tolist(), # epoch ms
+        "o": _to_json_list(bars["open"]),
+        "h": _to_json_list(bars["high"]),
+        "l": _to_json_list(bars["low"]),
+        "c": _to_json_list(bars["close"]),
+        "v": _to_json_list(bars["volume"]),
+    }
+    bar_slice = BarSlice(
+        etag=etag,
+        body=json.dumps(payload, separators=(",", ":")).encode(),
+        points=len(bars),
+        immutable=is_historical_range(start, end),
+    )
+
+    with _slices_lock:
+        _slices[etag] = bar_slice
+        if len(_slices) > SLICE_CACHE_SIZE:
+            _slices.popitem(last=False)
+    return bar_slice
+
+
+# values with nan as None (json null)
+def _to_json_list(values: pd.Series) -> list:
+    values = values.astype(np.float64)
+    if not values.isna().any():
+        return values.tolist()
+    return values.astype(object).where(values.notna(), None).tolist()
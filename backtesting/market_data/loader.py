@@ -0,0 +1,280 @@
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+
+from backtesting.market_data.columnar_cache import HAS_PYARROW, ensure_cached, read_csv_cached
+from backtesting.market_data.compact import compact_bars, concat_compact
+
+if HAS_PYARROW:
+    import pyarrow.parquet as pq
+
+
+# ============================================================
+# market data loader
+# ============================================================
+# load_bars() reads only what a run needs from the monthly files in
+# data_2020_2025/by_dates (503symbols_YYYY-MM.csv, utc timestamps):
+#   - months: only the files overlapping [start, end]
+#   - rows:   symbol / timestamp filters are pushed down to the parquet
+#             reader (row groups and rows outside the range are skipped)
+#   - columns: only the requested columns are decoded
+#
+# nothing is read at import time. iter_days() streams any month range with
+# one month in memory at a time.
+#
+# long-lived processes (backtest workers) can keep what they read in memory
+# instead: after enable_memory_cache(max_months), whole month frames (and
+# derived tables, e.g. the universe) stay in an lru of this process (at most
+# max_months per kind), queries filter them in memory, and a month is read
+# again only when its file changed. the frames are private to the process:
+# processes sharing data should use an mmap store (mmap_store.py) instead.
+#
+#   df_5m = load_bars(symbols=["AAPL", "AMD"], start="2022-05-02", end="2022-05-06")
+#   df_5m = load_bars(start="2022-06-01", columns=["symbol", "close"])
+#   df_5m = load_bars(start="2022-05-01", end="2022-07-31", compact=True)  # see compact.py
+#   for date, symbol_frames in iter_days(start="2022-05-01", end="2022-12-31"): ...
+
+
+# project root (two levels up from this file)
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BY_DATES_DIR = os.path.join(project_root, "data_2020_2025", "by_dates")
+MONTH_FILE_PATTERN = re.compile(r"(\d+)symbols_(\d{4})-(\d{2})\.csv$")
+
+TIMESTAMP_COLUMN = "timestamp"
+
+
+# {month start: filename}, sorted by month
+def get_month_files(data_dir: str = BY_DATES_DIR) -> dict[pd.Timestamp, str]:
+    month_files: dict[pd.Timestamp, str] = {}
+    if not os.path.isdir(data_dir):
+        return month_files
+
+    for filename in os.listdir(data_dir):
+        match = MONTH_FILE_PATTERN.match(filename)
+        if match:
+            month = pd.Timestamp(year=int(match.group(2)), month=int(match.group(3)), day=1)
+            month_files[month] = os.path.join(data_dir, filename)
+
+    return dict(sorted(month_files.items()))
+
+
+# [start, end) bounds. a date-only end ("2022-05-15") includes that whole day
+def get_time_range(start=None, end=None) -> tuple[pd.Timestamp, pd.Timestamp]:
+    start = pd.Timestamp(start) if start is not None else None
+    if end is not None:
+        end = pd.Timestamp(end)
+        end = end + pd.Timedelta(days=1) if end == end.normalize() else end + pd.Timedelta(microseconds=1)
+    return start, end
+
+
+def load_bars(
+        symbols: list[str] = None, # None: all symbols
+        start=None, # first timestamp/date (inclusive), None: from the first month
+        end=None, # last timestamp/date (inclusive), None: to the last month
+        columns: list[str] = None, # e.g. ["symbol", "close"], None: all (timestamp is the index)
+        data_dir: str = BY_DATES_DIR,
+        compact: bool = False, # smaller dtypes, see compact.py (restore_bars() before backtesting)
+    ) -> pd.DataFrame:
+
+    start, end = get_time_range(start, end)
+    symbols = list(symbols) if symbols is not None else None
+
+    # month files overlapping [start, end) (no symbols: nothing to read)
+    filenames = [
+        filename for month, filename in get_month_files(data_dir).items()
+        if (start is None or month + pd.offsets.MonthBegin(1) > start) and (end is None or month < end)
+    ] if symbols != [] else []
+
+    dfs = []
+    for filename in filenames:
+        df = _read_month(filename, symbols, start, end, columns)
+        if len(df):
+            dfs.append(compact_bars(df) if compact else df) # compact each month: lower peak memory
+    if not dfs:
+        return _empty_bars(columns)
+
+    if compact:
+        df = concat_compact(dfs)
+    else:
+        df = pd.concat(dfs) if len(dfs) > 1 else dfs[0]
+    df.sort_index(ascending=True, inplace=True, kind="stable")
+    return df
+
+
+def _read_month(filename: str, symbols: list[str], start: pd.Timestamp, end: pd.Timestamp, columns: list[str]) -> pd.DataFrame:
+    if _memory_max_months:
+        return _filter_month(get_memory_cached(filename, "bars", lambda: read_csv_cached(filename)), symbols, start, end, columns)
+
+    parquet_filename = ensure_cached(filename)
+
+    if parquet_filename is not None:
+        filters = []
+        if symbols is not None:
+            filters.append(("symbol", "in", symbols))
+        if start is not None:
+            filters.append((TIMESTAMP_COLUMN, ">=", start))
+        if end is not None:
+            filters.append((TIMESTAMP_COLUMN, "<", end))
+
+        read_columns = [TIMESTAMP_COLUMN] + list(columns) if columns is not None else None
+        table = pq.read_table(parquet_filename, columns=read_columns, filters=filters or None)
+        return table.to_pandas()
+
+    # without pyarrow: read the whole csv, then filter
+    return _filter_month(read_csv_cached(filename), symbols, start, end, columns)
+
+
+def _filter_month(df: pd.DataFrame, symbols: list[str], start: pd.Timestamp, end: pd.Timestamp, columns: list[str]) -> pd.DataFrame:
+    if symbols is not None:
+        df = df[df["symbol"].isin(symbols)]
+    if start is not None:
+        df = df[df.index >= start]
+    if end is not None:
+        df = df[df.index < end]
+    return df[columns] if columns is not None else df
+
+
+def _empty_bars(columns: list[str]) -> pd.DataFrame:
+    columns = columns if columns is not None else ["symbol", "open", "high", "low", "close", "volume"]
+    return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name=TIMESTAMP_COLUMN))
+
+
+# ----------------------------------------------
+# in-memory month frames (enable_memory_cache)
+
+_memory: dict[str, OrderedDict] = {} # kind -> {filename: ((size, mtime_ns), frame)}, lru order
+_memory_lock = threading.Lock()
+_memory_max_months = 0 # per kind, 0: disabled
+
+
+# keep up to max_months month frames per kind in memory (0: disable, frames are dropped)
+def enable_memory_cache(max_months: int = 12):
+    global _memory_max_months
+    with _memory_lock:
+        _memory_max_months = max_months
+        if not max_months:
+            _memory.clear()
+
+
+# frame of a month file (kind: "bars", "universe", ...), read(): the frame when it's not in memory
+# or the file changed. without enable_memory_cache() it is read every time
+def get_memory_cached(filename: str, kind: str, read: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    if not _memory_max_months:
+        return read()
+
+    stat = os.stat(filename)
+    key = (stat.st_size, stat.st_mtime_ns)
+    with _memory_lock:
+        frames = _memory.setdefault(kind, OrderedDict())
+        cached = frames.get(filename)
+        if cached is not None and cached[0] == key:
+            frames.move_to_end(filename)
+            return cached[1]
+
+    df = read()
+    with _memory_lock:
+        frames[filename] = (key, df)
+        frames.move_to_end(filename)
+        while len(frames) > _memory_max_months:
+            frames.popitem(last=False)
+    return df
+
+
+# read the last `months` month files into memory (enable_memory_cache() first), returns their bytes
+def preload_months(months: int = None, data_dir: str = BY_DATES_DIR) -> int:
+    filenames = list(get_month_files(data_dir).values())
+    if months is not None:
+        filenames = filenames[-months:] if months else []
+    return sum(
+        int(get_memory_cached(filename, "bars", lambda: read_csv_cached(filename)).memory_usage(deep=True).sum())
+        for filename in filenames
+    )
+
+
+# ----------------------------------------------
+# streaming: one month in memory (+ the next one, prefetched in a background thread)
+
+def iter_months(
+        symbols: list[str] = None,
+        start=None,
+        end=None,
+        columns: list[str] = None,
+        data_dir: str = BY_DATES_DIR,
+        compact: bool = False,
+        prefetch: bool = True,
+    ) -> Iterator[tuple[pd.Timestamp, pd.DataFrame]]:
+
+    range_start, range_end = get_time_range(start, end)
+    months = [
+        month for month in get_month_files(data_dir)
+        if (range_start is None or month + pd.offsets.MonthBegin(1) > range_start) and (range_end is None or month < range_end)
+    ]
+
+    def load_month(month: pd.Timestamp) -> pd.DataFrame:
+        month_start = max(month, range_start) if range_start is not None else month
+        month_end = month + pd.offsets.MonthBegin(1) - pd.Timedelta(microseconds=1)
+        if range_end is not None:
+            month_end = min(month_end, range_end - pd.Timedelta(microseconds=1))
+        return load_bars(symbols, month_start, month_end, columns, data_dir, compact)
+
+    if not prefetch:
+        for month in months:
+            yield month, load_month(month)
+        return
+
+    # parquet reads release the gil: the next month loads while the caller works on this one
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(load_month, months[0]) if months else None
+        for k, month in enumerate(months):
+            df = future.result()
+            future = executor.submit(load_month, months[k + 1]) if k + 1 < len(months) else None
+            yield month, df
+            del df # drop our reference before waiting for the next month
+
+
+# (date, {symbol: that day's bars}) across any month range, in date order
+def iter_days(
+        symbols: list[str] = None,
+        start=None,
+        end=None,
+        columns: list[str] = None,
+        data_dir: str = BY_DATES_DIR,
+        compact: bool = False,
+        prefetch: bool = True,
+        on_month: Callable[[pd.Timestamp, pd.DataFrame], None] = None, # called per loaded month (e.g. memory report)
+        transform: Callable[[pd.DataFrame], pd.DataFrame] = None, # applied per loaded month (e.g. quality.repair_bars)
+    ) -> Iterator[tuple[pd.Timestamp, dict[str, pd.DataFrame]]]:
+
+    for month, df_month in iter_months(symbols, start, end, columns, data_dir, compact, prefetch):
+        if transform:
+            df_month = transform(df_month)
+        if not len(df_month):
+            continue
+        if on_month:
+            on_month(month, df_month)
+
+        # contiguous day slices (index is sorted), then one frame per symbol
+        days = df_month.index.normalize()
+        bounds = np.flatnonzero(days[1:] != days[:-1]) + 1
+        for i, j in zip(np.r_[0, bounds], np.r_[bounds, len(df_month)]):
+            df_date = df_month.iloc[i:j]
+            yield days[i], {s: df_symbol for s, df_symbol in df_date.groupby("symbol", sort=False, observed=True)}
+
+
+# ----------------------------------------------
+# small queries (only the needed columns are read)
+
+def get_dates(symbols: list[str] = None, start=None, end=None, data_dir: str = BY_DATES_DIR) -> list[pd.Timestamp]:
+    df = load_bars(symbols=symbols, start=start, end=end, columns=["symbol"], data_dir=data_dir)
+    return list(df.index.normalize().unique())
+
+
+def get_symbols(start=None, end=None, data_dir: str = BY_DATES_DIR) -> list[str]:
+    df = load_bars(start=start, end=end, columns=["symbol"], data_dir=data_dir)
+    return list(df["symbol"].unique())
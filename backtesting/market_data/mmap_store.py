@@ -0,0 +1,403 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time as tm
+import numpy as np
+import pandas as pd
+
+from backtesting.market_data.universe import STORE_UNIVERSE_COLUMNS, merge_store_universe_rows, to_store_universe
+
+
+# ============================================================
+# memory-mapped ohlcv store
+# ============================================================
+# one fixed-dtype array file per (symbol, field), sorted by timestamp:
+#   <store_dir>/index.json
+#   <store_dir>/AAPL/timestamp.bin   int64, epoch nanoseconds (utc)
+#   <store_dir>/AAPL/open.bin        float64 or float32 (store price_dtype)
+#   <store_dir>/AAPL/high.bin ... close.bin, volume.bin
+#   <store_dir>/AAPL/days.bin        int64 pairs (day epoch ns, first row of the day): (date, symbol) index
+#   <store_dir>/AAPL/universe.bin    float64 rows of daily stats (universe.py), computed by build/ingest
+#
+# arrays are opened read-only with np.memmap: processes reading the same
+# store share the os page cache, nothing is parsed or copied per worker.
+#
+# index.json holds the row count per symbol and is the only thing readers
+# trust: it is replaced atomically, and rows beyond a symbol's row count
+# (e.g. half-written by an ingest) are never mapped.
+#
+# ingest appends new months in place: array files are only appended to (rows
+# beyond the committed count are truncated first), then index.json is
+# replaced. readers that have the store open keep seeing the old rows until
+# they refresh(), the cost is proportional to the new bars only, and bars at
+# or before a symbol's last stored timestamp are rejected (no overlaps). the
+# daily universe stats of the new bars are appended the same way: a day
+# continued by the new bars gets a new row (its stored row merged with the new
+# bars' one) after the stored one, readers take the last row of each day.
+# committed bytes are never modified.
+#
+#   store = MmapStore("data_2020_2025/mmap")
+#   arrays = store.get_arrays("AAPL", "2022-05-02", "2022-05-06")  # memmap slices
+#   df = store.get_df("AAPL", "2022-05-02", "2022-05-06")          # pandas view, no copy
+#   store = open_store("data_2020_2025/mmap")  # long-lived processes: one open store per dir
+#
+# build from the by_dates month files, then append each new month:
+#   python -m backtesting.market_data.mmap_store build data_2020_2025/mmap --start 2022-05-01 --end 2022-06-30
+#   python -m backtesting.market_data.mmap_store ingest data_2020_2025/mmap data_2020_2025/by_dates/503symbols_2022-07.csv
+
+
+STORE_VERSION = 3 # 2: days.bin (date, symbol) index, ingest. 3: universe.bin
+INDEX_FILENAME = "index.json"
+LOCK_FILENAME = ".ingest.lock"
+
+TIMESTAMP_DTYPE = "int64"
+PRICE_FIELDS = ["open", "high", "low", "close"]
+FIELDS = PRICE_FIELDS + ["volume"]
+DAYS_FIELD = "days"
+UNIVERSE_FIELD = "universe"
+
+NS_PER_DAY = 86400 * 10**9
+
+
+def get_array_filename(store_dir: str, symbol: str, field: str) -> str:
+    return os.path.join(store_dir, symbol, f"{field}.bin")
+
+
+def read_index(store_dir: str) -> dict:
+    with open(os.path.join(store_dir, INDEX_FILENAME), "r", encoding="UTF8") as f:
+        return json.load(f)
+
+
+def write_index(store_dir: str, index: dict):
+    filename = os.path.join(store_dir, INDEX_FILENAME)
+    tmp_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_filename, "w", encoding="UTF8") as f:
+        json.dump(index, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+# epoch nanoseconds <-> timestamps (naive utc, like the csv files)
+def to_epoch_ns(values) -> np.ndarray:
+    return pd.DatetimeIndex(values).as_unit("ns").asi8
+
+
+def to_timestamp(epoch_ns: int) -> pd.Timestamp:
+    return pd.Timestamp(int(epoch_ns), unit="ns")
+
+
+# (day epoch ns, first row) per day of sorted timestamps, rows counted from row_offset
+def get_day_index(epoch_ns: np.ndarray, row_offset: int = 0) -> np.ndarray:
+    days = epoch_ns - epoch_ns % NS_PER_DAY
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if len(days) else np.empty(0, dtype=np.int64)
+    return np.column_stack([days[starts], starts + row_offset]).astype(np.int64)
+
+
+
+
+class MmapStore:
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.index = read_index(store_dir)
+        self.price_dtype = np.dtype(self.index["price_dtype"])
+        self._arrays: dict[tuple[str, str], np.memmap] = {} # (symbol, field) -> memmap
+
+
+    @property
+    def symbols(self) -> list[str]:
+        return list(self.index["symbols"])
+
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index["symbols"]
+
+
+    # reload index.json (sees symbols/rows committed since the store was opened)
+    def refresh(self):
+        self.index = read_index(self.store_dir)
+        self._arrays.clear()
+
+
+    def get_rows(self, symbol: str) -> int:
+        return self.index["symbols"][symbol]["rows"]
+
+
+    def _get_array(self, symbol: str, field: str) -> np.ndarray:
+        key = (symbol, field)
+        if key not in self._arrays:
+            rows = self.get_rows(symbol)
+            dtype = TIMESTAMP_DTYPE if field == "timestamp" else self.price_dtype
+            if rows:
+                self._arrays[key] = np.memmap(get_array_filename(self.store_dir, symbol, field), dtype=dtype, mode="r", shape=(rows,))
+            else:
+                self._arrays[key] = np.empty(0, dtype=dtype)
+        return self._arrays[key]
+
+
+    # row range [i, j) of a symbol's bars in [start, end] (date-only end: whole day)
+    def get_row_range(self, symbol: str, start=None, end=None) -> tuple[int, int]:
+        ts = self._get_array(symbol, "timestamp")
+        i = int(np.searchsorted(ts, to_epoch_ns([pd.Timestamp(start)])[0], "left")) if start is not None else 0
+        if end is None:
+            return i, len(ts)
+
+        end = pd.Timestamp(end)
+        if end == end.normalize():
+            j = int(np.searchsorted(ts, to_epoch_ns([end + pd.Timedelta(days=1)])[0], "left"))
+        else:
+            j = int(np.searchsorted(ts, to_epoch_ns([end])[0], "right"))
+        return i, max(i, j)
+
+
+    # {field: read-only memmap slice}, fields: "timestamp" + FIELDS
+    def get_arrays(self, symbol: str, start=None, end=None, fields: list[str] = None) -> dict[str, np.ndarray]:
+        i, j = self.get_row_range(symbol, start, end)
+        fields = fields if fields is not None else ["timestamp"] + FIELDS
+        return {field: self._get_array(symbol, field)[i:j] for field in fields}
+
+
+    # pandas view over the memmap slices (same columns as the csv files, timestamp index)
+    def get_df(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        arrays = self.get_arrays(symbol, start, end)
+        index = pd.DatetimeIndex(arrays.pop("timestamp").view("datetime64[ns]"), name="timestamp")
+        df = pd.DataFrame(arrays, index=index, copy=False)
+        df.insert(0, "symbol", symbol)
+        return df
+
+
+    # several symbols in one frame, sorted by timestamp (like a by_dates month file slice)
+    def get_multi_df(self, symbols: list[str] = None, start=None, end=None) -> pd.DataFrame:
+        symbols = [s for s in (symbols if symbols is not None else self.symbols) if s in self]
+        dfs = [self.get_df(s, start, end) for s in symbols]
+        dfs = [df for df in dfs if len(df)]
+        if not dfs:
+            return pd.DataFrame(columns=["symbol"] + FIELDS, index=pd.DatetimeIndex([], name="timestamp"))
+        return pd.concat(dfs).sort_index(kind="stable")
+
+
+    # (day epoch ns, first row) pairs of a symbol, None for stores without days.bin (version 1)
+    def get_day_index(self, symbol: str) -> np.ndarray:
+        days = self.index["symbols"][symbol].get("days")
+        if days is None:
+            return None
+        key = (symbol, DAYS_FIELD)
+        if key not in self._arrays:
+            if days:
+                self._arrays[key] = np.memmap(get_array_filename(self.store_dir, symbol, DAYS_FIELD), dtype=TIMESTAMP_DTYPE, mode="r", shape=(days, 2))
+            else:
+                self._arrays[key] = np.empty((0, 2), dtype=TIMESTAMP_DTYPE)
+        return self._arrays[key]
+
+
+    # universe.bin rows of a symbol (STORE_UNIVERSE_COLUMNS, a continued day has several rows:
+    # the last one is current), see universe.load_store_universe()
+    def get_universe_array(self, symbol: str) -> np.ndarray:
+        rows = self.index["symbols"][symbol].get(UNIVERSE_FIELD)
+        if rows is None:
+            raise ValueError(f"{self.store_dir}: store version {self.index.get('version', 1)} has no universe, rebuild it")
+        key = (symbol, UNIVERSE_FIELD)
+        if key not in self._arrays:
+            shape = (rows, len(STORE_UNIVERSE_COLUMNS))
+            if rows:
+                self._arrays[key] = np.memmap(get_array_filename(self.store_dir, symbol, UNIVERSE_FIELD), dtype=np.float64, mode="r", shape=shape)
+            else:
+                self._arrays[key] = np.empty(shape, dtype=np.float64)
+        return self._arrays[key]
+
+
+    # trading days of a symbol (normalized timestamps)
+    def get_dates(self, symbol: str) -> list[pd.Timestamp]:
+        day_index = self.get_day_index(symbol)
+        if day_index is not None:
+            days = np.asarray(day_index[:, 0])
+        else:
+            ts = self._get_array(symbol, "timestamp")
+            days = np.unique(ts - ts % NS_PER_DAY)
+        return list(pd.DatetimeIndex(days.view("datetime64[ns]")))
+
+
+
+
+_open_stores: dict[str, tuple[int, MmapStore]] = {} # store dir -> (index.json mtime_ns, store)
+
+
+# the store of a dir, opened once per process (mapped arrays are reused by the next runs),
+# refreshed when index.json changed (an ingest committed new rows)
+def open_store(store_dir: str) -> MmapStore:
+    store_dir = os.path.abspath(store_dir)
+    mtime_ns = os.stat(os.path.join(store_dir, INDEX_FILENAME)).st_mtime_ns
+    opened = _open_stores.get(store_dir)
+    if opened is None:
+        store = MmapStore(store_dir)
+    else:
+        store = opened[1]
+        if opened[0] != mtime_ns:
+            store.refresh()
+    _open_stores[store_dir] = (mtime_ns, store)
+    return store
+
+
+
+
+# ----------------------------------------------
+# build
+
+# write (info None) or append (info: the symbol's committed index entry) a symbol's bars, returns its new index entry
+def write_symbol(store_dir: str, symbol: str, df: pd.DataFrame, price_dtype: str = "float64", info: dict = None) -> dict:
+    df = df.sort_index(kind="stable")
+    os.makedirs(os.path.join(store_dir, symbol), exist_ok=True)
+
+    rows = info["rows"] if info else 0
+    days = info.get("days", 0) if info else 0
+    epoch_ns = to_epoch_ns(df.index).astype(TIMESTAMP_DTYPE)
+    day_index = get_day_index(epoch_ns, rows)
+    if days and len(day_index) and to_epoch_ns([pd.Timestamp(info["last"])])[0] // NS_PER_DAY == day_index[0, 0] // NS_PER_DAY:
+        day_index = day_index[1:] # the day continues from the stored rows
+
+    # daily universe stats. a continued day: its stored row merged with the new bars' one,
+    # appended as a new row (the stored row stays as committed, readers take the last one)
+    universe_rows = info.get(UNIVERSE_FIELD, 0) if info else 0
+    universe = to_store_universe(df)
+    if universe_rows and len(universe):
+        width = len(STORE_UNIVERSE_COLUMNS)
+        filename = get_array_filename(store_dir, symbol, UNIVERSE_FIELD)
+        stored = np.fromfile(filename, dtype=np.float64, count=width, offset=(universe_rows - 1) * width * 8)
+        if stored[0] == universe[0, 0]:
+            universe[0] = merge_store_universe_rows(stored, universe[0])
+
+    arrays = {"timestamp": (epoch_ns, rows), DAYS_FIELD: (day_index, days), UNIVERSE_FIELD: (universe, universe_rows)}
+    for field in FIELDS:
+        arrays[field] = (df[field].to_numpy(dtype=price_dtype), rows)
+    for field, (values, committed) in arrays.items():
+        _append_array(get_array_filename(store_dir, symbol, field), values, committed)
+
+    return {
+        "rows": rows + len(df),
+        "days": days + len(day_index),
+        UNIVERSE_FIELD: universe_rows + len(universe),
+        "first": info["first"] if info else (f"{df.index[0]}" if len(df) else None),
+        "last": f"{df.index[-1]}" if len(df) else info["last"] if info else None,
+    }
+
+
+# append values after the first `committed` items of an array file (drops any uncommitted tail)
+def _append_array(filename: str, values: np.ndarray, committed: int):
+    with open(filename, "r+b" if committed else "wb") as f:
+        f.truncate(committed * values.itemsize * (values.shape[1] if values.ndim > 1 else 1))
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(values).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# (re)build a store from a multi-symbol frame (timestamp index, "symbol" column)
+def build_store(store_dir: str, df: pd.DataFrame, price_dtype: str = "float64") -> dict:
+    if os.path.exists(store_dir):
+        shutil.rmtree(store_dir)
+    os.makedirs(store_dir)
+
+    index = {
+        "version": STORE_VERSION,
+        "timestamp": "int64 epoch ns (utc)",
+        "price_dtype": np.dtype(price_dtype).name,
+        "fields": FIELDS,
+        "symbols": {},
+    }
+    for symbol, df_symbol in df.groupby("symbol", sort=True, observed=True):
+        index["symbols"][symbol] = write_symbol(store_dir, symbol, df_symbol, price_dtype)
+
+    write_index(store_dir, index)
+    return index
+
+
+# append bars of a multi-symbol frame (e.g. a new month file) to an existing store
+def ingest(store_dir: str, df: pd.DataFrame) -> dict:
+    lock_filename = os.path.join(store_dir, LOCK_FILENAME)
+    try:
+        lock = os.open(lock_filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        raise RuntimeError(f"{store_dir}: another ingest is running (remove {lock_filename} if it crashed)")
+
+    try:
+        index = read_index(store_dir)
+        if index.get("version", 1) < STORE_VERSION:
+            raise ValueError(f"{store_dir}: store version {index.get('version', 1)} has no day index / universe, rebuild it")
+
+        frames = {symbol: df_symbol.sort_index(kind="stable") for symbol, df_symbol in df.groupby("symbol", sort=True, observed=True)}
+
+        # validate everything before writing anything
+        for symbol, df_symbol in frames.items():
+            if df_symbol.index.has_duplicates:
+                raise ValueError(f"{symbol}: duplicate timestamps in the new bars")
+            info = index["symbols"].get(symbol)
+            if info and info["rows"] and df_symbol.index[0] <= pd.Timestamp(info["last"]):
+                raise ValueError(f"{symbol}: new bars from [{df_symbol.index[0]}] overlap the store (last bar [{info['last']}])")
+
+        for symbol, df_symbol in frames.items():
+            index["symbols"][symbol] = write_symbol(store_dir, symbol, df_symbol, index["price_dtype"], index["symbols"].get(symbol))
+        index["symbols"] = dict(sorted(index["symbols"].items()))
+
+        write_index(store_dir, index) # commit: readers see the new rows after refresh()
+        return index
+    finally:
+        os.close(lock)
+        os.remove(lock_filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped ohlcv store.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='build a store from the by_dates month files')
+    build_parser.add_argument('store_dir')
+    build_parser.add_argument('--symbols', nargs='+', metavar='SYMBOL')
+    build_parser.add_argument('--start', metavar='YYYY-MM-DD')
+    build_parser.add_argument('--end', metavar='YYYY-MM-DD')
+    build_parser.add_argument('--float32', action='store_true', help='store prices and volume as float32 (half the size)')
+
+    ingest_parser = subparsers.add_parser('ingest', help='append new month files to an existing store')
+    ingest_parser.add_argument('store_dir')
+    ingest_parser.add_argument('filenames', nargs='+', metavar='FILE', help='by_dates month csv files, in date order')
+
+    info_parser = subparsers.add_parser('info', help='print symbols and row counts')
+    info_parser.add_argument('store_dir')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        from backtesting.market_data.loader import load_bars
+
+        start_time = tm.time()
+        df = load_bars(symbols=args.symbols, start=args.start, end=args.end)
+        index = build_store(args.store_dir, df, price_dtype="float32" if args.float32 else "float64")
+        print(f"{args.store_dir}: {len(index['symbols'])} symbols, {len(df)} rows ({round(tm.time() - start_time, 2)}s)")
+
+    elif args.command == 'ingest':
+        from backtesting.market_data.columnar_cache import read_csv_cached
+
+        for filename in args.filenames:
+            start_time = tm.time()
+            df = read_csv_cached(filename)
+            try:
+                index = ingest(args.store_dir, df)
+            except (ValueError, RuntimeError) as e:
+                print(f"{filename}: rejected, {e}")
+                sys.exit(1)
+            print(f"{filename}: {len(df)} rows appended, {len(index['symbols'])} symbols ({round(tm.time() - start_time, 2)}s)")
+
+    elif args.command == 'info':
+        index = read_index(args.store_dir)
+        print(f"{args.store_dir}: version {index['version']}, price dtype {index['price_dtype']}, {len(index['symbols'])} symbols")
+        for symbol, info in index["symbols"].items():
+            days = f", {info['days']} days" if "days" in info else ""
+            print(f"    {symbol}: {info['rows']} rows{days}, [{info['first']}] to [{info['last']}]")
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
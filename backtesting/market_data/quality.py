@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from datetime import time
+
+
+# ============================================================
+# 5m bars data quality
+# ============================================================
+# vectorized checks per (symbol, session date), over any number of symbols:
+#   missing      expected 5m slots of the session without a bar
+#   nan_bars     rows with no prices (placeholders for missing bars)
+#   duplicates   repeated (symbol, timestamp) rows
+#   out_of_session  bars outside the session calendar
+#   zero_volume_runs / zero_volume_bars  runs of >= n consecutive zero-volume bars (halts)
+#   ohlc_errors  high below open/close/low, low above open/close/high, prices <= 0
+#   negative_volume
+#
+# and configurable repairs, replacing the blind df.ffill() of the loaders:
+#   nan bars and duplicates are dropped, ohlc is made consistent, negative
+#   volume is zeroed, and missing slots between the first and last bar of a
+#   session are filled with flat bars at the previous close (volume 0).
+#
+# session calendar (utc): the data has a fixed utc grid from 11:00 to 03:00
+# (next day) all year round. a bar belongs to the session date it starts in,
+# so after-hours bars past midnight count for the previous date.
+#
+#   report = check_bars(df_5m)
+#   df_5m, report = repair_bars(df_5m)
+#   print_quality_report(report)
+
+
+@dataclass
+class QualityConfig:
+    session_start: time = time(11, 0) # utc
+    session_end: time = time(3, 0) # utc, <= session_start: next day
+    freq_minutes: int = 5
+    zero_volume_run: int = 3 # report runs of at least n consecutive zero-volume bars
+
+    # repairs
+    drop_nan_bars: bool = True
+    drop_duplicates: str = "first" # keep "first"/"last" row, None: keep all
+    fix_ohlc: bool = True # high = max(o, h, l, c), low = min(o, h, l, c)
+    fix_negative_volume: bool = True # set to 0
+    fill_missing: str = "inside" # "inside": flat bars between the first and last bar of a session, None: no fill
+
+    price_columns: list[str] = field(default_factory=lambda: ["open", "high", "low", "close"])
+
+
+REPORT_COLUMNS = [
+    "bars", "expected", "missing", "nan_bars", "duplicates", "out_of_session",
+    "zero_volume_runs", "zero_volume_bars", "ohlc_errors", "negative_volume",
+]
+
+
+def _session_minutes(config: QualityConfig) -> tuple[int, int]:
+    start = config.session_start.hour * 60 + config.session_start.minute
+    end = config.session_end.hour * 60 + config.session_end.minute
+    length = end - start if end > start else end + 24 * 60 - start
+    return start, length
+
+
+# session date and minute offset in the session, per bar
+def get_session_slots(index: pd.DatetimeIndex, config: QualityConfig) -> tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
+    start, length = _session_minutes(config)
+    shifted = index - pd.Timedelta(minutes=start)
+    session_dates = shifted.normalize()
+    offsets = ((shifted - session_dates) // pd.Timedelta(minutes=1)).values.astype(np.int64)
+    in_session = (offsets < length) & (offsets % config.freq_minutes == 0)
+    return session_dates, offsets, in_session
+
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    # working frame: timestamp column, symbol column, rows sorted by (symbol, timestamp)
+    df = df.reset_index()
+    df = df.rename(columns={df.columns[0]: "timestamp"})
+    if "symbol" not in df.columns:
+        df["symbol"] = ""
+    return df.sort_values(["symbol", "timestamp"], kind="stable", ignore_index=True)
+
+
+def _get_flags(df: pd.DataFrame, config: QualityConfig) -> pd.DataFrame:
+    prices = df[config.price_columns].to_numpy(dtype=np.float64)
+    o, h, l, c = (prices[:, i] for i in range(4))
+    volume = df["volume"].to_numpy(dtype=np.float64)
+
+    nan_bars = np.isnan(prices).all(axis=1)
+    duplicates = df.duplicated(["symbol", "timestamp"], keep="first").to_numpy()
+    session_dates, offsets, in_session = get_session_slots(pd.DatetimeIndex(df["timestamp"]), config)
+
+    with np.errstate(invalid="ignore"):
+        ohlc_errors = ~nan_bars & (
+            (h < np.fmax(np.fmax(o, c), l)) | (l > np.fmin(np.fmin(o, c), h)) | (np.nanmin(prices, axis=1, initial=np.inf) <= 0)
+        )
+        negative_volume = volume < 0
+        zero_volume = (volume == 0) & ~nan_bars
+
+    # runs of consecutive zero-volume bars (per symbol)
+    symbol_codes = pd.factorize(df["symbol"])[0]
+    run_break = np.r_[True, (symbol_codes[1:] != symbol_codes[:-1]) | ~zero_volume[:-1] | ~zero_volume[1:]]
+    run_ids = np.cumsum(run_break)
+    run_lengths = np.bincount(run_ids, weights=zero_volume.astype(np.float64))[run_ids]
+    in_zero_run = zero_volume & (run_lengths >= config.zero_volume_run)
+    zero_run_start = in_zero_run & run_break
+
+    return pd.DataFrame({
+        "symbol": df["symbol"].to_numpy(),
+        "date": session_dates,
+        "offset": offsets,
+        "valid": ~nan_bars & ~duplicates & in_session,
+        "nan_bars": nan_bars,
+        "duplicates": duplicates,
+        "out_of_session": ~nan_bars & ~in_session,
+        "zero_volume_runs": zero_run_start,
+        "zero_volume_bars": in_zero_run,
+        "ohlc_errors": ohlc_errors,
+        "negative_volume": negative_volume,
+    })
+
+
+def _get_report(flags: pd.DataFrame, config: QualityConfig) -> pd.DataFrame:
+    _, length = _session_minutes(config)
+    report = flags.groupby(["symbol", "date"], sort=True, observed=True).agg(
+        bars=("valid", "sum"),
+        nan_bars=("nan_bars", "sum"),
+        duplicates=("duplicates", "sum"),
+        out_of_session=("out_of_session", "sum"),
+        zero_volume_runs=("zero_volume_runs", "sum"),
+        zero_volume_bars=("zero_volume_bars", "sum"),
+        ohlc_errors=("ohlc_errors", "sum"),
+        negative_volume=("negative_volume", "sum"),
+    )
+    report["expected"] = length // config.freq_minutes
+    report["missing"] = report["expected"] - report["bars"]
+    return report[REPORT_COLUMNS].astype(np.int64)
+
+
+# report per (symbol, session date), nothing is changed
+def check_bars(df: pd.DataFrame, config: QualityConfig = None) -> pd.DataFrame:
+    config = config or QualityConfig()
+    return _get_report(_get_flags(_prepare(df), config), config)
+
+
+# repaired bars (same layout as df, sorted by timestamp) + report of the input
+def repair_bars(df: pd.DataFrame, config: QualityConfig = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    config = config or QualityConfig()
+    index_name = df.index.name or "timestamp"
+    columns = list(df.columns)
+
+    work = _prepare(df)
+    flags = _get_flags(work, config)
+    report = _get_report(flags, config)
+
+    keep = np.ones(len(work), dtype=bool)
+    if config.drop_nan_bars:
+        keep &= ~flags["nan_bars"].to_numpy()
+    if config.drop_duplicates:
+        keep &= ~work.duplicated(["symbol", "timestamp"], keep=config.drop_duplicates).to_numpy()
+    work = work[keep]
+
+    if config.fix_ohlc:
+        prices = work[config.price_columns].to_numpy(dtype=np.float64)
+        work = work.assign(high=np.fmax.reduce(prices, axis=1), low=np.fmin.reduce(prices, axis=1))
+    if config.fix_negative_volume:
+        work = work.assign(volume=work["volume"].clip(lower=0))
+
+    if config.fill_missing == "inside":
+        work = _fill_inside(work, config)
+    elif config.fill_missing is not None:
+        raise ValueError(f"invalid fill_missing '{config.fill_missing}', expected 'inside' or None")
+
+    work = work.sort_values("timestamp", kind="stable").set_index("timestamp")
+    work.index.name = index_name
+    work = work[columns]
+
+    # keep the input dtypes (e.g. compact frames, see compact.py) where the repaired values fit
+    for column, dtype in df.dtypes.items():
+        if work[column].dtype != dtype:
+            try:
+                work[column] = work[column].astype(dtype)
+            except (ValueError, TypeError):
+                pass
+    work.attrs = dict(df.attrs)
+    return work, report
+
+
+# flat bars (o=h=l=c=previous close, volume 0) for missing slots between the
+# first and last bar of each (symbol, session date)
+def _fill_inside(work: pd.DataFrame, config: QualityConfig) -> pd.DataFrame:
+    timestamps = pd.DatetimeIndex(work["timestamp"])
+    session_dates, offsets, in_session = get_session_slots(timestamps, config)
+
+    # rows are sorted by (symbol, timestamp): a group continues while symbol and session date stay the same
+    symbol_codes = pd.factorize(work["symbol"])[0]
+    dates = session_dates.asi8
+    same_group = np.r_[False, (symbol_codes[1:] == symbol_codes[:-1]) & (dates[1:] == dates[:-1])]
+    same_group &= in_session & np.r_[False, in_session[:-1]] # gaps only between in-session bars
+    step = config.freq_minutes
+    gaps = np.where(same_group, (offsets - np.r_[0, offsets[:-1]]) // step - 1, 0)
+    gaps = np.maximum(gaps, 0)
+
+    n_fill = int(gaps.sum())
+    if not n_fill:
+        return work
+
+    # row i gets gaps[i] bars before it, at previous timestamp + k*step, price = previous close
+    rows = np.repeat(np.arange(len(work)), gaps)
+    k = np.arange(n_fill) - np.repeat(np.cumsum(gaps) - gaps, gaps) + 1
+    prev_timestamps = timestamps.values[rows - 1]
+    prev_close = work["close"].to_numpy(dtype=np.float64)[rows - 1]
+
+    filled = pd.DataFrame({
+        "timestamp": prev_timestamps + (k * step).astype("timedelta64[m]"),
+        "symbol": work["symbol"].to_numpy()[rows],
+    })
+    for column in config.price_columns:
+        filled[column] = prev_close
+    filled["volume"] = 0.0
+    for column in work.columns:
+        if column not in filled.columns:
+            filled[column] = work[column].to_numpy()[rows - 1] # other columns: carried forward
+
+    return pd.concat([work, filled[work.columns]], ignore_index=True).sort_values(["symbol", "timestamp"], kind="stable", ignore_index=True)
+
+
+def print_quality_report(report: pd.DataFrame, max_rows: int = 20):
+    problems = report[(report.drop(columns=["bars", "expected"]) > 0).any(axis=1)]
+    totals = report.drop(columns=["expected"]).sum()
+    print(f"data quality: {report.index.get_level_values('symbol').nunique()} symbols, {len(report)} (symbol, date) sessions, "
+          f"{len(problems)} with issues")
+    print("    " + ", ".join(f"{c}: {int(totals[c])}" for c in totals.index))
+    if len(problems):
+        print(problems.head(max_rows).to_string())
+        if len(problems) > max_rows:
+            print(f"    ... {len(problems) - max_rows} more")
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import logging
+import random
+import time as tm
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# live quotes
+# ============================================================
+# QuoteFetcher serves quotes (api format, see QUOTE_FIELDS) of a provider
+# from a short ttl cache, without ever blocking the event loop:
+#   fresh   (age < ttl)               served from the cache
+#   stale   (age < ttl + stale_ttl)   served from the cache, refreshed in the background
+#   missing / expired                 fetched, all the symbols of a call at once
+# a symbol is fetched by one request at a time (calls asking for a symbol
+# being fetched wait for that request), and every request has its own
+# timeout: a slow or failing upstream costs its own quote only, which falls
+# back to the last known quote (flagged stale) or an empty quote (flagged error).
+#
+# providers:
+#   FinnhubQuoteProvider   finnhub.io /quote, one pooled keep-alive http client.
+#                          without an api key it is unavailable: every quote is
+#                          an empty quote flagged error, nothing is requested
+#   LocalQuoteProvider     offline stand-in: generated quotes with a set
+#                          latency / failure rate (tests, benchmarks), only
+#                          when asked for by name, its quotes are flagged synthetic
+#
+#   quotes = QuoteFetcher(FinnhubQuoteProvider(api_key), ttl=15)
+#   await quotes.get_quotes(["SPY", "QQQ", "DIA"])   # [{"symbol", "price", "change", ...}]
+#   await quotes.close()
+
+
+# provider quote field -> api field
+QUOTE_FIELDS = {
+    "c": "price",
+    "d": "change",
+    "dp": "changesPercentage",
+    "o": "open",
+    "h": "high",
+    "l": "low",
+    "pc": "previousClose",
+    "t": "timestamp",
+}
+
+FINNHUB_URL = "https://finnhub.io/api/v1"
+DEFAULT_TIMEOUT = 3.0 # s, per upstream request
+DEFAULT_TTL = 15.0 # s
+DEFAULT_STALE_TTL = 300.0 # s
+
+
+# ----------------------------------------------
+# providers
+
+class QuoteProvider:
+
+    name = "base"
+    timeout = DEFAULT_TIMEOUT
+    available = True # False: not configured, no quotes (not fetched)
+    synthetic = False # True: generated quotes, not market prices
+
+    # quote of a symbol (api fields), raises on failure
+    async def fetch(self, symbol: str) -> dict:
+        raise NotImplementedError
+
+
+    async def close(self):
+        pass
+
+
+
+
+class FinnhubQuoteProvider(QuoteProvider):
+
+    name = "finnhub"
+
+    def __init__(self, api_key: str, base_url: str = FINNHUB_URL, timeout: float = DEFAULT_TIMEOUT, max_connections: int = 10):
+        self.api_key = api_key
+        self.available = bool(api_key)
+        self.timeout = timeout
+        # one client for all requests: connections (and tls sessions) are reused
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+
+    async def fetch(self, symbol: str) -> dict:
+        response = await self.client.get("/quote", params={"symbol": symbol, "token": self.api_key})
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("t"): # finnhub answers unknown symbols with an all-zero quote
+            raise ValueError(f"no quote for {symbol}")
+        return {field: data.get(key, 0) for key, field in QUOTE_FIELDS.items()}
+
+
+    async def close(self):
+        await self.client.aclose()
+
+
+
+
+class LocalQuoteProvider(QuoteProvider):
+
+    name = "local"
+    synthetic = True
+
+    # quotes: fixed quotes per symbol (api fields), else generated (a small random walk per symbol)
+    def __init__(self, quotes: dict[str, dict] = None, latency: float = 0.0, failure_rate: float = 0.0, timeout: float = DEFAULT_TIMEOUT, seed: int = None):
+        self.quotes = quotes or {}
+        self.latency = latency # s, per request
+        self.failure_rate = failure_rate
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._prices: dict[str, list] = {} # symbol -> [previous close, price]
+
+
+    async def fetch(self, symbol: str) -> dict:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.random.random() < self.failure_rate:
+            raise ConnectionError(f"local quote provider: {symbol} failed")
+        if symbol in self.quotes:
+            return dict(self.quotes[symbol])
+
+        if symbol not in self._prices:
+            # a stable start price per symbol
+            base = 50 + int(hashlib.sha256(symbol.encode()).hexdigest()[:4], 16) % 450
+            self._prices[symbol] = [float(base), float(base)]
+        previous_close, price = self._prices[symbol]
+        price = round(price * (1 + self.random.gauss(0, 0.001)), 2)
+        self._prices[symbol][1] = price
+        return {
+            "price": price,
+            "change": round(price - previous_close, 2),
+            "changesPercentage": round(100 * (price - previous_close) / previous_close, 4),
+            "open": previous_close,
+            "high": max(price, previous_close),
+            "low": min(price, previous_close),
+            "previousClose": previous_close,
+            "timestamp": int(tm.time()),
+        }
+
+
+
+
+# ----------------------------------------------
+# cached fetcher
+
+class QuoteFetcher:
+
+    def __init__(self, provider: QuoteProvider, ttl: float = DEFAULT_TTL, stale_ttl: float = DEFAULT_STALE_TTL):
+        self.provider = provider
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._cache: dict[str, tuple[float, dict]] = {} # symbol -> (fetched at, quote)
+        self._fetches: dict[str, asyncio.Task] = {} # symbol -> running fetch
+
+
+    # quotes of symbols, in order ("stale": served from an older fetch, "error": no quote at all,
+    # "synthetic": generated by a stand-in provider)
+    async def get_quotes(self, symbols: list[str]) -> list[dict]:
+        if not self.provider.available:
+            return [self._get_quote(symbol) for symbol in symbols]
+
+        now = tm.monotonic()
+        waiting = {}
+        for symbol in symbols:
+            fetched_at, _ = self._cache.get(symbol, (None, None))
+            age = now - fetched_at if fetched_at is not None else None
+            if age is not None and age < self.ttl:
+                continue
+            fetch = self._fetch(symbol)
+            if age is None or age >= self.ttl + self.stale_ttl:
+                waiting[symbol] = fetch # stale ones refresh in the background
+
+        if waiting:
+            await asyncio.gather(*waiting.values(), return_exceptions=True)
+        return [self._get_quote(symbol) for symbol in symbols]
+
+
+    # the running fetch of a symbol, or a new one
+    def _fetch(self, symbol: str) -> asyncio.Task:
+        task = self._fetches.get(symbol)
+        if task is None:
+            task = asyncio.create_task(self._refresh(symbol))
+            self._fetches[symbol] = task
+            task.add_done_callback(lambda _: self._fetches.pop(symbol, None))
+        return task
+
+
+    async def _refresh(self, symbol: str):
+        try:
+            quote = await asyncio.wait_for(self.provider.fetch(symbol), timeout=self.provider.timeout)
+        except Exception as e:
+            logger.error(f"Error fetching {symbol} quote from {self.provider.name}: {e!r}")
+            return
+        self._cache[symbol] = (tm.monotonic(), quote)
+
+
+    def _get_quote(self, symbol: str) -> dict:
+        if symbol not in self._cache:
+            return {"symbol": symbol, **{field: 0 for field in QUOTE_FIELDS.values()}, "stale": False, "error": True, "synthetic": self.provider.synthetic}
+        fetched_at, quote = self._cache[symbol]
+        age = tm.monotonic() - fetched_at
+        return {"symbol": symbol, **quote, "stale": age >= self.ttl, "age": round(age, 1), "error": False, "synthetic": self.provider.synthetic}
+
+
+    async def close(self):
+        for task in list(self._fetches.values()):
+            task.cancel()
+        await self.provider.close()
+
+
+
+
+# the provider of a name ("finnhub" without an api key: unavailable, its quotes are errors.
+# generated quotes only with "local")
+def make_quote_provider(name: str = "finnhub", api_key: str = None, timeout: float = DEFAULT_TIMEOUT) -> QuoteProvider:
+    if name == "finnhub":
+        if not api_key:
+            logger.error("No finnhub api key (FINNHUB_API_KEY), market quotes are unavailable")
+        return FinnhubQuoteProvider(api_key, timeout=timeout)
+    if name == "local":
+        logger.warning("Using the local quote provider, market quotes are synthetic")
+        return LocalQuoteProvider(timeout=timeout)
+    raise ValueError(f"unknown quote provider '{name}'")
@@ -0,0 +1,157 @@
+import re
+import numpy as np
+import pandas as pd
+from datetime import time
+
+from backtesting.market_data.columnar_cache import read_csv_cached, read_derived_cached
+from backtesting.market_data.loader import BY_DATES_DIR, get_month_files, get_time_range
+
+
+# ============================================================
+# 5m -> 1d resampling
+# ============================================================
+# daily bars per (symbol, date) from the 5m bars of a session window (utc):
+#   rth     13:30-20:00  regular trading hours
+#   eth     08:00-00:00  pre-market + rth + after-hours
+#   lr      13:25-20:00  the window of the LR strategies (entries from 13:25)
+#   "HH:MM-HH:MM"        custom window
+# a 5m bar belongs to the session if start <= bar time < end.
+#
+# bars are stamped at the session end (stamp="end"): with two feeds,
+# backtrader delivers a day's bar only after that day's session is over,
+# so strategies never see the day's close during the day. stamp="date"
+# gives 00:00 stamps like the csv_input 1d files.
+#
+# daily bars are computed for all symbols of a month file at once and cached
+# next to it (.columnar/<month>.1d_<session>.parquet, see columnar_cache.py).
+# load_store_daily_bars() resamples the 5m bars of an mmap store instead (runs
+# with --store: months ingested only into the store get daily bars too).
+#
+#   df_1d = load_daily_bars(symbols=["AAPL"], start="2022-05-01", end="2022-07-31", session="lr")
+#   df_1d = load_store_daily_bars(store, symbols=["AAPL"], start="2022-05-01", end="2022-07-31", session="lr")
+#   cerebro_run(df=df_5m, df_1d=df_1d, strategy=...)  # data_1d in StrategyBase
+
+
+SESSIONS: dict[str, tuple[time, time]] = {
+    "rth": (time(13, 30), time(20, 0)),
+    "eth": (time(8, 0), None), # to 00:00
+    "lr": (time(13, 25), time(20, 0)),
+}
+
+SESSION_PATTERN = re.compile(r"^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$")
+
+
+# (start, end) of a session name or "HH:MM-HH:MM" (end None: midnight)
+def get_session(session) -> tuple[time, time]:
+    if isinstance(session, tuple):
+        return session
+    if session in SESSIONS:
+        return SESSIONS[session]
+
+    match = SESSION_PATTERN.match(session)
+    if not match:
+        raise ValueError(f"invalid session '{session}', expected one of {list(SESSIONS)} or HH:MM-HH:MM")
+    h1, m1, h2, m2 = (int(g) for g in match.groups())
+    end = None if (h2, m2) in ((0, 0), (24, 0)) else time(h2, m2)
+    return time(h1, m1), end
+
+
+def get_session_key(session) -> str:
+    start, end = get_session(session)
+    return f"{start.strftime('%H%M')}-{end.strftime('%H%M') if end else '2400'}"
+
+
+def resample_daily(df: pd.DataFrame, session="rth", stamp: str = "end") -> pd.DataFrame:
+    start, end = get_session(session)
+    start_minutes = start.hour * 60 + start.minute
+    end_minutes = end.hour * 60 + end.minute if end else 24 * 60
+
+    minutes = df.index.hour.values * 60 + df.index.minute.values
+    mask = (minutes >= start_minutes) & (minutes < end_minutes) & df["close"].notna().values
+    df = df[mask]
+
+    days = df.index.normalize()
+    grouped = df.groupby([df["symbol"].values, days], sort=True, observed=True)
+    df_1d = grouped.agg(
+        open=("open", "first"),
+        high=("high", "max"),
+        low=("low", "min"),
+        close=("close", "last"),
+        volume=("volume", "sum"),
+        bars=("close", "size"),
+    )
+    df_1d.index.names = ["symbol", "date"]
+    df_1d = df_1d.reset_index(level="symbol")
+
+    if stamp == "end":
+        df_1d.index = df_1d.index + pd.Timedelta(minutes=end_minutes)
+    elif stamp != "date":
+        raise ValueError(f"invalid stamp '{stamp}', expected 'end' or 'date'")
+
+    df_1d.index.name = "timestamp"
+    df_1d.sort_index(ascending=True, inplace=True, kind="stable")
+    return df_1d
+
+
+def load_daily_bars(
+        symbols: list[str] = None,
+        start=None,
+        end=None,
+        session="rth",
+        stamp: str = "end",
+        data_dir: str = BY_DATES_DIR,
+    ) -> pd.DataFrame:
+
+    session_key = get_session_key(session)
+    range_start, range_end = get_time_range(start, end)
+
+    dfs = []
+    for month, filename in get_month_files(data_dir).items():
+        if range_start is not None and month + pd.offsets.MonthBegin(1) <= range_start.normalize():
+            continue
+        if range_end is not None and month >= range_end:
+            continue
+
+        df_1d = read_derived_cached(
+            filename,
+            suffix=f".1d_{session_key}_{stamp}",
+            compute=lambda: resample_daily(read_csv_cached(filename), session, stamp),
+            extra={"session": session_key, "stamp": stamp},
+        )
+        dfs.append(df_1d)
+
+    if not dfs:
+        return pd.DataFrame(columns=["symbol", "open", "high", "low", "close", "volume", "bars"], index=pd.DatetimeIndex([], name="timestamp"))
+
+    df_1d = pd.concat(dfs) if len(dfs) > 1 else dfs[0]
+    return _select_daily(df_1d, symbols, range_start, range_end)
+
+
+# rows of symbols whose (stamped) day is in [range_start day, range_end)
+def _select_daily(df_1d: pd.DataFrame, symbols: list[str], range_start: pd.Timestamp, range_end: pd.Timestamp) -> pd.DataFrame:
+    days = df_1d.index.normalize()
+    keep = np.ones(len(df_1d), dtype=bool)
+    if symbols is not None:
+        keep &= df_1d["symbol"].isin(symbols).values
+    if range_start is not None:
+        keep &= days >= range_start.normalize()
+    if range_end is not None:
+        keep &= days < range_end
+    return df_1d[keep]
+
+
+# daily bars of an mmap store (MmapStore), like load_daily_bars()
+def load_store_daily_bars(
+        store,
+        symbols: list[str] = None,
+        start=None,
+        end=None,
+        session="rth",
+        stamp: str = "end",
+    ) -> pd.DataFrame:
+
+    range_start, range_end = get_time_range(start, end)
+    # whole sessions from the day before (a session stamped at midnight belongs to the next day)
+    read_start = range_start.normalize() - pd.Timedelta(days=1) if range_start is not None else None
+    df = store.get_multi_df(symbols, read_start, range_end - pd.Timedelta(microseconds=1) if range_end is not None else None)
+    return _select_daily(resample_daily(df, session, stamp), symbols, range_start, range_end)
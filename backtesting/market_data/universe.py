@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+
+from backtesting.market_data.columnar_cache import read_csv_cached, read_derived_cached
+from backtesting.market_data.loader import BY_DATES_DIR, get_memory_cached, get_month_files, get_time_range
+
+
+# ============================================================
+# daily symbol universe
+# ============================================================
+# one row per (date, symbol) with the stats runs filter symbols on, so the
+# universe of a day is chosen before any bar data is loaded:
+#   first, last     close of the day's first and last 5m bar
+#   low, high       min low / max high of the day
+#   bars            number of bars (nan bars excluded)
+#   volume          shares (negative volumes counted as 0)
+#   dollar_volume   sum(close * volume)
+#   atr             average true range (daily bars, atr_period days, per symbol)
+# days are utc dates, like the days of run_bt_v2.
+#
+# the stats of a month file are computed once (first use after the file is
+# added or changed) and cached next to it (.columnar/<month>.universe.parquet,
+# see columnar_cache.py). atr is computed on load, across month boundaries.
+#
+# an mmap store (mmap_store.py) keeps its own universe, computed from the bars
+# it ingests (<store_dir>/<SYMBOL>/universe.bin), load_store_universe() reads it.
+#
+#   universe = load_universe(start="2022-05-01", end="2022-07-31")
+#   universe = load_store_universe(MmapStore("data_2020_2025/mmap"), start="2022-05-01", end="2022-07-31")
+#   selected = query_universe(universe, max_price=500, min_dollar_volume=1e8, top_n=20)
+#   symbols_per_date = get_symbols_per_date(selected)
+
+
+UNIVERSE_COLUMNS = ["first", "last", "low", "high", "bars", "volume", "dollar_volume", "atr"]
+ATR_PERIOD = 14
+
+# universe.bin rows of an mmap store: float64, day as epoch days (utc), atr computed on load
+STORE_UNIVERSE_COLUMNS = ["day"] + UNIVERSE_COLUMNS[:-1]
+
+
+# per (date, symbol) stats of 5m bars (timestamp index, "symbol" column), atr not included
+def compute_universe(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[df["close"].notna().values]
+    volume = df["volume"].clip(lower=0).fillna(0)
+    df = df.assign(volume=volume, dollar_volume=df["close"] * volume)
+
+    grouped = df.groupby([df.index.normalize(), df["symbol"].values], sort=True, observed=True)
+    universe = grouped.agg(
+        first=("close", "first"),
+        last=("close", "last"),
+        low=("low", "min"),
+        high=("high", "max"),
+        bars=("close", "size"),
+        volume=("volume", "sum"),
+        dollar_volume=("dollar_volume", "sum"),
+    )
+    universe.index.names = ["date", "symbol"]
+    return universe
+
+
+# average true range per symbol over the daily rows (rows sorted by date)
+def add_atr(universe: pd.DataFrame, period: int = ATR_PERIOD) -> pd.DataFrame:
+    symbols = universe.index.get_level_values("symbol")
+    prev_last = universe["last"].groupby(symbols, sort=False).shift(1)
+    true_range = np.fmax(universe["high"] - universe["low"], np.fmax((universe["high"] - prev_last).abs(), (universe["low"] - prev_last).abs()))
+    atr = true_range.groupby(symbols, sort=False).rolling(period, min_periods=1).mean().droplevel(0)
+    return universe.assign(atr=atr.reindex(universe.index))
+
+
+def load_universe(
+        symbols: list[str] = None,
+        start=None,
+        end=None,
+        data_dir: str = BY_DATES_DIR,
+        atr_period: int = ATR_PERIOD,
+    ) -> pd.DataFrame:
+
+    range_start, range_end = get_time_range(start, end)
+    # a lookback month for the atr of the first days
+    lookback_start = range_start - pd.Timedelta(days=2 * atr_period) if range_start is not None else None
+
+    dfs = []
+    for month, filename in get_month_files(data_dir).items():
+        if lookback_start is not None and month + pd.offsets.MonthBegin(1) <= lookback_start.normalize():
+            continue
+        if range_end is not None and month >= range_end:
+            continue
+        dfs.append(get_memory_cached(filename, "universe", lambda: read_derived_cached(
+            filename,
+            suffix=".universe",
+            compute=lambda: compute_universe(read_csv_cached(filename, columns=["symbol", "high", "low", "close", "volume"])),
+        )))
+
+    if not dfs:
+        return _empty_universe()
+
+    universe = pd.concat(dfs) if len(dfs) > 1 else dfs[0]
+    # a day's after-hours bars past midnight are in the next month file: merge the split days
+    if universe.index.has_duplicates:
+        universe = _merge_days(universe)
+    return _select(add_atr(universe.sort_index(), atr_period), symbols, range_start, range_end)
+
+
+def _empty_universe() -> pd.DataFrame:
+    return pd.DataFrame(columns=UNIVERSE_COLUMNS, index=pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), []], names=["date", "symbol"]))
+
+
+# rows of the symbols, in [range_start, range_end)
+def _select(universe: pd.DataFrame, symbols: list[str], range_start: pd.Timestamp, range_end: pd.Timestamp) -> pd.DataFrame:
+    dates = universe.index.get_level_values("date")
+    keep = np.ones(len(universe), dtype=bool)
+    if symbols is not None:
+        keep &= universe.index.get_level_values("symbol").isin(symbols)
+    if range_start is not None:
+        keep &= dates >= range_start.normalize()
+    if range_end is not None:
+        keep &= dates < range_end
+    return universe[keep]
+
+
+def _merge_days(universe: pd.DataFrame) -> pd.DataFrame:
+    return universe.groupby(level=["date", "symbol"], sort=True).agg(
+        first=("first", "first"),
+        last=("last", "last"),
+        low=("low", "min"),
+        high=("high", "max"),
+        bars=("bars", "sum"),
+        volume=("volume", "sum"),
+        dollar_volume=("dollar_volume", "sum"),
+    )
+
+
+# ----------------------------------------------
+# mmap store universe
+
+# universe.bin rows (STORE_UNIVERSE_COLUMNS) of one symbol's bars
+def to_store_universe(df: pd.DataFrame) -> np.ndarray:
+    universe = compute_universe(df)
+    days = universe.index.get_level_values("date").values.astype("datetime64[D]").astype(np.int64)
+    values = universe[STORE_UNIVERSE_COLUMNS[1:]].to_numpy(dtype=np.float64)
+    return np.column_stack([days.astype(np.float64), values]).reshape(-1, len(STORE_UNIVERSE_COLUMNS))
+
+
+# one row of a day split between two ingests (stored part a, appended part b)
+def merge_store_universe_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    _, first, _, low, high, bars, volume, dollar_volume = a
+    day, _, last = b[:3]
+    return np.array([day, first, last, min(low, b[3]), max(high, b[4]), bars + b[5], volume + b[6], dollar_volume + b[7]])
+
+
+# universe of an mmap store (MmapStore), like load_universe()
+def load_store_universe(
+        store,
+        symbols: list[str] = None,
+        start=None,
+        end=None,
+        atr_period: int = ATR_PERIOD,
+    ) -> pd.DataFrame:
+
+    range_start, range_end = get_time_range(start, end)
+    dfs = []
+    for symbol in (symbols if symbols is not None else store.symbols):
+        if symbol not in store:
+            continue
+        values = store.get_universe_array(symbol)
+        if not len(values):
+            continue
+        # the last row of each day (a day continued by an ingest has its merged row appended)
+        values = values[np.r_[values[1:, 0] != values[:-1, 0], True]]
+        dates = pd.DatetimeIndex(values[:, 0].astype(np.int64).astype("datetime64[D]").astype("datetime64[ns]"))
+        dfs.append(pd.DataFrame(
+            values[:, 1:],
+            index=pd.MultiIndex.from_arrays([dates, [symbol] * len(values)], names=["date", "symbol"]),
+            columns=STORE_UNIVERSE_COLUMNS[1:],
+        ))
+
+    if not dfs:
+        return _empty_universe()
+    universe = pd.concat(dfs).astype({"bars": np.int64})
+    return _select(add_atr(universe.sort_index(), atr_period), symbols, range_start, range_end)
+
+
+# ----------------------------------------------
+# queries
+
+# rows of the universe that pass all given filters, top_n: per date, ranked by `by` (descending)
+def query_universe(
+        universe: pd.DataFrame,
+        symbols: list[str] = None,
+        min_price: float = None, # first >= min_price
+        max_price: float = None, # first < max_price
+        min_dollar_volume: float = None,
+        min_bars: int = None,
+        min_atr: float = None,
+        top_n: int = None,
+        by: str = "dollar_volume",
+    ) -> pd.DataFrame:
+
+    keep = np.ones(len(universe), dtype=bool)
+    if symbols is not None:
+        keep &= universe.index.get_level_values("symbol").isin(symbols)
+    if min_price is not None:
+        keep &= (universe["first"] >= min_price).values
+    if max_price is not None:
+        keep &= (universe["first"] < max_price).values
+    if min_dollar_volume is not None:
+        keep &= (universe["dollar_volume"] >= min_dollar_volume).values
+    if min_bars is not None:
+        keep &= (universe["bars"] >= min_bars).values
+    if min_atr is not None:
+        keep &= (universe["atr"] >= min_atr).values
+    selected = universe[keep]
+
+    if top_n is not None:
+        rank = selected[by].groupby(level="date", sort=False).rank(method="first", ascending=False)
+        selected = selected[(rank <= top_n).values]
+    return selected
+
+
+# {date: [symbols]} of query_universe() rows (symbols ranked by dollar volume)
+def get_symbols_per_date(universe: pd.DataFrame, by: str = "dollar_volume") -> dict[pd.Timestamp, list[str]]:
+    if not len(universe):
+        return {}
+    ranked = universe.sort_values(by, ascending=False, kind="stable").sort_index(level="date", kind="stable", sort_remaining=False)
+    symbols = ranked.index.get_level_values("symbol")
+    dates = ranked.index.get_level_values("date")
+    bounds = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+    return {dates[i]: list(symbols[i:j]) for i, j in zip(np.r_[0, bounds], np.r_[bounds, len(ranked)])}
@@ -3,35 +3,39 @@ Optimized API Server with Advanced Performance Features
 - Redis caching for frequently accessed data
 - Connection pooling for database operations
 - Async/await for non-blocking operations
+- Warm backtest worker pool (no subprocess per request)
 - Request/response compression
 - Rate limiting and security
 - Database query optimization
 - Memory management improvements
 """
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-import subprocess
 import json
 import os
 import csv
 from datetime import datetime, timedelta
 import uuid
-import glob
-import ast
-import re
 import asyncio
-import aiofiles
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import functools
 from cachetools import TTLCache
 import hashlib
 
+# Warm in-process backtest workers
+from backtesting.backtrader.worker_pool import BacktestPool, DEFAULT_WORKERS
+from backtesting.backtrader.jobs import SingleFlight, get_config_hash
+from backtesting.functional.results import BacktestRunResult
+from backtesting.backtrader.result_store import SORT_FIELDS, ResultStore, get_cursor, open_result_store
+from backtesting.backtrader.strategy_registry import get_strategy_registry
+from backtesting.market_data.downsample import get_bar_slice, get_bar_slice_etag, is_historical_range
+
 # Enhanced imports for optimization
 try:
     import redis.asyncio as redis
@@ -94,6 +98,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Link", "ETag"],  # pagination of history and trades, bars revalidation
     max_age=3600,  # Cache CORS preflight for 1 hour
 )
 
@@ -117,6 +122,15 @@ else:
 # Thread pool for CPU-intensive tasks
 executor = ThreadPoolExecutor(max_workers=4)
 
+# Backtest worker processes (imports and market data preloaded once per worker)
+backtest_pool = BacktestPool(workers=int(os.getenv('BACKTEST_WORKERS', DEFAULT_WORKERS)))
+
+# Strategies (strategies/st_*.py, shared with the backtest runner)
+strategy_registry = get_strategy_registry()
+
+# Running backtests by config hash (identical concurrent requests share one run)
+backtest_flights = SingleFlight()
+
 # Cache decorators and utilities
 def cache_key(*args, **kwargs):
     """Generate a consistent cache key from arguments"""
@@ -202,98 +216,66 @@ class BacktestResult(BaseModel):
 
 # Optimized storage with persistence
 class OptimizedStorage:
-    def __init__(self):
-        self.backtest_results: List[BacktestResult] = []
+    def __init__(self, path: str = 'backtest_results.db'):
+        self.path = path
+        self.store: ResultStore = None
         self.recent_errors = []
     
     async def load_persisted_data(self):
-        """Load persisted data from file on startup"""
+        """Open the result store on startup (reads no results; imports backtest_results.json once)"""
         try:
-            if os.path.exists('backtest_results.json'):
-                async with aiofiles.open('backtest_results.json', 'r') as f:
-                    data = await f.read()
-                    results_data = json.loads(data)
-                    self.backtest_results = [
-                        BacktestResult(**result) for result in results_data
-                    ]
-                    logger.info(f"Loaded {len(self.backtest_results)} persisted backtest results")
+            loop = asyncio.get_event_loop()
+            self.store = await loop.run_in_executor(executor, open_result_store, self.path)
+            logger.info(f"Result store {self.path}: {self.store.count()} persisted backtest results")
         except Exception as e:
-            logger.error(f"Error loading persisted data: {e}")
+            logger.error(f"Error opening result store: {e}")
     
     async def persist_data(self):
-        """Persist data to file"""
-        try:
-            data = [result.dict() for result in self.backtest_results]
-            async with aiofiles.open('backtest_results.json', 'w') as f:
-                await f.write(json.dumps(data, default=str, indent=2))
-        except Exception as e:
-            logger.error(f"Error persisting data: {e}")
+        """Close the result store (results are persisted as they are added)"""
+        if self.store is not None:
+            self.store.close()
+            self.store = None
     
     async def add_result(self, result: BacktestResult):
-        """Add result and persist"""
-        self.backtest_results.append(result)
-        await self.persist_data()
+        """Add result (one insert, nothing else is rewritten)"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(executor, self.store.add, result.dict())
         
         # Cache the result
         cache_key_str = f"backtest_result_{result.id}"
         await set_cached_data(cache_key_str, result.dict(), ttl=3600)
+    
+    async def list_results(self, **filters) -> List[Dict]:
+        """Result headers (no trade details), newest first"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, functools.partial(self.store.list_headers, **filters))
+    
+    async def get_trades(self, result_id: str, after: Optional[int] = None, limit: Optional[int] = None):
+        """Result header and a page of its trades (None, []: unknown id)"""
+        def read():
+            header = self.store.get(result_id)
+            return header, (self.store.get_trades(result_id, after=after, limit=limit) if header else [])
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, read)
+    
+    def count(self) -> int:
+        return self.store.count() if self.store is not None else 0
 
 # Global storage instance
 storage = OptimizedStorage()
 
 # Async utilities
-async def run_subprocess_async(cmd: List[str], timeout: int = 300):
-    """Run subprocess asynchronously"""
+async def run_backtest_async(args: List[str], timeout: int = 300):
+    """Run a backtest in a warm worker process"""
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=os.getcwd()
-        )
-        
-        stdout, stderr = await asyncio.wait_for(
-            process.communicate(), timeout=timeout
-        )
-        
-        return {
-            'returncode': process.returncode,
-            'stdout': stdout.decode(),
-            'stderr': stderr.decode()
-        }
+        return await backtest_pool.run(args, timeout=timeout)
     except asyncio.TimeoutError:
-        logger.error(f"Subprocess timeout: {cmd}")
+        logger.error(f"Backtest timeout: {args}")
         raise HTTPException(status_code=408, detail="Process timeout")
     except Exception as e:
-        logger.error(f"Subprocess error: {e}")
+        logger.error(f"Backtest worker error: {e}")
         raise HTTPException(status_code=500, detail=f"Process error: {str(e)}")
 
-async def read_csv_async(file_path: str) -> List[Dict]:
-    """Read CSV file asynchronously"""
-    try:
-        async with aiofiles.open(file_path, 'r') as f:
-            content = await f.read()
-            
-        # Parse CSV in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        csv_data = await loop.run_in_executor(
-            executor, 
-            parse_csv_content, 
-            content
-        )
-        return csv_data
-    except Exception as e:
-        logger.error(f"Error reading CSV {file_path}: {e}")
-        return []
-
-def parse_csv_content(content: str) -> List[Dict]:
-    """Parse CSV content in thread pool"""
-    import io
-    import csv
-    
-    reader = csv.DictReader(io.StringIO(content))
-    return list(reader)
-
 # Optimized route handlers
 @app.get("/")
 async def root():
@@ -319,19 +301,15 @@ async def health_check():
         "timestamp": datetime.now().isoformat(),
         "redis": redis_status,
         "cache_size": len(memory_cache) if not REDIS_AVAILABLE else "redis",
-        "active_results": len(storage.backtest_results)
+        "active_results": storage.count()
     }
 
 @app.post("/api/backtest/run", response_model=BacktestResult)
 async def run_backtest_optimized(config: BacktestConfig, background_tasks: BackgroundTasks):
     """Optimized backtest execution with caching and async processing"""
     
-    # Generate cache key based on config
-    config_hash = cache_key(
-        config.strategyId, config.symbol, config.timeframe,
-        config.startDate, config.endDate, config.initialCapital,
-        str(config.parameters)
-    )
+    # Generate cache key based on config (every field)
+    config_hash = get_config_hash(config.dict())
     cache_key_str = f"backtest_{config_hash}"
     
     # Check cache first
@@ -352,52 +330,64 @@ async def run_backtest_optimized(config: BacktestConfig, background_tasks: Backg
                 detail=f"Invalid strategyId '{config.strategyId}'. Available: {', '.join(strategy_ids)}"
             )
         
-        # Generate unique ID
-        backtest_id = str(uuid.uuid4())
-        
-        # Build command
-        cmd = await build_backtest_command(config)
-        logger.info(f"Running backtest command: {' '.join(cmd)}")
-        
-        # Run backtest asynchronously
-        result = await run_subprocess_async(cmd, timeout=300)
-        
-        if result['returncode'] != 0:
-            logger.error(f"Backtesting failed: {result['stderr']}")
+        # A listed strategy whose file fails to import (e.g. a missing indicator module)
+        try:
+            await asyncio.get_running_loop().run_in_executor(executor, strategy_registry.load_class, config.strategyId)
+        except Exception as e:
             raise HTTPException(
-                status_code=500, 
-                detail=f"Backtesting failed: {result['stderr']}"
+                status_code=400,
+                detail=f"Strategy '{config.strategyId}' can't be loaded: {e!r}"
             )
         
-        # Parse results asynchronously
-        backtest_result = await parse_backtest_output(
-            result['stdout'], backtest_id, config
-        )
+        # Identical configs requested while this one runs await its result (single flight)
+        backtest_result = await backtest_flights.run(config_hash, lambda: execute_backtest(config))
         
         # Store result and cache in background
         background_tasks.add_task(store_and_cache_result, backtest_result, cache_key_str)
         
         return backtest_result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error running backtest: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+async def execute_backtest(config: BacktestConfig) -> BacktestResult:
+    """Run a backtest in a worker process and build its result"""
+    # Generate unique ID
+    backtest_id = str(uuid.uuid4())
+    
+    # Build command
+    cmd = await build_backtest_command(config)
+    logger.info(f"Running backtest: run_bt_v2.py {' '.join(cmd)}")
+    
+    # Run backtest in a worker process
+    result = await run_backtest_async(cmd, timeout=300)
+    
+    if result['result'] is None:
+        logger.error(f"Backtesting failed: no data for {config.symbol}")
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Backtesting failed: no data for {config.symbol}"
+        )
+    
+    # Typed result of the run (metrics and trades)
+    backtest_result = build_backtest_result(result['result'], backtest_id, config)
+    
+    return backtest_result
+
 async def build_backtest_command(config: BacktestConfig) -> List[str]:
-    """Build backtest command asynchronously"""
+    """Build backtest arguments (run_bt_v2.py command line) asynchronously"""
     if config.symbol in ["AAPL", "MSFT", "NVDA", "AMZN", "TSLA"]:
         symbol_arg = "--symbols5"
         cmd = [
-            "python", 
-            "backtesting/backtrader/run_bt_v2.py",
             symbol_arg,
             "--no-plot",
             f"--strategy={config.strategyId}"
         ]
     else:
         cmd = [
-            "python", 
-            "backtesting/backtrader/run_bt_v2.py",
             "--symbols", config.symbol,
             "--no-plot",
             f"--strategy={config.strategyId}"
@@ -411,53 +401,26 @@ async def build_backtest_command(config: BacktestConfig) -> List[str]:
     
     return cmd
 
-async def parse_backtest_output(output: str, backtest_id: str, config: BacktestConfig) -> BacktestResult:
-    """Parse backtest output asynchronously"""
-    output_lines = output.split('\n')
-    
-    # Initialize metrics
-    metrics = {
-        'total_return': 0.0,
-        'win_rate': 0.0,
-        'total_trades': 0,
-        'profit_factor': 0.0,
-        'sharpe_ratio': 0.0,
-        'max_drawdown': 0.0,
-        'final_value': config.initialCapital
-    }
-    
-    # Parse metrics
-    for line in output_lines:
-        if "Total P&L:" in line:
-            try:
-                pnl = float(line.split("$")[1].strip())
-                metrics['total_return'] = (pnl / config.initialCapital) * 100
-                metrics['final_value'] = config.initialCapital + pnl
-            except:
-                pass
-        elif "Win Rate:" in line:
-            try:
-                metrics['win_rate'] = float(line.split("%")[0].split(":")[-1].strip())
-            except:
-                pass
-        elif "Total Trades:" in line:
-            try:
-                metrics['total_trades'] = int(line.split(":")[-1].strip())
-            except:
-                pass
-        elif "Profit Factor:" in line:
-            try:
-                metrics['profit_factor'] = float(line.split(":")[-1].strip())
-            except:
-                pass
-        elif "Sharpe Ratio:" in line:
-            try:
-                metrics['sharpe_ratio'] = float(line.split(":")[-1].strip())
-            except:
-                pass
-    
-    # Read trade details asynchronously
-    trade_details = await read_trade_details_async()
+def build_backtest_result(run_result: BacktestRunResult, backtest_id: str, config: BacktestConfig) -> BacktestResult:
+    """Build the API result from the typed run result (no output parsing, no csv lookup)"""
+    metrics = run_result.metrics
+    total_return = (metrics.pnl / config.initialCapital) * 100
+    final_value = config.initialCapital + metrics.pnl
+    
+    trade_details = [
+        TradeDetail(
+            id=i + 1,
+            entryDate=trade.open.isoformat(),
+            exitDate=trade.close.isoformat(),
+            entryPrice=trade.open_price,
+            exitPrice=trade.close_price,
+            direction=trade.type,
+            profit=trade.pnl,
+            profitPercent=trade.percentage,
+            size=trade.size
+        )
+        for i, trade in enumerate(run_result.trades)
+    ]
     
     return BacktestResult(
         id=backtest_id,
@@ -468,210 +431,113 @@ async def parse_backtest_output(output: str, backtest_id: str, config: BacktestC
         startDate=config.startDate,
         endDate=config.endDate,
         initialCapital=config.initialCapital,
-        finalCapital=metrics['final_value'],
+        finalCapital=final_value,
         initialBalance=config.initialCapital,
-        finalBalance=metrics['final_value'],
-        totalReturn=metrics['total_return'],
-        roi=metrics['total_return'],
-        maxDrawdown=metrics['max_drawdown'],
-        sharpeRatio=metrics['sharpe_ratio'],
-        winRate=metrics['win_rate'],
-        profitFactor=metrics['profit_factor'],
-        trades=metrics['total_trades'],
-        tradesCount=metrics['total_trades'],
+        finalBalance=final_value,
+        totalReturn=total_return,
+        roi=total_return,
+        maxDrawdown=(metrics.max_drawdown / config.initialCapital) * 100,
+        sharpeRatio=metrics.sharpe_ratio,
+        winRate=metrics.win_rate,
+        profitFactor=metrics.profit_factor if metrics.profit_factor is not None else 0.0,
+        trades=metrics.trades,
+        tradesCount=metrics.trades,
         tradesDetails=trade_details,
         createdAt=datetime.now().isoformat(),
         cached=False
     )
 
-async def read_trade_details_async() -> List[TradeDetail]:
-    """Read trade details from CSV asynchronously"""
-    try:
-        outputs_dir = "backtesting/outputs"
-        if not os.path.exists(outputs_dir):
-            return []
-        
-        csv_files = [f for f in os.listdir(outputs_dir) if f.endswith('.csv')]
-        if not csv_files:
-            return []
-        
-        latest_csv = max(csv_files, key=lambda x: os.path.getctime(os.path.join(outputs_dir, x)))
-        csv_path = os.path.join(outputs_dir, latest_csv)
-        
-        csv_data = await read_csv_async(csv_path)
-        
-        trade_details = []
-        for i, row in enumerate(csv_data):
-            try:
-                trade_detail = TradeDetail(
-                    id=i + 1,
-                    entryDate=row.get('Entry Date', ''),
-                    exitDate=row.get('Exit Date', ''),
-                    entryPrice=float(row.get('Entry Price', 0)),
-                    exitPrice=float(row.get('Exit Price', 0)),
-                    direction='long',
-                    profit=float(row.get('P&L', 0)),
-                    profitPercent=float(row.get('P&L %', 0)),
-                    size=float(row.get('Size', 0)) if row.get('Size') else None
-                )
-                trade_details.append(trade_detail)
-            except Exception as e:
-                logger.error(f"Error parsing trade detail: {e}")
-                continue
-        
-        return trade_details
-        
-    except Exception as e:
-        logger.error(f"Error reading trade details: {e}")
-        return []
-
 async def store_and_cache_result(result: BacktestResult, cache_key: str):
     """Store result and update cache in background"""
     await storage.add_result(result)
     await set_cached_data(cache_key, result.dict(), ttl=3600)
 
-@app.get("/api/backtest/history", response_model=List[BacktestResult])
-async def get_backtest_history_optimized():
-    """Get backtest history with caching"""
-    cache_key_str = "backtest_history"
-    
-    # Check cache first
-    cached_data = await get_cached_data(cache_key_str)
-    if cached_data:
-        return [BacktestResult(**item) for item in cached_data]
-    
-    # Get from storage and cache
-    results = storage.backtest_results
-    await set_cached_data(cache_key_str, [r.dict() for r in results], ttl=60)
+# Fields of the history list (trade details come from /api/backtest/{id}/trades)
+HISTORY_FIELDS = [field for field in BacktestResult.__fields__ if field != "tradesDetails"]
+MAX_PAGE_SIZE = 500
+
+@app.get("/api/backtest/history")
+async def get_backtest_history_optimized(
+    request: Request,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    strategyId: Optional[str] = None,
+    symbol: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    minSharpe: Optional[float] = None,
+    sort: str = "createdAt",
+    order: str = "desc",
+    fields: Optional[str] = None,
+):
+    """Get a page of backtest history with caching (no trade details, next page cursor in X-Next-Cursor)"""
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort '{sort}'. Available: {', '.join(SORT_FIELDS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order, must be 'asc' or 'desc'")
+    selected_fields = HISTORY_FIELDS
+    if fields:
+        selected_fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected_fields if field not in HISTORY_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(unknown)}. Available: {', '.join(HISTORY_FIELDS)}")
+    
+    # One cache entry per page query
+    cache_key_str = f"backtest_history_{cache_key(**request.query_params)}"
+    cached_page = await get_cached_data(cache_key_str)
+    if cached_page:
+        return JSONResponse(content=cached_page["items"], headers=cached_page["headers"])
     
-    return results
-
-async def get_strategies_cached():
-    """Get strategies with caching"""
-    cache_key_str = "strategies_list"
+    try:
+        headers = await storage.list_results(
+            symbol=symbol,
+            strategy_id=strategyId,
+            start_date=startDate,
+            end_date=endDate,
+            min_sharpe=minSharpe,
+            sort=sort,
+            descending=order == "desc",
+            after=cursor,
+            limit=limit + 1  # one more: is there a next page
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    cached_strategies = await get_cached_data(cache_key_str)
-    if cached_strategies:
-        return cached_strategies
+    page = headers[:limit]
+    response_headers = {}
+    if len(headers) > limit:
+        next_cursor = get_cursor(page[-1], sort)
+        response_headers["X-Next-Cursor"] = next_cursor
+        response_headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
     
-    # Generate strategies list
-    strategies = await generate_strategies_list()
-    await set_cached_data(cache_key_str, strategies, ttl=600)  # 10-minute cache
+    items = [{field: header.get(field) for field in selected_fields} for header in page]
+    await set_cached_data(cache_key_str, {"items": items, "headers": response_headers}, ttl=60)
     
-    return strategies
+    return JSONResponse(content=items, headers=response_headers)
 
-async def generate_strategies_list():
-    """Generate strategies list asynchronously"""
-    strategy_dir = os.path.join(os.path.dirname(__file__), 'backtesting', 'backtrader', 'strategies')
-    pattern = os.path.join(strategy_dir, 'st_*.py')
-    strategy_files = glob.glob(pattern)
-    strategies = []
-    
-    # Process files in parallel
-    tasks = [process_strategy_file(file_path) for file_path in strategy_files]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+@app.get("/api/backtest/{backtest_id}/trades", response_model=List[TradeDetail])
+async def get_backtest_trades_optimized(backtest_id: str, limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE * 10), cursor: Optional[int] = None):
+    """Get a page of the trades of a backtest (next page cursor in X-Next-Cursor)"""
+    header, trades = await storage.get_trades(backtest_id, after=cursor, limit=limit + 1)
+    if header is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
     
-    for result in results:
-        if isinstance(result, dict):
-            strategies.append(result)
-        elif isinstance(result, Exception):
-            logger.error(f"Error processing strategy file: {result}")
+    page = trades[:limit]
+    response_headers = {"X-Total-Count": str(header.get("trades") or 0)}
+    if len(trades) > limit:
+        response_headers["X-Next-Cursor"] = str(page[-1]["id"])
     
-    return strategies
+    return JSONResponse(content=page, headers=response_headers)
 
-async def process_strategy_file(file_path: str) -> Dict:
-    """Process strategy file asynchronously"""
+async def get_strategies_cached():
+    """Get strategies from the registry (files re-parsed only when they change, no TTL)"""
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, parse_strategy_file, file_path)
-
-def parse_strategy_file(file_path: str) -> Dict:
-    """Parse strategy file in thread pool"""
-    file_name = os.path.basename(file_path)
-    
-    if not (file_name.startswith('st_') and file_name.endswith('.py')):
-        raise ValueError(f"Invalid strategy file: {file_name}")
-    
-    strategy_id = file_name[3:-3]
-    class_name = None
-    description = ""
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source = f.read()
-        
-        module = ast.parse(source)
-        module_doc = ast.get_docstring(module)
-        if module_doc:
-            description = module_doc
-        
-        # Find the first class definition
-        for node in module.body:
-            if isinstance(node, ast.ClassDef):
-                class_name = node.name
-                class_doc = ast.get_docstring(node)
-                if class_doc:
-                    description = class_doc
-                
-                # Check for DESCRIPTION attribute
-                for item in node.body:
-                    if isinstance(item, ast.Assign):
-                        for target in item.targets:
-                            if isinstance(target, ast.Name) and target.id == 'DESCRIPTION':
-                                if isinstance(item.value, ast.Constant):
-                                    description = item.value.value
-                                break
-                        if description:
-                            break
-                break
-    except Exception as e:
-        logger.error(f"Error parsing {file_name}: {e}")
-        raise e
-    
-    # Format strategy name
-    if class_name:
-        name = format_strategy_name(class_name)
-    else:
-        name = strategy_id.replace('_', ' ').title()
-    
-    return {
-        "id": strategy_id,
-        "name": name,
-        "description": description,
-        "type": "custom",
-        "parameters": []
-    }
-
-def format_strategy_name(class_name: str) -> str:
-    """Format strategy class name to readable name"""
-    if class_name.startswith('Strategy'):
-        name = class_name[len('Strategy'):]
-    else:
-        name = class_name
-    
-    if name.isdigit():
-        return name
-    
-    parts = name.split('_')
-    formatted_parts = []
-    
-    for i, part in enumerate(parts):
-        if i == len(parts) - 1 and (part.isupper() or part in {'LR', 'Pivot', 'Long', 'Short'}):
-            if len(parts) > 1:
-                formatted_parts[-1] = formatted_parts[-1] + f' ({part})'
-            else:
-                formatted_parts.append(f'({part})')
-        else:
-            words = re.findall(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+', part)
-            formatted = ' '.join(words)
-            if len(words) > 1 and i != len(parts) - 1:
-                formatted = '-'.join(words)
-            formatted_parts.append(formatted)
-    
-    return ' '.join([p for p in formatted_parts if p])
+    strategies = await loop.run_in_executor(executor, strategy_registry.list_strategies)
+    return [strategy.to_dict() for strategy in strategies]
 
 @app.get("/api/strategies")
 async def get_strategies():
-    """Get available strategies with caching"""
+    """Get available strategies (shared registry with the backtest runner)"""
     return await get_strategies_cached()
 
 @app.get("/api/symbols")
@@ -688,6 +554,34 @@ async def get_symbols():
     
     return symbols
 
+@app.get("/api/data/bars")
+async def get_bars(
+    request: Request,
+    symbol: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    maxPoints: int = Query(1000, ge=10, le=100000),
+):
+    """5m bars of a symbol, downsampled to maxPoints (OHLC preserving), with ETag revalidation"""
+    loop = asyncio.get_running_loop()
+    try:
+        etag = await loop.run_in_executor(executor, get_bar_slice_etag, symbol, start, end, maxPoints)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid range: {e}")
+    
+    # Historical ranges never change: cache for a year (a changed data file gets a new ETag)
+    cache_control = "public, max-age=31536000, immutable" if is_historical_range(start, end) else "public, max-age=60"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    
+    bar_slice = await loop.run_in_executor(executor, get_bar_slice, symbol, start, end, maxPoints)
+    if not bar_slice.points:
+        raise HTTPException(status_code=404, detail=f"No bars for {symbol} in this range")
+    return Response(content=bar_slice.body, media_type="application/json", headers=headers)
+
 # Startup and shutdown events
 @app.on_event("startup")
 async def startup_event():
@@ -695,6 +589,10 @@ async def startup_event():
     logger.info("Starting optimized API server...")
     await storage.load_persisted_data()
     
+    # Start the backtest workers now, not on the first request
+    pids = await asyncio.get_running_loop().run_in_executor(None, backtest_pool.start)
+    logger.info(f"Backtest workers ready: {pids}")
+    
     if REDIS_AVAILABLE:
         try:
             redis_conn = await get_redis()
@@ -712,6 +610,7 @@ async def shutdown_event():
     if REDIS_AVAILABLE and redis_client:
         await redis_client.close()
     
+    backtest_pool.close()
     executor.shutdown(wait=True)
 
 if __name__ == "__main__":
@@ -56,9 +56,9 @@ filename="503symbols_2022-05.csv" # per month
 # path = os.path.join(project_root, "data_2020_2025", "symbols")
 # filename="NVR_5min_eth_2020-04-01_to_2025-04-10.csv" # month step
 
-df_5m = pd.read_csv(os.path.join(path, filename), parse_dates=["timestamp"])
-df_5m = df_5m.set_index("timestamp")
-df_5m.sort_index(ascending=True, inplace=True)
+# parsed once, then read from the columnar cache (data_2020_2025/by_dates/.columnar)
+from backtesting.market_data.columnar_cache import read_csv_cached
+df_5m = read_csv_cached(os.path.join(path, filename))
 
 
 # Selecting a subset of data (one day)
@@ -26,10 +26,10 @@ filename="AAPL_5min_eth_2020-04-01_to_2025-04-10.csv" # month step
 # path = f"{cwd}\\data_2020_2025\\indexes"
 # filename="VXX_5min_eth_2020-04-01_to_2025-04-10.csv" # month step
 
-df_5m = pd.read_csv(f"{path}/{filename}", parse_dates=["timestamp"])
-df_5m = df_5m.set_index("timestamp")
-df_5m.sort_index(ascending=True, inplace=True)
-df_5m = df_5m.ffill()  # Forward-fill the NaN values
+from backtesting.market_data.columnar_cache import read_csv_cached
+df_5m = read_csv_cached(f"{path}/{filename}")
+from backtesting.market_data.quality import repair_bars
+df_5m, df_5m_quality = repair_bars(df_5m)  # Drop missing (nan) bars, fill gaps inside a session with flat bars
 
 
 
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from backtesting.market_data.compact import compact_bars, concat_compact, restore_bars
+
+
+def _bars(day: str, closes: list[float]) -> pd.DataFrame:
+    index = pd.date_range(day, periods=len(closes), freq="5min", name="timestamp")
+    return pd.DataFrame({
+        "symbol": ["AAPL"] * len(closes),
+        "open": closes,
+        "close": closes,
+        "volume": [100.0] * len(closes),
+    }, index=index)
+
+
+def test_restore_bars_after_concat_of_float32_and_float64_months():
+    month_float32 = _bars("2022-05-02 13:30", [145.265, 145.27, 146.1])
+    month_float64 = _bars("2022-06-01 13:30", [150.123456, 151.0]) # more decimals: stays float64
+    parts = [compact_bars(month_float32), compact_bars(month_float64)]
+    assert parts[0]["close"].dtype == np.float32
+    assert parts[1]["close"].dtype == np.float64
+
+    df = restore_bars(concat_compact(parts))
+
+    expected = pd.concat([month_float32, month_float64])
+    np.testing.assert_array_equal(df["close"].to_numpy(), expected["close"].to_numpy())
+    np.testing.assert_array_equal(df["open"].to_numpy(), expected["open"].to_numpy())
+    assert df["close"].iloc[0] == 145.265